@@ -1,144 +1,585 @@
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, 
-                            QWidget, QTextEdit, QLabel, QMenu, QRadioButton, QCheckBox)
-from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer, QPoint
-from PyQt6.QtGui import QTextCharFormat, QColor, QFont, QActionGroup, QIcon
-import socketio
-import speech_recognition as sr
+                            QHBoxLayout, QWidget, QTextEdit, QLabel, QRadioButton,
+                            QCheckBox, QComboBox, QFileDialog, QLineEdit, QDialog)
+from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer
+from PyQt6.QtGui import QTextCharFormat, QColor, QFont, QIcon
+import asyncio
+import json
 import sys
-import queue
 import logging
 import threading
+import time
+from collections import deque
 from datetime import datetime
-import pyaudio
-import wave
-import io
-import subprocess
+import os
+from transcript_renderer import TranscriptRenderer, WindowedTranscriptRenderer
+from render_scheduler import RenderScheduler
+from transcript_store import TranscriptStore
+from transcript_index import TranscriptIndex
+from tag_formats import TagClassifier, REGULAR_COLOR, REGULAR_SIZE
+from streaming_profiles import (STREAMING_PROFILES, DEFAULT_STREAMING_PROFILE,
+                                FrameBatcher, profile_sizes)
+from audio_codec import DEFAULT_CODEC, available_codecs
+from audio_queue import AudioSendQueue
+from app_logging import SampledLogger, setup_logging
+from latency_stats import LatencyTracker
+from text_injection import TextInjector
+from audio_devices import AudioDeviceManager
+
+audio_log = logging.getLogger('whissle.audio')
+ui_log = logging.getLogger('whissle.ui')
+# Per-chunk and per-transcript events are sampled and cost nothing when DEBUG is off
+audio_hot_log = SampledLogger(audio_log)
+ui_hot_log = SampledLogger(ui_log)
+
+# Bounded queue between capture and the network sender thread; the policy
+# decides what happens when the network cannot keep up (see audio_queue.py)
+SEND_QUEUE_MAXSIZE = 50
+SEND_QUEUE_POLICY = os.environ.get('WHISSLE_SEND_POLICY', 'coalesce')
+
+# Set to 1 to run capture and streaming in a worker process (see capture_worker.py);
+# off by default
+AUDIO_PROCESS = os.environ.get('WHISSLE_AUDIO_PROCESS') == '1'
+
+# pyaudio, python-socketio and the VAD are imported on first use, so none of
+# them (or the audio device scan) is on the path to the first window; see
+# benchmarks/startup_benchmark.py
+
+TRANSCRIPT_STYLE = """
+    QTextEdit {
+        background-color: white;
+        border: 3px solid #0f9eef;
+        border-radius: 10px;
+        padding: 20px;
+        font-family: Arial;
+        font-size: 20px;
+        line-height: 1.8;
+        min-height: 400px;
+    }
+"""
+
+# Set once on the container instead of on every radio button and checkbox
+MODEL_SELECTOR_STYLE = """
+    QRadioButton {
+        font-size: 16px;
+        padding: 8px;
+        border: 2px solid transparent;
+        border-radius: 6px;
+        background-color: #e8f0fe;
+        color: #0f9eef;
+        font-weight: bold;
+        margin: 2px;
+    }
+    QRadioButton:hover {
+        background-color: #d0e3fc;
+    }
+    QRadioButton:checked {
+        border-color: #0f9eef;
+        background-color: #d0e3fc;
+    }
+    QRadioButton::indicator {
+        width: 16px;
+        height: 16px;
+        border-radius: 8px;
+        border: 2px solid #0f9eef;
+        margin-right: 8px;
+    }
+    QRadioButton::indicator:checked {
+        background-color: #0f9eef;
+        border: 2px solid #0f9eef;
+    }
+    QLabel, QCheckBox {
+        font-size: 14px;
+        color: #333;
+    }
+"""
+
+# Finals kept in the transcript documents; older ones are paged in from the
+# session log when the main view is scrolled to the top
+TRANSCRIPT_MAX_BLOCKS = 300
+COMPARE_PANE_MAX_BLOCKS = 300
+# Most recent matches shown by a transcript search; the count covers all of them
+SEARCH_MAX_RESULTS = 200
 
 class AudioRecorder(QThread):
     chunk_ready = pyqtSignal(bytes)
     error_occurred = pyqtSignal(str)
+    # Device name ('' for the default) and the audio lost while switching, in ms
+    device_switched = pyqtSignal(str, float)
+    device_error = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, profile=DEFAULT_STREAMING_PROFILE):
         super().__init__()
         # Match web implementation exactly
         self.sample_rate = 16000  # Changed to match desiredSampRate from web
-        self.chunk_duration = 0.8  # 800ms chunks
-        self.chunk_size = int(self.sample_rate * self.chunk_duration)
+        self.set_profile(profile)
+        # Optional silence gate applied before chunks leave the capture thread
+        self.vad = None
+        # Automatic gain control in the preprocessing chain; can change while recording
+        self.agc = True
+        # The open CaptureStream, and loss counters of the ones already closed
+        self.capture = None
+        self.closed_captures = []
         self.is_recording = False
-        self.audio = pyaudio.PyAudio()
+        # PyAudio is created on first use: PyAudio() scans every audio device
+        self.devices = AudioDeviceManager()
+        # Input device by name, None for the system default
+        self.device_name = None
+        self.switch_requested = False
+        self.rescan_requested = False
+        self.switch_gaps_ms = deque(maxlen=50)
+
+    def set_profile(self, profile):
+        """Select a streaming profile; takes effect on the next start()"""
+        self.profile = profile
+        self.frame_size, self.frames_per_send = profile_sizes(profile, self.sample_rate)
+        self.chunk_size = self.frame_size * self.frames_per_send
+        self.chunk_duration = self.chunk_size / self.sample_rate
+
+    def set_device(self, name):
+        """Select the input device; while recording, switch after the current frame"""
+        self.device_name = name
+        self.switch_requested = True
+
+    def request_rescan(self):
+        """Pick up plugged or removed devices; while recording the capture
+        thread reopens its stream around the rescan"""
+        if self.isRunning():
+            self.rescan_requested = True
+        else:
+            self.devices.rescan()
+
+    def set_agc(self, enabled):
+        self.agc = enabled
+        if self.capture is not None:
+            self.capture.preprocessor.agc.enabled = enabled
+
+    def open_capture(self, name):
+        from audio_capture import CaptureStream
+        capture = CaptureStream(self.devices, name, self.frame_size, self.sample_rate, agc=self.agc)
+        audio_log.info("Opened input", extra={'fields': {'device': name or 'default', 'rate': capture.rate}})
+        return capture
+
+    def close_capture(self, capture, batcher):
+        """Close a capture and send what was still buffered in its ring"""
+        capture.close()
+        for data in capture.drain():
+            self.add_frame(batcher, data)
+        self.closed_captures.append(capture.metrics())
 
     def run(self):
         try:
-            stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=self.sample_rate,
-                input=True,
-                frames_per_buffer=self.chunk_size
-            )
+            self.switch_requested = False
+            self.rescan_requested = False
+            self.closed_captures = []
+            # Capture in small frames, send at the profile's cadence
+            batcher = FrameBatcher(self.frames_per_send)
+            self.capture = self.open_capture(self.device_name)
             
             self.is_recording = True
+            switch_started_at = None
             
             while self.is_recording:
-                data = stream.read(self.chunk_size, exception_on_overflow=False)
-                print(f"Recording chunk of size: {len(data)} bytes")
-                self.chunk_ready.emit(data)
-                
-            stream.stop_stream()
-            stream.close()
+                # PortAudio's callback fills the capture's ring; frames are
+                # taken out here, so a slow emit cannot make capture drop audio
+                data = self.capture.read()
+                if data is None:
+                    continue
+                if switch_started_at is not None:
+                    self.record_switch(switch_started_at)
+                    switch_started_at = None
+                self.add_frame(batcher, data)
+                if self.switch_requested or self.rescan_requested:
+                    switch_started_at = time.monotonic()
+                    self.switch_capture(batcher)
+            
+            self.close_capture(self.capture, batcher)
+            # Don't lose the partially batched tail of the recording
+            chunk = batcher.flush()
+            if chunk is not None:
+                self.emit_chunk(chunk)
             
         except Exception as e:
-            print(f"Audio recording error: {str(e)}")
+            audio_log.exception("Audio recording error")
             self.error_occurred.emit(str(e))
         finally:
             self.is_recording = False
 
+    def add_frame(self, batcher, data):
+        chunk = batcher.add(data)
+        if chunk is not None:
+            audio_hot_log.debug('chunk', "Recorded chunk", bytes=len(chunk))
+            self.emit_chunk(chunk)
+
+    def switch_capture(self, batcher):
+        """Replace the capture with one on the selected device; the batcher,
+        network session and transcript carry on untouched"""
+        self.switch_requested = False
+        old = self.capture
+        if self.rescan_requested:
+            # PortAudio can only rescan with no stream open
+            self.rescan_requested = False
+            self.close_capture(old, batcher)
+            self.devices.rescan()
+            try:
+                self.capture = self.open_capture(self.device_name)
+            except Exception as e:
+                audio_log.warning("Could not reopen input device %s: %s", self.device_name, e)
+                self.device_error.emit(f"Could not reopen {self.device_name}: {e}")
+                self.device_name = None
+                self.capture = self.open_capture(None)
+            return
+        # Open the new device before closing the old one to keep the gap short
+        try:
+            new = self.open_capture(self.device_name)
+        except Exception as e:
+            audio_log.warning("Could not open input device %s: %s", self.device_name, e)
+            self.device_error.emit(f"Could not open {self.device_name}: {e}")
+            return
+        self.close_capture(old, batcher)
+        self.capture = new
+
+    def capture_metrics(self):
+        """Metrics of the current capture, with losses summed over the recording"""
+        if self.capture is None:
+            return None
+        metrics = self.capture.metrics()
+        captures = self.closed_captures if self.capture.closed else self.closed_captures + [metrics]
+        for key in ('overflows', 'dropped_bytes', 'underruns', 'input_overflows', 'input_underflows'):
+            metrics[key] = sum(m[key] for m in captures)
+        return metrics
+
+    def record_switch(self, started_at):
+        # The first read returns once one frame is captured; audio from
+        # before that frame started was lost in the switch
+        frame_seconds = self.capture.frame_seconds
+        gap_ms = max(0.0, 1000 * (time.monotonic() - started_at - frame_seconds))
+        self.switch_gaps_ms.append(gap_ms)
+        audio_log.info("Switched input device", extra={'fields': {
+            'device': self.device_name or 'default', 'gap_ms': round(gap_ms, 1)}})
+        self.device_switched.emit(self.device_name or '', gap_ms)
+
+    def emit_chunk(self, chunk):
+        if self.vad is None:
+            self.chunk_ready.emit(chunk)
+            return
+        # Classified at its level before the AGC, which lifts background noise
+        gain_db = self.capture.preprocessor.gain_db if self.capture is not None else 0.0
+        for voiced in self.vad.process(chunk, gain_db):
+            self.chunk_ready.emit(voiced)
+
     def stop(self):
         self.is_recording = False
         self.wait()
 
 class WebSocketThread(QThread):
+    """Qt adapter running a pool of StreamingSessions on its own asyncio event loop.
+
+    Sessions of recently used models stay connected between recordings and
+    model switches (see connection_pool.py); audio always goes to the
+    active session and only its transcripts are emitted. In fan-out mode
+    the same chunks also go to the sessions of the compared models, whose
+    transcripts arrive on compare_transcription_received.
+    """
     transcription_received = pyqtSignal(str, bool)
+    compare_transcription_received = pyqtSignal(str, str, bool)
+    compare_status = pyqtSignal(str, str)
     connection_status = pyqtSignal(str)
+    connected = pyqtSignal()
     error_occurred = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
-        self.sio = socketio.Client(logger=True, engineio_logger=True)
-        self.setup_socket_handlers()
-        self.audio_queue = queue.Queue()
-        
-    def setup_socket_handlers(self):
-        @self.sio.on('connect')
-        def on_connect():
-            print("Socket connected successfully")
+        self.pool = None
+        self.loop = None
+        self.loop_ready = threading.Event()
+        self.active = None
+        self.active_model = None
+        # Models that receive the same audio as the active one, and their sessions
+        self.compare_models = ()
+        self.compare = []
+        self.stream_future = None
+        # The loop's stream task, which may still be lingering after Stop
+        self.stream_task = None
+        self.audio_queue = AudioSendQueue(SEND_QUEUE_MAXSIZE, SEND_QUEUE_POLICY)
+        self.latency = LatencyTracker()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        from connection_pool import SessionPool
+        # Short linger so the last words still arrive after Stop
+        self.pool = SessionPool(on_transcript=self.on_transcript, on_status=self.on_status,
+                                on_discard=self.on_discard, linger=0.5)
+        self.loop_ready.set()
+        await self.stopped.wait()
+        await self.pool.close()
+
+    def submit(self, coro):
+        # Run a coroutine on the session loop, starting the loop on first use
+        if not self.isRunning():
+            self.loop_ready.clear()
+            self.start()
+        self.loop_ready.wait()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def connect_to_server(self, model_name, encoding=DEFAULT_CODEC):
+        """Start streaming to a model; progress is reported via connection_status"""
+        started_at = time.monotonic()
+        self.stop_sending()
+        self.audio_queue = AudioSendQueue(SEND_QUEUE_MAXSIZE, SEND_QUEUE_POLICY)
+        self.stream_future = self.submit(self.start_stream(model_name, encoding, self.audio_queue, started_at))
+
+    async def start_stream(self, model_name, encoding, audio_queue, started_at):
+        previous = self.stream_task
+        self.stream_task = asyncio.current_task()
+        if previous is not None and not previous.done():
+            # The last recording is still lingering for its last words, which
+            # Start has cleared from the view; it must release its sessions
+            # before this stream takes them
+            previous.cancel()
+            await asyncio.gather(previous, return_exceptions=True)
+        await self.activate(model_name, encoding)
+        await self.stream(audio_queue, started_at)
+
+    def switch_model(self, model_name, encoding=DEFAULT_CODEC):
+        """Send the following audio to another model without stopping capture"""
+        self.submit(self.activate(model_name, encoding)).result()
+
+    def set_compare_models(self, model_names, encoding=DEFAULT_CODEC):
+        """Also stream to these models; applies to the next chunk while streaming"""
+        self.compare_models = tuple(model_names)
+        if self.stream_future is not None:
+            self.submit(self.activate(self.active_model, encoding)).result()
+
+    async def activate(self, model_name, encoding):
+        # Acquire on every call, even for the active model: it marks the
+        # session in use until stream() releases it, and replaces a session
+        # the pool has closed in the meantime
+        self.active_model = model_name
+        session = self.pool.acquire(model_name, encoding)
+        if session is not self.active:
+            if self.active is not None and self.active not in self.compare:
+                self.pool.release(self.active)
+            self.active = session
+            self.latency = session.latency
+        if session.connected.is_set():
             self.connection_status.emit("Connected to server")
+        asyncio.create_task(self.connect_active(session))
+        self.update_compare(encoding)
+
+    def update_compare(self, encoding):
+        sessions = []
+        for model_name in self.compare_models:
+            if self.active is not None and model_name == self.active.model_name:
+                continue
+            session = self.pool.acquire(model_name, encoding)
+            if session not in self.compare or not session.connected.is_set():
+                asyncio.create_task(self.connect_compared(session))
+            sessions.append(session)
+        for session in self.compare:
+            if session not in sessions and session is not self.active:
+                self.pool.release(session)
+        self.compare = sessions
 
-        @self.sio.on('disconnect')
-        def on_disconnect():
-            print("Socket disconnected")
-            self.connection_status.emit("Disconnected from server")
-
-        @self.sio.on('connect_error')
-        def on_connect_error(data):
-            print(f"Connection error: {data}")
-            self.error_occurred.emit(f"Connection error: {data}")
-
-        @self.sio.on('transcript')
-        def on_transcript(data):
-            print("=================== TRANSCRIPT RECEIVED ===================")
-            print(f"Raw transcript data: {data}")
-            if isinstance(data, dict) and 'transcript' in data:
-                transcript = data['transcript']
-                is_final = data.get('is_final', False)
-                print(f"Transcript: {transcript}")
-                print(f"Is Final: {is_final}")
-                self.transcription_received.emit(transcript, is_final)
-            print("======================================================")
-
-        @self.sio.on('*')
-        def catch_all(event, data):
-            print(f"Caught event: {event} with data: {data}")
-
-    def connect_to_server(self, model_name):
+    async def connect_compared(self, session):
         try:
-            if self.sio.connected:
-                self.sio.disconnect()
-            
-            print(f"Connecting with model: {model_name}")
-            
-            # Create new socket with query parameter exactly like web:
-            # const socketio = io('https://api.whissle.ai', { query: `model_name=${option}` });
-            self.sio = socketio.Client()
-            self.setup_socket_handlers()
-            
-            # Create connection URL with query parameter
-            url = f'https://api.whissle.ai/socket.io/?model_name={model_name}'
-            self.sio.connect(
-                url,
-                transports=['websocket']
-            )
-            
+            await self.pool.ensure_connected(session)
+        except Exception as e:
+            self.compare_status.emit(session.model_name, f"Connection error: {e}")
+
+    async def connect_active(self, session):
+        try:
+            await self.pool.ensure_connected(session)
+        except Exception as e:
+            if session is self.active:
+                self.error_occurred.emit(f"Connection error: {str(e)}")
+            return
+        if session is self.active:
+            self.connected.emit()
+
+    async def stream(self, audio_queue, started_at):
+        from streaming_engine import iter_audio_queue
+        for session in [self.active] + self.compare:
+            if session is not None:
+                session.begin_stream(started_at)
+        try:
+            async for chunk, captured_at in iter_audio_queue(audio_queue):
+                # Re-read on every chunk so a model switch applies to the next
+                # frame; the active session is None once the pool dropped it
+                sessions = [self.active] + self.compare if self.active is not None else self.compare
+                if not sessions:
+                    continue
+                if len(sessions) == 1:
+                    await sessions[0].send(chunk, captured_at)
+                    continue
+                # Every session gets the same bytes object; only its own codec copies
+                await asyncio.gather(*(session.send(chunk, captured_at) for session in sessions))
+            await asyncio.gather(*(session.wait_for_quiet()
+                                   for session in [self.active] + self.compare if session is not None))
         except Exception as e:
-            print(f"Connection error: {str(e)}")
-            self.error_occurred.emit(f"Connection error: {str(e)}")
+            self.error_occurred.emit(f"Error sending audio: {str(e)}")
+        finally:
+            for session in [self.active] + self.compare:
+                if session is not None:
+                    # Audio still buffered belongs to this recording; replayed
+                    # on a later connect it would show up in the next one
+                    session.drop_unsent()
+                    self.pool.release(session)
+
+    def on_transcript(self, session, transcript):
+        # Trailing transcripts from the previous model are not shown
+        if session is self.active:
+            self.transcription_received.emit(transcript.text, transcript.is_final)
+        elif session in self.compare:
+            self.compare_transcription_received.emit(session.model_name, transcript.text,
+                                                     transcript.is_final)
+
+    def on_discard(self, session):
+        # The pool closed it (idle, unhealthy or failed to connect); the next
+        # activate() acquires a fresh session
+        if session is self.active:
+            self.active = None
+        elif session in self.compare:
+            self.compare = [s for s in self.compare if s is not session]
+
+    def on_status(self, session, message):
+        if session is self.active:
+            self.connection_status.emit(message)
+        elif session in self.compare:
+            self.compare_status.emit(session.model_name, message)
+
+    def is_connected(self):
+        return self.active is not None and self.active.connected.is_set()
 
     def add_audio_chunk(self, chunk):
-        if self.sio.connected:
+        # Called on the capture thread; only queues, never touches the network
+        self.audio_queue.put(chunk)
+
+    def stop_sending(self):
+        # Closing the queue ends the stream once it has drained and trailing
+        # transcripts are in; the session stays warm in the pool. Returns at
+        # once: the stream finishes on the session loop, and the next
+        # start_stream() waits for it there.
+        self.audio_queue.close()
+        self.stream_future = None
+
+    def disconnect_from_server(self, timeout_ms=2000):
+        """Close every pooled connection and stop the event loop"""
+        self.stop_sending()
+        if self.isRunning():
+            self.loop.call_soon_threadsafe(self.stopped.set)
+            self.wait(timeout_ms)
+        self.active = None
+        self.compare = []
+
+    def send_metrics(self):
+        """Queue depth, send-time, replay and pool metrics for the active session"""
+        metrics = {
+            'send_ms_avg': 0.0,
+            'send_ms_max': 0.0,
+            'replay_seconds': 0.0,
+            'replay_replayed': 0,
+            'replay_dropped_chunks': 0,
+        }
+        if self.active is not None:
+            metrics.update(self.active.metrics())
+        if self.pool is not None:
+            metrics.update(self.pool.metrics())
+        metrics.update(self.audio_queue.metrics())
+        return metrics
+
+    def compare_latency(self):
+        """Latency summary per compared model"""
+        return {session.model_name: session.latency.summary() for session in self.compare}
+
+class AudioProcessThread(QThread):
+    """Qt adapter for a capture_worker.AudioProcess: starts the worker and
+    turns the events it sends back into signals. ``metrics`` holds the
+    worker's latest metrics snapshot."""
+    transcription_received = pyqtSignal(str, bool)
+    connection_status = pyqtSignal(str)
+    connected = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, config):
+        super().__init__()
+        from capture_worker import AudioProcess
+        self.process = AudioProcess(config)
+        self.metrics = {}
+        self.stopping = False
+
+    def run(self):
+        self.process.start()
+        while True:
             try:
-                print(f"Sending audio chunk of size {len(chunk)}")
-                # Send raw binary data like web implementation
-                self.sio.emit('audio_in', chunk)
-            except Exception as e:
-                print(f"Error sending audio: {str(e)}")
-                self.error_occurred.emit(f"Error sending audio: {str(e)}")
+                event = self.process.recv(0.5)
+            except (EOFError, OSError):
+                # The worker died without sending 'finished'
+                self.error_occurred.emit("Audio process exited unexpectedly")
+                break
+            if event is None:
+                if not self.process.process.is_alive():
+                    if not self.stopping:
+                        self.error_occurred.emit("Audio process exited unexpectedly")
+                    break
+                continue
+            kind = event[0]
+            if kind == 'transcript':
+                self.transcription_received.emit(event[1], event[2])
+            elif kind == 'status':
+                self.connection_status.emit(event[1])
+            elif kind == 'connected':
+                self.connected.emit()
+            elif kind == 'error':
+                self.error_occurred.emit(event[1])
+            elif kind == 'metrics':
+                self.metrics = event[1]
+            elif kind == 'finished':
+                self.metrics = event[1] or self.metrics
+                break
+        self.process.close()
+
+    def set_agc(self, enabled):
+        self.process.send('agc', enabled)
+
+    def stop(self, timeout_ms=2000):
+        # The worker ends its stream once the trailing transcripts are in
+        self.stopping = True
+        self.process.stop()
+        self.wait(timeout_ms)
 
-    def handle_emit_callback(self, *args):
-        print(f"Audio chunk emit callback received: {args}")
+class DeviceComboBox(QComboBox):
+    """QComboBox that announces its popup, so devices are enumerated on demand"""
+    popup_about_to_show = pyqtSignal()
 
-    def disconnect_from_server(self):
-        if self.sio.connected:
-            self.sio.disconnect()
+    def showPopup(self):
+        self.popup_about_to_show.emit()
+        super().showPopup()
+
+class ComparePane(QWidget):
+    """Transcript pane for a model that receives the same audio as the active one"""
+
+    def __init__(self, model_name, stylesheet, format):
+        super().__init__()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+        title = QLabel(model_name)
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #0f9eef;")
+        self.latency_label = QLabel("Latency: -")
+        self.latency_label.setStyleSheet("font-size: 14px; color: #555;")
+        self.display = QTextEdit()
+        self.display.setReadOnly(True)
+        self.display.setStyleSheet(stylesheet)
+        self.renderer = TranscriptRenderer(self.display, max_blocks=COMPARE_PANE_MAX_BLOCKS)
+        self.scheduler = RenderScheduler(self.renderer, format)
+        layout.addWidget(title)
+        layout.addWidget(self.latency_label)
+        layout.addWidget(self.display, stretch=1)
 
 class TranscriptionApp(QMainWindow):
     def __init__(self):
@@ -146,29 +587,37 @@ class TranscriptionApp(QMainWindow):
         self.setWindowTitle("Speech Transcription")
         
         # Initialize instance variables first
-        self.final_transcript = ""
-        self.last_chunk_time = None
         self.is_connecting = False
+        # AudioProcessThread of the last recording made in a worker process
+        self.audio_process = None
+        # Finals go to an on-disk session log; only a recent window stays in RAM
+        self.transcript_store = TranscriptStore()
+        # Word classification and HTML fragments come from the compiled
+        # classifier; every final is parsed once into words and tags and indexed
+        self.tag_classifier = TagClassifier()
+        self.transcript_index = TranscriptIndex(self.tag_classifier)
         
         # Initialize audio recorder and websocket early
         self.audio_recorder = AudioRecorder()
         self.websocket_thread = WebSocketThread()
+        self.text_injector = TextInjector()
         
         # Create transcript display early
         self.transcript_display = QTextEdit()
         self.transcript_display.setReadOnly(True)
         self.transcript_display.setAcceptRichText(True)
-        self.transcript_display.setStyleSheet("""
-            QTextEdit {
-                background-color: white;
-                border: 3px solid #0f9eef;
-                border-radius: 10px;
-                padding: 20px;
-                font-family: Arial;
-                font-size: 20px;
-                line-height: 1.8;
-            }
-        """)
+        self.transcript_renderer = WindowedTranscriptRenderer(
+            self.transcript_display, self.transcript_store, self.transcript_html,
+            max_blocks=TRANSCRIPT_MAX_BLOCKS)
+        # Bursts of interims are coalesced to one render per display frame
+        self.transcript_scheduler = RenderScheduler(self.transcript_renderer, self.transcript_html)
+        # Per-emotion counts from the index, refreshed on every new session
+        self.tag_counts_label = QLabel("Emotions: none yet")
+        self.tag_counts_label.setStyleSheet("font-size: 16px; color: #555; margin: 2px;")
+        # Side-by-side panes for models compared against the selected one
+        self.panes_layout = QHBoxLayout()
+        self.compare_checkboxes = []
+        self.compare_panes = {}
         
         # Set application icon - add error handling
         try:
@@ -176,7 +625,7 @@ class TranscriptionApp(QMainWindow):
             self.setWindowIcon(icon)
             QApplication.setWindowIcon(icon)
         except Exception as e:
-            print(f"Warning: Could not load logo.png: {e}")
+            ui_log.warning("Could not load logo.png: %s", e)
         
         self.setGeometry(100, 100, 800, 800)  # Increased height from 600 to 800
         
@@ -207,68 +656,43 @@ class TranscriptionApp(QMainWindow):
         ]
         
         self.model_buttons = []
-        models_layout = QVBoxLayout()
+        models_widget = QWidget()
+        models_widget.setStyleSheet(MODEL_SELECTOR_STYLE)
+        models_layout = QVBoxLayout(models_widget)
+        models_layout.setContentsMargins(0, 0, 0, 0)
         models_layout.setSpacing(2)  # Reduce spacing between radio buttons
         
         for model in self.models:
             radio = QRadioButton(model)
-            radio.setStyleSheet("""
-                QRadioButton {
-                    font-size: 16px;
-                    padding: 8px;
-                    border: 2px solid transparent;
-                    border-radius: 6px;
-                    background-color: #e8f0fe;
-                    color: #0f9eef;
-                    font-weight: bold;
-                    margin: 2px;
-                }
-                QRadioButton:hover {
-                    background-color: #d0e3fc;
-                }
-                QRadioButton:checked {
-                    border-color: #0f9eef;
-                    background-color: #d0e3fc;
-                }
-                QRadioButton::indicator {
-                    width: 16px;
-                    height: 16px;
-                    border-radius: 8px;
-                    border: 2px solid #0f9eef;
-                    margin-right: 8px;
-                }
-                QRadioButton::indicator:checked {
-                    background-color: #0f9eef;
-                    border: 2px solid #0f9eef;
-                }
-            """)
             radio.toggled.connect(lambda checked, m=model: self.on_model_selected(m) if checked else None)
             models_layout.addWidget(radio)
             self.model_buttons.append(radio)
         
+        # Fan-out: the same capture also streams to every checked model
+        compare_layout = QHBoxLayout()
+        compare_layout.setSpacing(8)
+        compare_layout.addWidget(QLabel("Compare with:"))
+        for model in self.models:
+            checkbox = QCheckBox(model)
+            checkbox.toggled.connect(self.on_compare_changed)
+            compare_layout.addWidget(checkbox)
+            self.compare_checkboxes.append(checkbox)
+        compare_layout.addStretch()
+        models_layout.addLayout(compare_layout)
+
         # Set first model as checked by default
         self.model_buttons[0].setChecked(True)
         
         # Add models layout to header with some margin control
-        header_layout.addLayout(models_layout)
+        header_layout.addWidget(models_widget)
         header_layout.addSpacing(10)  # Add space after model selection
         layout.addLayout(header_layout)
 
         # Make transcript display take more vertical space
         self.transcript_display.setMinimumHeight(400)  # Set minimum height
-        self.transcript_display.setStyleSheet("""
-            QTextEdit {
-                background-color: white;
-                border: 3px solid #0f9eef;
-                border-radius: 10px;
-                padding: 20px;
-                font-family: Arial;
-                font-size: 20px;
-                line-height: 1.8;
-                min-height: 400px;
-            }
-        """)
-        layout.addWidget(self.transcript_display, stretch=1)  # Add stretch factor
+        self.transcript_display.setStyleSheet(TRANSCRIPT_STYLE)
+        self.panes_layout.addWidget(self.transcript_display, stretch=1)
+        layout.addLayout(self.panes_layout, stretch=1)  # Add stretch factor
 
         # Make status and latency labels more compact
         status_layout = QVBoxLayout()
@@ -282,6 +706,52 @@ class TranscriptionApp(QMainWindow):
         status_layout.addWidget(self.status_label)
         status_layout.addWidget(self.latency_label)
 
+        self.network_label = QLabel("Network: idle")
+        self.network_label.setStyleSheet("font-size: 16px; color: #555; margin: 2px;")
+        status_layout.addWidget(self.network_label)
+
+        # Tag counts and search over the session's finals, from the index
+        status_layout.addWidget(self.tag_counts_label)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search transcript: words, tags, INTENT_*")
+        self.search_box.setStyleSheet("font-size: 16px; padding: 4px;")
+        status_layout.addWidget(self.search_box)
+        
+        # Refresh sender queue metrics once a second while recording
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.update_stream_metrics)
+
+        self.export_latency_button = QPushButton("Export latency stats (JSON)")
+        self.export_latency_button.setStyleSheet("font-size: 14px; padding: 4px; margin: 2px;")
+        self.export_latency_button.clicked.connect(self.export_latency_stats)
+        status_layout.addWidget(self.export_latency_button)
+
+        # Streaming profile selector: capture frame size vs. send cadence
+        self.profile_selector = QComboBox()
+        for profile, (frame_ms, send_ms) in STREAMING_PROFILES.items():
+            self.profile_selector.addItem(f"{profile} ({frame_ms}ms frames, sent every {send_ms}ms)", profile)
+        self.profile_selector.setCurrentIndex(self.profile_selector.findData(DEFAULT_STREAMING_PROFILE))
+        self.profile_selector.setStyleSheet("font-size: 16px; color: #333; padding: 4px;")
+        status_layout.addWidget(self.profile_selector)
+
+        # Audio encoding used for audio_in; only codecs whose dependencies are installed
+        self.encoding_selector = QComboBox()
+        for encoding in available_codecs():
+            self.encoding_selector.addItem(f"Audio encoding: {encoding}", encoding)
+        self.encoding_selector.setStyleSheet(self.profile_selector.styleSheet())
+        status_layout.addWidget(self.encoding_selector)
+
+        # Input device; the list is only enumerated when it is first opened
+        device_layout = QHBoxLayout()
+        self.device_selector = DeviceComboBox()
+        self.device_selector.addItem("Input: system default", None)
+        self.device_selector.setStyleSheet(self.profile_selector.styleSheet())
+        device_layout.addWidget(self.device_selector, stretch=1)
+        self.rescan_devices_button = QPushButton("Refresh devices")
+        device_layout.addWidget(self.rescan_devices_button)
+        status_layout.addLayout(device_layout)
+
         # Add checkbox for external typing
         self.type_externally_checkbox = QCheckBox("Type transcriptions to focused window")
         self.type_externally_checkbox.setStyleSheet("""
@@ -303,6 +773,24 @@ class TranscriptionApp(QMainWindow):
             }
         """)
         status_layout.addWidget(self.type_externally_checkbox)
+
+        # Add checkbox for client-side voice activity detection
+        self.vad_checkbox = QCheckBox("Skip silence (don't stream audio without speech)")
+        self.vad_checkbox.setStyleSheet(self.type_externally_checkbox.styleSheet())
+        status_layout.addWidget(self.vad_checkbox)
+
+        # Level the microphone towards a fixed speech level on the capture thread
+        self.agc_checkbox = QCheckBox("Automatic gain control")
+        self.agc_checkbox.setChecked(True)
+        self.agc_checkbox.setStyleSheet(self.type_externally_checkbox.styleSheet())
+        status_layout.addWidget(self.agc_checkbox)
+
+        # Keep audio capture and streaming out of the GUI process's GIL
+        self.process_checkbox = QCheckBox("Run audio in a separate process")
+        self.process_checkbox.setChecked(AUDIO_PROCESS)
+        self.process_checkbox.setStyleSheet(self.type_externally_checkbox.styleSheet())
+        status_layout.addWidget(self.process_checkbox)
+        self.on_process_toggled(AUDIO_PROCESS)
         
         layout.addLayout(status_layout)
 
@@ -344,18 +832,16 @@ class TranscriptionApp(QMainWindow):
         self.setup_text_formats()
 
     def setup_text_formats(self):
-        # Define colors directly as hex strings
         self.text_formats = {
-            'EMOTION_': self.create_format('#e91e63', 24),  # Pink
-            'NER_': self.create_format('#2196f3', 24),      # Blue
-            'END': self.create_format('#4caf50', 24),       # Green
-            'INTENT_': self.create_format('#ff9800', 24),   # Orange
-            'AGE_': self.create_format('#9c27b0', 24),      # Purple
-            'DIALECT_': self.create_format('#795548', 24),  # Brown
-            'GENDER_': self.create_format('#009688', 24),   # Teal
-            'ENTITY_': self.create_format('#673ab7', 24),   # Deep Purple
-            'regular': self.create_format('#000000', 20)    # Black
+            prefix: self.create_format(color, size)
+            for prefix, (color, size) in self.tag_classifier.families.items()
         }
+        self.text_formats['regular'] = self.create_format(REGULAR_COLOR, REGULAR_SIZE)
+
+    def register_tag_family(self, prefix, color, size=24):
+        """Register a new tag family (e.g. 'TOPIC_') at runtime"""
+        self.tag_classifier.register_family(prefix, color, size)
+        self.text_formats[prefix] = self.create_format(color, size)
 
     def create_format(self, color, size):
         fmt = QTextCharFormat()
@@ -364,41 +850,119 @@ class TranscriptionApp(QMainWindow):
         fmt.setFontPointSize(size)
         return fmt
 
+    def transcript_html(self, text):
+        return self.tag_classifier.render(text)[0]
+
     def colorize_text(self, text):
-        words = text.split()
-        result = []
-        for word in words:
-            format_key = 'regular'
-            for key in self.text_formats.keys():
-                if key != 'regular' and word.startswith(key):
-                    format_key = key
-                    break
-            result.append((word, format_key))
-        return result
+        return self.tag_classifier.classify(text)
 
     def setup_connections(self):
         self.start_button.clicked.connect(self.start_recording)
         self.stop_button.clicked.connect(self.stop_recording)
         
-        self.audio_recorder.chunk_ready.connect(self.websocket_thread.add_audio_chunk)
+        # Direct connection: chunks are queued on the capture thread, so a
+        # 'block' overflow policy stalls capture rather than the GUI
+        self.audio_recorder.chunk_ready.connect(self.websocket_thread.add_audio_chunk,
+                                                Qt.ConnectionType.DirectConnection)
         self.audio_recorder.error_occurred.connect(self.handle_error)
+        self.audio_recorder.device_switched.connect(self.on_device_switched)
+        self.audio_recorder.device_error.connect(self.update_status)
+        self.device_selector.popup_about_to_show.connect(self.populate_devices)
+        self.device_selector.activated.connect(self.on_device_selected)
+        self.rescan_devices_button.clicked.connect(self.rescan_devices)
+        self.search_box.returnPressed.connect(self.search_transcript)
+        self.agc_checkbox.toggled.connect(self.on_agc_toggled)
+        self.process_checkbox.toggled.connect(self.on_process_toggled)
         
         self.websocket_thread.transcription_received.connect(self.update_transcript)
+        self.websocket_thread.compare_transcription_received.connect(self.update_compare_transcript)
+        self.websocket_thread.compare_status.connect(self.update_compare_status)
         self.websocket_thread.connection_status.connect(self.update_status)
+        self.websocket_thread.connected.connect(self.on_connected)
         self.websocket_thread.error_occurred.connect(self.handle_error)
 
+    def populate_devices(self):
+        """Fill the device list from the cached enumeration"""
+        current = self.device_selector.currentData()
+        self.device_selector.blockSignals(True)
+        self.device_selector.clear()
+        self.device_selector.addItem("Input: system default", None)
+        for device in self.audio_recorder.devices.input_devices():
+            self.device_selector.addItem(f"Input: {device.name}", device.name)
+        index = self.device_selector.findData(current)
+        self.device_selector.setCurrentIndex(max(index, 0))
+        self.device_selector.blockSignals(False)
+
+    def on_device_selected(self, index):
+        name = self.device_selector.itemData(index)
+        if name == self.audio_recorder.device_name:
+            return
+        ui_log.info("Input device selected: %s", name or 'default')
+        # While recording the capture thread switches streams on its own;
+        # the session and transcript are not touched
+        self.audio_recorder.set_device(name)
+
+    def rescan_devices(self):
+        self.audio_recorder.request_rescan()
+        if not self.audio_recorder.isRunning():
+            self.populate_devices()
+        self.status_label.setText("Status: Rescanning audio devices")
+
+    def on_device_switched(self, name, gap_ms):
+        self.status_label.setText(f"Status: Recording from {name or 'system default'} "
+                                  f"({gap_ms:.0f}ms switch gap)")
+
     def on_model_selected(self, model_name):
         """Handle model selection"""
-        print(f"Model selected: {model_name}")
+        ui_log.info("Model selected: %s", model_name)
         
         # Clear the transcript display and stored transcript
-        self.final_transcript = ""
-        self.transcript_display.clear()
+        self.transcript_store.new_session()
+        self.transcript_index.clear()
+        self.update_tag_counts()
+        self.transcript_scheduler.clear()
         
-        # If currently connected, stop and restart with new model
-        if self.websocket_thread.sio.connected:
+        # The worker process streams to one model; restart it for the new one
+        if self.audio_process is not None and self.audio_process.isRunning():
             self.stop_recording()
             self.start_recording()
+        # While recording, redirect the audio to the new model's pooled
+        # session; the microphone keeps running
+        elif self.audio_recorder.isRunning() or self.is_connecting:
+            encoding = self.encoding_selector.currentData()
+            self.websocket_thread.switch_model(model_name, encoding)
+            # The previous model may now be compared, and the new one no longer
+            self.websocket_thread.set_compare_models(self.compared_models(), encoding)
+        self.sync_compare_panes()
+
+    def selected_model(self):
+        return next(button.text() for button in self.model_buttons if button.isChecked())
+
+    def compared_models(self):
+        """Checked comparison models, without the selected one"""
+        selected = self.selected_model()
+        return [box.text() for box in self.compare_checkboxes
+                if box.isChecked() and box.text() != selected]
+
+    def on_compare_changed(self):
+        self.websocket_thread.set_compare_models(self.compared_models(),
+                                                 self.encoding_selector.currentData())
+        self.sync_compare_panes()
+
+    def sync_compare_panes(self):
+        if not any(button.isChecked() for button in self.model_buttons):
+            return
+        wanted = self.compared_models()
+        for model_name in list(self.compare_panes):
+            if model_name not in wanted:
+                pane = self.compare_panes.pop(model_name)
+                self.panes_layout.removeWidget(pane)
+                pane.deleteLater()
+        for model_name in wanted:
+            if model_name not in self.compare_panes:
+                pane = ComparePane(model_name, TRANSCRIPT_STYLE, self.transcript_html)
+                self.compare_panes[model_name] = pane
+                self.panes_layout.addWidget(pane, stretch=1)
 
     def start_recording(self):
         if self.is_connecting:
@@ -410,91 +974,266 @@ class TranscriptionApp(QMainWindow):
             self.status_label.setText("Status: Connecting...")
             
             # Clear previous transcript
-            self.final_transcript = ""
-            self.transcript_display.clear()
+            self.transcript_store.new_session()
+            self.transcript_index.clear()
+            self.update_tag_counts()
+            self.transcript_scheduler.clear()
+            
+            for pane in self.compare_panes.values():
+                pane.scheduler.clear()
             
             # Get selected model from radio buttons
-            model_name = next(button.text() for button in self.model_buttons if button.isChecked())
-            print(f"Starting recording with model: {model_name}")
-            self.websocket_thread.connect_to_server(model_name)
+            model_name = self.selected_model()
+            ui_log.info("Starting recording with model: %s", model_name)
+            encoding = self.encoding_selector.currentData()
+            self.audio_process = None
+            if self.process_checkbox.isChecked():
+                self.start_audio_process(model_name, encoding)
+                return
+            self.websocket_thread.set_compare_models(self.compared_models(), encoding)
+            self.websocket_thread.connect_to_server(model_name, encoding)
             
-            # Start a timer to check connection status
-            QTimer.singleShot(100, self.check_connection_status)
+            # Capture starts right away: audio spoken while connecting is
+            # held by the session and flushed as soon as the socket is up
+            self.start_capture()
 
         except Exception as e:
             self.is_connecting = False
             self.handle_error(str(e))
 
-    def check_connection_status(self):
-        if not self.websocket_thread.sio.connected:
-            # If not connected yet, check again in 100ms
-            if self.is_connecting:
-                QTimer.singleShot(100, self.check_connection_status)
+    def start_audio_process(self, model_name, encoding):
+        """Capture and stream from a worker process; comparing models is only
+        available with in-process audio"""
+        from streaming_engine import SERVER_URL
+        self.audio_process = AudioProcessThread({
+            'model_name': model_name,
+            'encoding': encoding,
+            'server_url': SERVER_URL,
+            'profile': self.profile_selector.currentData(),
+            'device_name': self.audio_recorder.device_name,
+            'agc': self.agc_checkbox.isChecked(),
+            'vad': self.vad_checkbox.isChecked(),
+            'queue_size': SEND_QUEUE_MAXSIZE,
+            'queue_policy': SEND_QUEUE_POLICY,
+        })
+        self.audio_process.transcription_received.connect(self.update_transcript)
+        self.audio_process.connection_status.connect(self.update_status)
+        self.audio_process.connected.connect(self.on_connected)
+        self.audio_process.error_occurred.connect(self.handle_error)
+        self.audio_process.start()
+        self.stop_button.setEnabled(True)
+        self.metrics_timer.start()
+
+    def on_process_toggled(self, checked):
+        # The worker process streams to a single model, so there is nothing
+        # to compare with
+        for box in self.compare_checkboxes:
+            if checked:
+                box.setChecked(False)
+            box.setEnabled(not checked)
+            box.setToolTip("Not available with audio in a separate process" if checked else "")
+
+    def stop_audio_process(self):
+        # Once per worker: Stop, errors and closing the window all end up here
+        if self.audio_process is None or self.audio_process.stopping:
             return
-            
-        # Connection successful, start recording
-        self.is_connecting = False
+        # Trailing transcripts are still shown, its disconnect message is not
+        self.audio_process.connection_status.disconnect(self.update_status)
+        self.audio_process.stop()
+
+    def on_agc_toggled(self, enabled):
+        self.audio_recorder.set_agc(enabled)
+        if self.audio_process is not None and self.audio_process.isRunning():
+            self.audio_process.set_agc(enabled)
+
+    def capture_metrics(self):
+        if self.audio_process is not None:
+            return self.audio_process.metrics.get('capture')
+        return self.audio_recorder.capture_metrics()
+
+    def start_capture(self):
         self.stop_button.setEnabled(True)
+        self.audio_recorder.set_profile(self.profile_selector.currentData())
+        if self.vad_checkbox.isChecked():
+            from vad import VoiceActivityDetector
+            self.audio_recorder.vad = VoiceActivityDetector(self.audio_recorder.sample_rate)
+        else:
+            self.audio_recorder.vad = None
         self.audio_recorder.start()
+        self.metrics_timer.start()
+
+    def on_connected(self):
+        self.is_connecting = False
 
     def stop_recording(self):
         self.is_connecting = False
         self.audio_recorder.stop()
-        self.websocket_thread.disconnect_from_server()
+        self.stop_audio_process()
+        # The connection stays open in the pool for the next recording
+        self.websocket_thread.stop_sending()
+        self.transcript_store.flush()
+        self.metrics_timer.stop()
+        self.update_stream_metrics()
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
         self.status_label.setText("Status: Stopped")
+        capture = self.capture_metrics()
+        if capture is not None:
+            audio_log.info("Capture stats", extra={'fields': capture})
+        
+        if self.audio_recorder.vad is not None:
+            stats = self.audio_recorder.vad.stats()
+            audio_log.info("VAD stats", extra={'fields': stats})
+            self.status_label.setText(
+                f"Status: Stopped (skipped {stats['chunks_suppressed']} silent chunks, "
+                f"{stats['bytes_suppressed'] // 1024} KB)"
+            )
 
     def update_transcript(self, text, is_final):
-        print(f"Updating display - Text: '{text}', Is Final: {is_final}")
-        
-        # Format the current text
-        formatted_text = ""
-        plain_text = ""  # Store plain text version for external typing
-        
-        for word, format_key in self.colorize_text(text):
-            # Get the color from the format
-            if format_key != 'regular':
-                color = self.text_formats[format_key].foreground().color().name()
-                formatted_text += f'<span style="color: {color}; font-weight: bold; font-size: 24px">{word}</span> '
-            else:
-                formatted_text += f'<span style="color: black; font-size: 20px">{word}</span> '
-            plain_text += word + " "
+        ui_hot_log.debug('final' if is_final else 'interim', "Updating display", is_final=is_final)
         
         if is_final:
-            self.final_transcript += formatted_text + "<br>"
+            utterance = self.transcript_index.parse(text)
+            index = self.transcript_store.append(text, self.selected_model(), tags=utterance.tags)
+            self.transcript_index.add(index, utterance)
+            self.update_tag_counts()
             
-            # If external typing is enabled, type the text in the focused window
+            # If external typing is enabled, queue the text for the focused
+            # window; the injector types it on its own thread
             if self.type_externally_checkbox.isChecked():
-                try:
-                    # Properly encode the text for AppleScript, including Unicode characters
-                    text_to_type = plain_text.strip()
-                    
-                    # Use UTF-8 text input method for better Unicode support
-                    apple_script = f'''
-                    tell application "System Events"
-                        set the clipboard to "{text_to_type} "
-                        keystroke "v" using command down
-                    end tell
-                    '''
-                    
-                    # Execute the AppleScript
-                    subprocess.run(['osascript', '-e', apple_script], text=True, encoding='utf-8')
-                    
-                except Exception as e:
-                    print(f"Error typing externally: {e}")
-        
-        # Display both final and interim results in our window
-        display_text = self.final_transcript
-        if not is_final:
-            display_text += "<br>" + formatted_text
+                self.text_injector.submit(self.tag_classifier.render(text)[1])
         
-        # Update the display with HTML formatting
-        self.transcript_display.setHtml(display_text)
+        # Only the new final blocks or the latest interim are rendered, at
+        # most once per display frame
+        if is_final:
+            self.transcript_scheduler.add_final(text)
+        else:
+            self.transcript_scheduler.set_interim(text)
+
+    def update_tag_counts(self):
+        counts = self.transcript_index.counts('EMOTION_')
+        if counts:
+            self.tag_counts_label.setText("Emotions: " + ", ".join(
+                f"{tag[len('EMOTION_'):].lower()} {count}" for tag, count in counts.items()))
+        else:
+            self.tag_counts_label.setText("Emotions: none yet")
+
+    def search_transcript(self):
+        query = self.search_box.text().strip()
+        if not query:
+            return
+        start = time.perf_counter()
+        matches = self.transcript_index.search(query)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.status_label.setText(f"Status: {len(matches)} utterances match '{query}' "
+                                  f"({elapsed_ms:.2f}ms)")
+        if not matches:
+            return
+        # Only the texts of the matches shown are read back from the store
+        shown = matches[-SEARCH_MAX_RESULTS:]
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"{len(matches)} matches for '{query}'")
+        dialog.resize(800, 500)
+        results = QTextEdit(dialog)
+        results.setReadOnly(True)
+        results.setStyleSheet(TRANSCRIPT_STYLE)
+        results.setHtml("<br>".join(
+            f"<span style='color:#888'>#{index + 1}</span> "
+            + self.tag_classifier.render(self.transcript_store.get(index)['text'])[0]
+            for index in shown))
+        dialog_layout = QVBoxLayout(dialog)
+        dialog_layout.addWidget(results)
+        dialog.show()
+
+    def update_compare_transcript(self, model_name, text, is_final):
+        pane = self.compare_panes.get(model_name)
+        if pane is None:
+            return
+        if is_final:
+            pane.scheduler.add_final(text)
+        else:
+            pane.scheduler.set_interim(text)
+
+    def update_compare_status(self, model_name, status):
+        pane = self.compare_panes.get(model_name)
+        if pane is not None:
+            pane.latency_label.setText(status)
+
+    def update_stream_metrics(self):
+        if self.audio_process is not None:
+            # One snapshot from the worker: session, send queue and capture
+            latency = metrics = self.audio_process.metrics
+            if not metrics:
+                return
+        else:
+            latency = self.websocket_thread.latency.summary()
+            metrics = self.websocket_thread.send_metrics()
+        for model_name, summary in self.websocket_thread.compare_latency().items():
+            pane = self.compare_panes.get(model_name)
+            if pane is not None:
+                pane.latency_label.setText(
+                    "Latency: " + self.format_latency("interim", summary['capture_to_interim_ms']) +
+                    " | " + self.format_latency("final", summary['capture_to_final_ms']))
+        latency_text = ("Latency: " + self.format_latency("interim", latency['capture_to_interim_ms']) +
+                        " | " + self.format_latency("final", latency['capture_to_final_ms']))
+        typing = self.text_injector.metrics()
+        if typing['submitted']:
+            latency_text += " | " + self.format_latency("typing", typing['latency_ms'])
+        render = self.transcript_scheduler.metrics()
+        latency_text += f" | renders {render['renders']} ({render['renders_skipped']} skipped)"
+        self.latency_label.setText(latency_text)
         
-        # Scroll to bottom
-        scrollbar = self.transcript_display.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        self.network_label.setText(
+            f"Network: queue {metrics['depth']}/{metrics['maxsize']} "
+            f"(max {metrics['max_depth']}, {metrics['policy']}), "
+            f"send {metrics['send_ms_avg']:.1f}ms avg / {metrics['send_ms_max']:.1f}ms max, "
+            f"dropped {metrics['dropped_chunks']}, coalesced {metrics['coalesced']}, "
+            f"replay {metrics['replay_seconds']:.1f}s buffered / "
+            f"{metrics['replay_replayed']} replayed / {metrics['replay_dropped_chunks']} dropped, "
+            f"warm connections {metrics.get('pool_connected', 0)}, "
+            f"first audio sent {self.format_ms(metrics.get('ttfb_ms'))} after Start "
+            f"(connect {self.format_ms(metrics.get('connect_ms'))})"
+        )
+
+    def format_ms(self, value):
+        return "-" if value is None else f"{value:.0f}ms"
+
+    def format_latency(self, name, summary):
+        if summary['p50'] is None:
+            return f"{name} -"
+        return (f"{name} p50 {summary['p50']:.0f} / p95 {summary['p95']:.0f} / "
+                f"p99 {summary['p99']:.0f} ms")
+
+    def export_latency_stats(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export latency stats", "latency.json", "JSON (*.json)")
+        if not path:
+            return
+        from streaming_engine import SERVER_URL
+        model_name = self.selected_model()
+        context = dict(
+            exported_at=datetime.now().isoformat(),
+            server_url=SERVER_URL,
+            model_name=model_name,
+            streaming_profile=self.profile_selector.currentData(),
+            encoding=self.encoding_selector.currentData(),
+            vad=self.vad_checkbox.isChecked(),
+            typing=self.text_injector.metrics(),
+            render=self.transcript_scheduler.metrics(),
+            capture=self.capture_metrics(),
+        )
+        if self.audio_process is not None:
+            # The worker's snapshot has the latency summary but not the raw samples
+            metrics = dict(self.audio_process.metrics)
+            metrics.pop('capture', None)
+            data = json.dumps(dict(context, audio_process=True, network=metrics), indent=2)
+        else:
+            data = self.websocket_thread.latency.to_json(
+                network=self.websocket_thread.send_metrics(),
+                compared_models=self.websocket_thread.compare_latency(),
+                **context)
+        with open(path, 'w') as f:
+            f.write(data)
+        self.status_label.setText(f"Status: Latency stats saved to {path}")
 
     def update_status(self, status):
         self.status_label.setText(f"Status: {status}")
@@ -505,14 +1244,20 @@ class TranscriptionApp(QMainWindow):
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
         self.audio_recorder.stop()
-        if self.websocket_thread.sio.connected:
-            self.websocket_thread.disconnect_from_server()
+        self.stop_audio_process()
+        self.websocket_thread.stop_sending()
+        self.metrics_timer.stop()
 
     def closeEvent(self, event):
         self.stop_recording()
+        self.websocket_thread.disconnect_from_server()
+        self.text_injector.close()
+        self.transcript_store.close()
+        self.audio_recorder.devices.close()
         event.accept()
 
 if __name__ == '__main__':
+    setup_logging()
     app = QApplication(sys.argv)
     
     # Set macOS-specific style
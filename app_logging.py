@@ -0,0 +1,169 @@
+"""Logging setup for the app.
+
+Records are handed to a queue on the calling thread and formatted and
+written by a single listener thread, so the audio, network and GUI threads
+never block on stdout. Every record at the active level also goes to an
+in-memory ring buffer that is written out as a postmortem on a crash.
+
+Hot-path events (one per audio chunk or transcript) go through
+SampledLogger, which returns after a single level check when DEBUG is off
+and otherwise logs only every Nth event per key.
+
+Environment:
+    WHISSLE_LOG_LEVEL      DEBUG, INFO (default), WARNING, ...
+    WHISSLE_LOG_FORMAT     'text' (default) or 'json'
+    WHISSLE_LOG_DIR        where postmortem dumps go (default: temp dir)
+    WHISSLE_SOCKETIO_DEBUG set to 1 to enable python-socketio's own loggers
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import time
+from collections import deque
+
+ROOT_LOGGER = 'whissle'
+_ring_buffer = None
+_listener = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """``time level logger message key=value ...`` or one JSON object per line.
+
+    Structured fields are passed as ``extra={'fields': {...}}``.
+    """
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        if self.as_json:
+            data = {
+                'ts': record.created,
+                'level': record.levelname,
+                'logger': record.name,
+                'thread': record.threadName,
+                'msg': record.getMessage(),
+            }
+            data.update(fields)
+            if record.exc_info:
+                data['exc'] = self.formatException(record.exc_info)
+            return json.dumps(data, default=str)
+        timestamp = time.strftime('%H:%M:%S', time.localtime(record.created))
+        line = f"{timestamp}.{int(record.msecs):03d} {record.levelname:<7} {record.name} {record.getMessage()}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in memory; formats them only on dump."""
+
+    def __init__(self, capacity=5000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, stream):
+        for record in list(self.records):
+            stream.write(self.format(record) + '\n')
+
+
+class SampledLogger:
+    """Rate-limited logging for per-chunk events.
+
+    The first event for each key is logged, then every ``every``-th, with the
+    running count attached. When the level is disabled the call costs one
+    ``isEnabledFor`` check.
+    """
+
+    def __init__(self, logger, every=100):
+        self.logger = logger
+        self.every = every
+        self.counts = {}
+
+    def debug(self, key, msg, *args, **fields):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count == 1 or count % self.every == 0:
+            fields['count'] = count
+            self.logger.debug(msg, *args, extra={'fields': fields})
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues the record untouched so formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=None):
+    """Install the queue handler, console listener and ring buffer. Idempotent."""
+    global _ring_buffer, _listener
+    if _listener is not None:
+        return _ring_buffer
+    level = level or os.environ.get('WHISSLE_LOG_LEVEL', 'INFO').upper()
+    formatter = StructuredFormatter(as_json=os.environ.get('WHISSLE_LOG_FORMAT') == 'json')
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(formatter)
+    _ring_buffer = RingBufferHandler()
+    _ring_buffer.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, console, _ring_buffer)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.propagate = False
+
+    previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        root.critical("Unhandled exception", exc_info=(exc_type, exc, tb))
+        dump_postmortem()
+        previous_hook(exc_type, exc, tb)
+
+    sys.excepthook = excepthook
+    return _ring_buffer
+
+
+def dump_postmortem(path=None):
+    """Write the in-memory ring buffer to a file; returns the path."""
+    if _ring_buffer is None:
+        return None
+    if path is None:
+        directory = os.environ.get('WHISSLE_LOG_DIR', tempfile.gettempdir())
+        path = os.path.join(directory, f"whissle-postmortem-{time.strftime('%Y%m%d-%H%M%S')}.log")
+    # Let the listener thread finish handing over queued records first
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+    with open(path, 'w') as f:
+        _ring_buffer.dump(f)
+    return path
+
+
+def socketio_loggers():
+    """Logger arguments for socketio.Client: off unless explicitly requested."""
+    if os.environ.get('WHISSLE_SOCKETIO_DEBUG') == '1':
+        return {
+            'logger': logging.getLogger(f'{ROOT_LOGGER}.socketio'),
+            'engineio_logger': logging.getLogger(f'{ROOT_LOGGER}.engineio'),
+        }
+    return {'logger': False, 'engineio_logger': False}
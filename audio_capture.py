@@ -0,0 +1,82 @@
+"""One open microphone: PortAudio callback -> ring buffer -> 16 kHz frames.
+
+PortAudio calls ``CaptureStream``'s callback on its own thread with every
+buffer it captures. The callback only copies the audio into a preallocated
+RingBuffer and returns, so a slow reader can never make PortAudio drop
+input; the reader takes whole frames out of the ring at its own pace and
+runs them through the AudioPreprocessor. The ring holds ``RING_SECONDS`` of
+audio, so capture only loses samples if the reader stalls for that long,
+and then ``metrics()`` says how much was lost.
+
+There is no Qt here, so a capture can also run outside the GUI.
+"""
+import os
+
+from ring_buffer import RingBuffer
+
+# Microphones are opened at their own rate and resampled to 16 kHz (see
+# audio_dsp.py); a number forces that capture rate
+CAPTURE_RATE = os.environ.get('WHISSLE_CAPTURE_RATE', 'native')
+# Audio the reader may fall behind by before samples are dropped
+RING_SECONDS = float(os.environ.get('WHISSLE_CAPTURE_BUFFER_SECONDS', '2.0'))
+
+# PortAudio's paContinue and callback status flags, as exported by pyaudio
+PA_CONTINUE = 0
+PA_INPUT_UNDERFLOW = 0x1
+PA_INPUT_OVERFLOW = 0x2
+
+
+class CaptureStream:
+    def __init__(self, devices, name, frame_size, out_rate=16000, capture_rate=CAPTURE_RATE,
+                 agc=True, ring_seconds=RING_SECONDS, ring=None):
+        import audio_dsp
+        self.name = name
+        self.rate = devices.native_rate(name) if capture_rate == 'native' else int(capture_rate)
+        # Same frame duration at the device rate; the preprocessor turns each
+        # frame into one frame at out_rate
+        self.frames = frame_size * self.rate // out_rate
+        self.frame_seconds = self.frames / self.rate
+        self.frame = memoryview(bytearray(self.frames * 2))
+        # A ring may be passed in, e.g. one laid over shared memory
+        self.ring = ring if ring is not None else RingBuffer(int(self.rate * ring_seconds) * 2)
+        self.preprocessor = audio_dsp.AudioPreprocessor(self.rate, out_rate, agc=agc)
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.closed = False
+        self.stream = devices.open_input(name, self.rate, self.frames, stream_callback=self._callback)
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # PortAudio's thread: count what PortAudio itself lost, copy, return
+        if status:
+            if status & PA_INPUT_OVERFLOW:
+                self.input_overflows += 1
+            if status & PA_INPUT_UNDERFLOW:
+                self.input_underflows += 1
+        self.ring.write(in_data)
+        return None, PA_CONTINUE
+
+    def read(self, timeout=None):
+        """The next preprocessed frame as bytes, or None if the device
+        delivered nothing for ``timeout`` seconds (default: four frames)."""
+        if timeout is None:
+            timeout = 4 * self.frame_seconds
+        if not self.ring.read_exactly(self.frame, self.rate * 2, timeout):
+            return None
+        return self.preprocessor.process(self.frame)
+
+    def drain(self):
+        """Whole frames still in the ring; for after close()."""
+        while self.ring.available() >= len(self.frame):
+            self.ring.read_into(self.frame)
+            yield self.preprocessor.process(self.frame)
+
+    def close(self):
+        self.closed = True
+        self.stream.stop_stream()
+        self.stream.close()
+
+    def metrics(self):
+        return dict(self.ring.metrics(), device=self.name or 'default',
+                    input_overflows=self.input_overflows,
+                    input_underflows=self.input_underflows,
+                    **self.preprocessor.metrics())
@@ -0,0 +1,169 @@
+import importlib.util
+import struct
+
+# G.711 mu-law constants (14-bit magnitude, as in the reference g711.c)
+MULAW_BIAS = 0x84
+MULAW_CLIP = 8159
+
+
+def _build_mulaw_tables():
+    import numpy as np
+    # Encode table indexed by the int16 sample reinterpreted as uint16
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), MULAW_CLIP) + (MULAW_BIAS >> 2)
+    segment = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+    mantissa = (magnitude >> (segment + 1)) & 0x0F
+    # Magnitudes beyond the last segment saturate to the largest code
+    code = np.where(segment >= 8, 0x7F, (np.minimum(segment, 7) << 4) | mantissa)
+    encode = (code ^ mask).astype(np.uint8)
+
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + MULAW_BIAS) << exponent) - MULAW_BIAS
+    decode = np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+    return encode, decode
+
+
+_mulaw_tables = None
+
+
+def mulaw_tables():
+    """(encode, decode) lookup tables, built on first use so that importing
+    this module does not import numpy."""
+    global _mulaw_tables
+    if _mulaw_tables is None:
+        _mulaw_tables = _build_mulaw_tables()
+    return _mulaw_tables
+
+
+class PCM16Codec:
+    """Raw 16-bit little-endian PCM, the format the server has always received."""
+    name = 'pcm16'
+
+    def __init__(self, sample_rate=16000):
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def available():
+        return True
+
+    def encode(self, chunk):
+        return chunk
+
+    def flush(self):
+        return b''
+
+    def decode(self, payload):
+        return payload
+
+
+class MuLawCodec:
+    """G.711 mu-law: 8 bits per sample via a lookup table, no native dependency."""
+    name = 'mulaw'
+
+    def __init__(self, sample_rate=16000):
+        import numpy as np
+        self.sample_rate = sample_rate
+        self.frombuffer = np.frombuffer
+        self.encode_table, self.decode_table = mulaw_tables()
+
+    @staticmethod
+    def available():
+        # Without importing numpy, which the GUI does not need at start-up
+        return importlib.util.find_spec('numpy') is not None
+
+    def encode(self, chunk):
+        samples = self.frombuffer(chunk, dtype='<u2')
+        return self.encode_table[samples].tobytes()
+
+    def flush(self):
+        return b''
+
+    def decode(self, payload):
+        codes = self.frombuffer(payload, dtype='u1')
+        return self.decode_table[codes].tobytes()
+
+
+class OpusCodec:
+    """Opus in 20 ms packets, each prefixed with its 2-byte big-endian length.
+
+    Requires the optional ``opuslib`` package and the libopus shared library.
+    Samples that do not fill a whole packet are carried over to the next chunk,
+    and ``flush()`` sends the last of them padded with silence.
+    """
+    name = 'opus'
+    frame_ms = 20
+
+    def __init__(self, sample_rate=16000, bitrate=24000):
+        import opuslib
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * self.frame_ms // 1000
+        self.encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self.encoder.bitrate = bitrate
+        self.decoder = opuslib.Decoder(sample_rate, 1)
+        self.pending = b''
+
+    @staticmethod
+    def available():
+        # opuslib raises at import when libopus is missing, so finding the
+        # package is not enough
+        try:
+            import opuslib
+        except Exception:
+            return False
+        return True
+
+    def encode(self, chunk):
+        data = self.pending + chunk
+        frame_bytes = self.frame_size * 2
+        packets = []
+        offset = 0
+        while offset + frame_bytes <= len(data):
+            packet = self.encoder.encode(data[offset:offset + frame_bytes], self.frame_size)
+            packets.append(struct.pack('>H', len(packet)))
+            packets.append(packet)
+            offset += frame_bytes
+        self.pending = data[offset:]
+        return b''.join(packets)
+
+    def flush(self):
+        """Encode the carried-over samples as one last packet, padded with
+        silence to 20 ms."""
+        if not self.pending:
+            return b''
+        frame = self.pending + bytes(self.frame_size * 2 - len(self.pending))
+        self.pending = b''
+        packet = self.encoder.encode(frame, self.frame_size)
+        return struct.pack('>H', len(packet)) + packet
+
+    def decode(self, payload):
+        frames = []
+        offset = 0
+        while offset + 2 <= len(payload):
+            (length,) = struct.unpack_from('>H', payload, offset)
+            offset += 2
+            frames.append(self.decoder.decode(payload[offset:offset + length], self.frame_size))
+            offset += length
+        return b''.join(frames)
+
+
+CODECS = {
+    PCM16Codec.name: PCM16Codec,
+    MuLawCodec.name: MuLawCodec,
+    OpusCodec.name: OpusCodec,
+}
+DEFAULT_CODEC = PCM16Codec.name
+
+
+def create_codec(name, sample_rate=16000):
+    if name not in CODECS:
+        raise ValueError(f"Unknown audio encoding: {name}")
+    return CODECS[name](sample_rate)
+
+
+def available_codecs():
+    """Names of the codecs whose dependencies are installed; no codec is
+    built to find out."""
+    return [name for name, codec in CODECS.items() if codec.available()]
@@ -0,0 +1,162 @@
+"""Input device enumeration and opening, shared by the GUI and capture threads.
+
+PyAudio is created on first use and the device list is cached: enumerating
+is only repeated by ``rescan()``. PortAudio only notices newly plugged
+devices after it has been terminated and initialised again, so ``rescan()``
+must not run while a stream is open; AudioRecorder closes its stream
+around it.
+
+Devices are selected by name, since indices change after a rescan. ``None``
+means the system default input.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+log = logging.getLogger('whissle.audio')
+
+InputDevice = namedtuple('InputDevice', 'index name default_rate channels')
+
+
+class AudioDeviceManager:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.audio = None
+        self.cache = None
+        self.enumerations = 0
+
+    def pyaudio(self):
+        with self.lock:
+            if self.audio is None:
+                import pyaudio
+                self.audio = pyaudio.PyAudio()
+            return self.audio
+
+    def input_devices(self):
+        """Cached list of InputDevice for every device with input channels."""
+        with self.lock:
+            if self.cache is None:
+                audio = self.pyaudio()
+                devices = []
+                for index in range(audio.get_device_count()):
+                    info = audio.get_device_info_by_index(index)
+                    if info.get('maxInputChannels', 0) > 0:
+                        devices.append(InputDevice(index, info['name'], int(info['defaultSampleRate']),
+                                                   int(info['maxInputChannels'])))
+                self.cache = devices
+                self.enumerations += 1
+            return list(self.cache)
+
+    def find(self, name):
+        """The InputDevice called name, or None for the default or a missing device."""
+        if name is None:
+            return None
+        for device in self.input_devices():
+            if device.name == name:
+                return device
+        log.warning("Input device %r not found, using the default input", name)
+        return None
+
+    def native_rate(self, name):
+        """Default sample rate of the named device, or of the default input."""
+        device = self.find(name)
+        if device is not None:
+            return device.default_rate
+        with self.lock:
+            return int(self.pyaudio().get_default_input_device_info()['defaultSampleRate'])
+
+    def rescan(self):
+        """Re-initialise PortAudio to pick up plugged or removed devices."""
+        with self.lock:
+            if self.audio is not None:
+                self.audio.terminate()
+                self.audio = None
+            self.cache = None
+            return self.input_devices()
+
+    def open_input(self, name, rate, frames_per_buffer, stream_callback=None):
+        """Open a mono int16 input stream on the named device (or the default).
+
+        With ``stream_callback`` the stream runs in PortAudio's callback mode.
+        """
+        import pyaudio
+        device = self.find(name)
+        with self.lock:
+            return self.pyaudio().open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=rate,
+                input=True,
+                frames_per_buffer=frames_per_buffer,
+                input_device_index=None if device is None else device.index,
+                stream_callback=stream_callback,
+            )
+
+    def close(self):
+        with self.lock:
+            if self.audio is not None:
+                self.audio.terminate()
+                self.audio = None
+            self.cache = None
+
+
+class SyntheticDeviceManager:
+    """Stand-in for AudioDeviceManager with one generated input.
+
+    Its stream calls back every 10 ms with a quiet tone and noise, in real
+    time, from its own thread as PortAudio does. For benchmarks and
+    headless runs on machines without a microphone.
+    """
+
+    def __init__(self, rate=48000):
+        self.rate = rate
+
+    def input_devices(self):
+        return [InputDevice(0, 'Synthetic input', self.rate, 1)]
+
+    def find(self, name):
+        return None
+
+    def native_rate(self, name):
+        return self.rate
+
+    def rescan(self):
+        return self.input_devices()
+
+    def open_input(self, name, rate, frames_per_buffer, stream_callback=None):
+        return SyntheticStream(rate, stream_callback)
+
+    def close(self):
+        pass
+
+
+class SyntheticStream(threading.Thread):
+    def __init__(self, rate, callback):
+        super().__init__(daemon=True)
+        import numpy as np
+        period = rate // 100
+        t = np.arange(rate) / rate
+        second = 3000 * np.sin(2 * np.pi * 220 * t) + np.random.default_rng(0).normal(0, 300, rate)
+        data = second.astype(np.int16).tobytes()
+        self.buffers = [data[i * 2 * period:(i + 1) * 2 * period] for i in range(100)]
+        self.period = period
+        self.callback = callback
+        self.running = True
+        self.start()
+
+    def run(self):
+        start = time.monotonic()
+        count = 0
+        while self.running:
+            count += 1
+            delay = start + count / 100 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.callback(self.buffers[count % 100], self.period, None, 0)
+
+    def stop_stream(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
@@ -0,0 +1,217 @@
+"""Capture-side preprocessing: resampling to 16 kHz, DC removal and gain control.
+
+The microphone is opened at the device's native rate (44.1 or 48 kHz on most
+USB and Bluetooth devices) and each captured frame goes through
+``AudioPreprocessor``:
+
+* ``Resampler`` -- polyphase FIR resampling by a rational factor
+  (48000 -> 16000 is 1/3, 44100 -> 16000 is 160/441) with a Kaiser-windowed
+  sinc low-pass, keeping its filter history between frames;
+* ``DCBlocker`` -- subtracts a slowly tracked mean, ramped across each frame;
+* ``AutomaticGainControl`` -- moves the level of speech towards a target
+  with a fast attack and slow release, without boosting silence, and
+  ramps the gain across each frame so it never steps.
+
+Everything works on whole frames with NumPy and writes into buffers that
+are allocated once and only grown if a larger frame arrives.
+"""
+import math
+import time
+
+import numpy as np
+
+
+class Resampler:
+    """Streaming polyphase resampler for float32 blocks."""
+
+    def __init__(self, in_rate, out_rate, zero_crossings=10, beta=5.0):
+        divisor = math.gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // divisor
+        self.down = int(in_rate) // divisor
+        # Low-pass at the lower of the two Nyquist frequencies, designed at
+        # the upsampled rate and scaled by up to keep unity gain
+        factor = max(self.up, self.down)
+        half = zero_crossings * factor
+        n = np.arange(-half, half + 1)
+        taps = np.sinc(n / factor) * np.kaiser(2 * half + 1, beta) * (self.up / factor)
+        self.taps = -(-len(taps) // self.up)
+        padded = np.zeros(self.taps * self.up)
+        padded[:len(taps)] = taps
+        # bank[phase] holds every up-th tap, reversed to line up with a
+        # window of input samples that ends at the newest one
+        self.bank = np.ascontiguousarray(padded.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+        self.offsets = np.arange(-self.taps + 1, 1)
+        self.history = self.taps - 1
+        # Upsampled position of the next output, relative to the buffer start
+        self.position = self.up * self.history
+        self.buffer = np.zeros(self.history, dtype=np.float32)
+        self.capacity = 0
+
+    def _grow(self, block):
+        self.capacity = block
+        outputs = block * self.up // self.down + 2
+        buffer = np.zeros(self.history + block, dtype=np.float32)
+        buffer[:self.history] = self.buffer[:self.history]
+        self.buffer = buffer
+        self.steps = np.arange(outputs) * self.down
+        self.positions = np.empty(outputs, dtype=np.intp)
+        self.index = np.empty((outputs, self.taps), dtype=np.intp)
+        self.phases = np.empty(outputs, dtype=np.intp)
+        self.windows = np.empty((outputs, self.taps), dtype=np.float32)
+        self.coefs = np.empty((outputs, self.taps), dtype=np.float32)
+        self.output = np.empty(outputs, dtype=np.float32)
+
+    def process(self, block):
+        """Resample one float32 block; returns a view valid until the next call."""
+        if len(block) > self.capacity:
+            self._grow(len(block))
+        total = self.history + len(block)
+        self.buffer[self.history:total] = block
+        # Every output whose newest input sample has arrived
+        count = max(0, -(-(self.up * total - self.position) // self.down))
+        positions = np.add(self.steps[:count], self.position, out=self.positions[:count])
+        index = self.index[:count]
+        np.floor_divide(positions[:, None], self.up, out=index)
+        np.add(index, self.offsets, out=index)
+        np.remainder(positions, self.up, out=self.phases[:count])
+        np.take(self.buffer, index, out=self.windows[:count], mode='clip')
+        np.take(self.bank, self.phases[:count], axis=0, out=self.coefs[:count], mode='clip')
+        output = np.einsum('ij,ij->i', self.windows[:count], self.coefs[:count], out=self.output[:count])
+        # Keep the last taps-1 samples as the next block's history
+        self.position += count * self.down - self.up * len(block)
+        self.buffer[:self.history] = self.buffer[len(block):total]
+        return output
+
+
+class DCBlocker:
+    """Removes a DC offset tracked over about ``time_constant`` seconds."""
+
+    def __init__(self, sample_rate, time_constant=0.5):
+        self.sample_rate = sample_rate
+        self.time_constant = time_constant
+        self.offset = 0.0
+
+    def process(self, samples, ramp, scratch):
+        if not len(samples):
+            return samples
+        alpha = 1.0 - math.exp(-len(samples) / (self.sample_rate * self.time_constant))
+        previous = self.offset
+        self.offset += alpha * (float(samples.mean()) - self.offset)
+        # Subtract an offset moving linearly from the old estimate to the new one
+        samples -= previous
+        samples -= np.multiply(ramp, self.offset - previous, out=scratch)
+        return samples
+
+
+class AutomaticGainControl:
+    """Block-wise gain towards ``target_db`` dBFS for frames louder than ``gate_db``."""
+
+    def __init__(self, sample_rate, target_db=-20.0, max_gain_db=24.0, min_gain_db=-12.0,
+                 gate_db=-50.0, attack=0.02, release=1.0):
+        self.sample_rate = sample_rate
+        self.target_db = target_db
+        self.max_gain_db = max_gain_db
+        self.min_gain_db = min_gain_db
+        self.gate_db = gate_db
+        self.attack = attack
+        self.release = release
+        self.enabled = True
+        self.gain_db = 0.0
+        self.clipped = 0
+
+    def process(self, samples, ramp, scratch):
+        if not len(samples):
+            return samples
+        previous = 10.0 ** (self.gain_db / 20.0)
+        level_db = 10.0 * math.log10(float(np.dot(samples, samples)) / len(samples) + 1e-12)
+        # Silence and background noise leave the gain where it was
+        if self.enabled and level_db > self.gate_db:
+            wanted = min(self.max_gain_db, max(self.min_gain_db, self.target_db - level_db))
+            time_constant = self.attack if wanted < self.gain_db else self.release
+            alpha = 1.0 - math.exp(-len(samples) / (self.sample_rate * time_constant))
+            self.gain_db += alpha * (wanted - self.gain_db)
+        elif not self.enabled:
+            self.gain_db = 0.0
+        current = 10.0 ** (self.gain_db / 20.0)
+        if previous == current == 1.0:
+            return samples
+        # Gain ramps from the previous frame's value, then a hard limit
+        np.multiply(ramp, current - previous, out=scratch)
+        scratch += previous
+        samples *= scratch
+        self.clipped += int(np.count_nonzero(np.abs(samples, out=scratch) > 1.0))
+        np.clip(samples, -1.0, 1.0, out=samples)
+        return samples
+
+
+class AudioPreprocessor:
+    """int16 frames at ``in_rate`` in, int16 frames at ``out_rate`` out."""
+
+    def __init__(self, in_rate, out_rate=16000, dc_removal=True, agc=True):
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.resampler = Resampler(in_rate, out_rate) if self.in_rate != self.out_rate else None
+        self.dc_blocker = DCBlocker(out_rate) if dc_removal else None
+        self.agc = AutomaticGainControl(out_rate)
+        self.agc.enabled = agc
+        self.floats = np.empty(0, dtype=np.float32)
+        self.ints = np.empty(0, dtype=np.int16)
+        self.scratch = np.empty(0, dtype=np.float32)
+        self.ramps = {}
+        self.frames = 0
+        self.samples_in = 0
+        self.samples_out = 0
+        self.seconds = 0.0
+
+    def _ramp(self, n):
+        # 1/n .. 1: the last sample reaches the new value; one array per frame size
+        ramp = self.ramps.get(n)
+        if ramp is None:
+            ramp = self.ramps[n] = np.arange(1, n + 1, dtype=np.float32) / n
+        return ramp
+
+    def process(self, data):
+        """Process one captured frame of int16 bytes."""
+        started = time.perf_counter()
+        samples = np.frombuffer(data, dtype=np.int16)
+        if len(samples) > len(self.floats):
+            self.floats = np.empty(len(samples), dtype=np.float32)
+        floats = np.multiply(samples, 1.0 / 32768.0, out=self.floats[:len(samples)], dtype=np.float32)
+        if self.resampler is not None:
+            floats = self.resampler.process(floats)
+        ramp = self._ramp(len(floats))
+        if len(floats) > len(self.scratch):
+            self.scratch = np.empty(len(floats) * 2, dtype=np.float32)
+        scratch = self.scratch[:len(floats)]
+        if self.dc_blocker is not None:
+            self.dc_blocker.process(floats, ramp, scratch)
+        self.agc.process(floats, ramp, scratch)
+        if len(floats) > len(self.ints):
+            self.ints = np.empty(len(floats) * 2, dtype=np.int16)
+        ints = self.ints[:len(floats)]
+        floats *= 32767.0
+        np.rint(floats, out=floats)
+        np.copyto(ints, floats, casting='unsafe')
+        self.frames += 1
+        self.samples_in += len(samples)
+        self.samples_out += len(ints)
+        self.seconds += time.perf_counter() - started
+        return ints.tobytes()
+
+    @property
+    def gain_db(self):
+        """Gain the AGC applied to the end of the last frame; subtract it
+        from a level measured on the output to get the captured level."""
+        return self.agc.gain_db
+
+    def metrics(self):
+        audio_seconds = self.samples_in / self.in_rate
+        return {
+            'in_rate': self.in_rate,
+            'out_rate': self.out_rate,
+            'frames': self.frames,
+            'samples_out': self.samples_out,
+            'core_percent': 100 * self.seconds / audio_seconds if audio_seconds else 0.0,
+            'gain_db': round(self.agc.gain_db, 1),
+            'clipped_samples': self.agc.clipped,
+        }
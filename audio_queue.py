@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import deque
+
+# What put() does when the queue is full:
+#   block       - wait for the sender to make room (back-pressure on capture)
+#   drop-oldest - discard the oldest queued chunk to make room
+#   coalesce    - append the new audio to the newest queued chunk, so nothing
+#                 is lost and the backlog goes out in fewer, larger messages
+OVERFLOW_POLICIES = ('block', 'drop-oldest', 'coalesce')
+
+
+class AudioSendQueue:
+    """Bounded, thread-safe FIFO of (chunk, captured_at) between capture and sender."""
+
+    def __init__(self, maxsize=50, policy='coalesce'):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+        self.enqueued = 0
+        self.max_depth = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.coalesced = 0
+        self.blocked_seconds = 0.0
+
+    def put(self, chunk, captured_at=None):
+        """Queue a chunk; returns False if the queue has been closed."""
+        if captured_at is None:
+            captured_at = time.monotonic()
+        with self.lock:
+            if self.closed:
+                return False
+            self.enqueued += 1
+            if len(self.items) >= self.maxsize:
+                if self.policy == 'block':
+                    start = time.monotonic()
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.not_full.wait()
+                    self.blocked_seconds += time.monotonic() - start
+                    if self.closed:
+                        return False
+                elif self.policy == 'drop-oldest':
+                    dropped, _ = self.items.popleft()
+                    self.dropped_chunks += 1
+                    self.dropped_bytes += len(dropped)
+                else:
+                    # Keep the older capture time: that is when this audio started waiting
+                    last_chunk, last_captured_at = self.items[-1]
+                    self.items[-1] = (last_chunk + chunk, last_captured_at)
+                    self.coalesced += 1
+                    self.not_empty.notify()
+                    return True
+            self.items.append((chunk, captured_at))
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.not_empty.notify()
+            return True
+
+    def get(self, timeout=None):
+        """Return the next (chunk, captured_at), or None on timeout or once closed and drained."""
+        with self.lock:
+            if not self.items and not self.closed:
+                self.not_empty.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.not_full.notify()
+            return item
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def clear(self):
+        """Discard everything still queued, counting it as dropped."""
+        with self.lock:
+            self.dropped_chunks += len(self.items)
+            self.dropped_bytes += sum(len(chunk) for chunk, _ in self.items)
+            self.items.clear()
+            self.not_full.notify_all()
+
+    def depth(self):
+        with self.lock:
+            return len(self.items)
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'policy': self.policy,
+                'depth': len(self.items),
+                'maxsize': self.maxsize,
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'dropped_chunks': self.dropped_chunks,
+                'dropped_bytes': self.dropped_bytes,
+                'coalesced': self.coalesced,
+                'blocked_seconds': self.blocked_seconds,
+            }
+
+
+class ReplayBuffer:
+    """Audio captured while the socket is down, replayed in order on reconnect.
+
+    Bounded by audio duration: once more than max_seconds of PCM is held, the
+    oldest chunks are dropped.
+    """
+
+    def __init__(self, max_seconds=30.0, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.max_bytes = int(max_seconds * sample_rate) * 2
+        self.items = deque()
+        self.size = 0
+        self.buffered_chunks = 0
+        self.replayed_chunks = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, chunk, captured_at):
+        self.items.append((chunk, captured_at))
+        self.size += len(chunk)
+        self.buffered_chunks += 1
+        while self.size > self.max_bytes and len(self.items) > 1:
+            dropped, _ = self.items.popleft()
+            self.size -= len(dropped)
+            self.dropped_chunks += 1
+            self.dropped_bytes += len(dropped)
+
+    def peek(self):
+        return self.items[0]
+
+    def pop(self):
+        chunk, captured_at = self.items.popleft()
+        self.size -= len(chunk)
+        self.replayed_chunks += 1
+        return chunk, captured_at
+
+    def requeue(self, chunk, captured_at):
+        """Put a chunk that failed to replay back at the front."""
+        self.items.appendleft((chunk, captured_at))
+        self.size += len(chunk)
+        self.replayed_chunks -= 1
+
+    def clear(self):
+        """Discard everything held, counting it as dropped; returns the chunk count."""
+        count = len(self.items)
+        self.dropped_chunks += count
+        self.dropped_bytes += self.size
+        self.items.clear()
+        self.size = 0
+        return count
+
+    def metrics(self):
+        return {
+            'replay_depth': len(self.items),
+            'replay_seconds': self.size / 2 / self.sample_rate,
+            'replay_buffered': self.buffered_chunks,
+            'replay_replayed': self.replayed_chunks,
+            'replay_dropped_chunks': self.dropped_chunks,
+            'replay_dropped_bytes': self.dropped_bytes,
+        }
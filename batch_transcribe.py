@@ -0,0 +1,193 @@
+"""Headless batch transcription of recorded audio files.
+
+Streams WAV or raw PCM files through the same ``audio_in``/``transcript``
+protocol as the app, several sessions at a time, and writes one JSON object
+per file to a JSONL file as each one finishes::
+
+    python batch_transcribe.py calls/ --jobs 8 --output calls.jsonl
+    python batch_transcribe.py a.wav b.pcm --pacing realtime --model hindi_adapter-ai4bharat
+
+``--pacing realtime`` sends audio no faster than it was recorded, like the
+microphone does; ``--pacing fast`` (the default) sends each chunk as soon as
+the previous one has been accepted by the socket. Raw ``.pcm``/``.raw``
+files must be 16 kHz mono 16-bit little-endian. WAV files are mixed down to
+mono and resampled to 16 kHz if needed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+from app_logging import setup_logging
+from audio_codec import DEFAULT_CODEC, CODECS
+from streaming_engine import SERVER_URL, StreamingSession
+from streaming_profiles import STREAMING_PROFILES, profile_sizes
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = ('.wav', '.pcm', '.raw')
+DEFAULT_MODEL = 'speech-tagger_en_ner-emotion'
+PACING_MODES = ('fast', 'realtime')
+
+log = logging.getLogger('whissle.batch')
+
+
+def find_audio_files(paths):
+    """Expand files and directories (recursively) into a sorted list of audio files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def load_pcm(path):
+    """Return the file's audio as 16 kHz mono int16 PCM bytes."""
+    if not path.lower().endswith('.wav'):
+        with open(path, 'rb') as f:
+            return f.read()
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit WAV is supported, got {8 * wav.getsampwidth()}-bit")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        data = wav.readframes(wav.getnframes())
+    if channels == 1 and rate == SAMPLE_RATE:
+        return data
+    samples = np.frombuffer(data, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        duration = len(samples) / rate
+        positions = np.arange(int(duration * SAMPLE_RATE)) * (rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return np.clip(np.round(samples), -32768, 32767).astype(np.int16).tobytes()
+
+
+async def paced_chunks(pcm, chunk_size, pacing):
+    """Yield chunk_size-sample chunks, in real time when pacing is 'realtime'."""
+    chunk_bytes = chunk_size * 2
+    start = time.monotonic()
+    for offset in range(0, len(pcm), chunk_bytes):
+        chunk = pcm[offset:offset + chunk_bytes]
+        if pacing == 'realtime':
+            # A chunk is only available once all of its audio has been "recorded"
+            delay = start + (offset + len(chunk)) / 2 / SAMPLE_RATE - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield chunk
+
+
+async def transcribe_file(path, args):
+    """Stream one file and return its result record."""
+    record = {'file': path, 'model_name': args.model, 'encoding': args.encoding}
+    start = time.monotonic()
+    try:
+        pcm = await asyncio.to_thread(load_pcm, path)
+        record['audio_seconds'] = len(pcm) / 2 / SAMPLE_RATE
+        frame_size, frames_per_send = profile_sizes(args.profile, SAMPLE_RATE)
+        finals = []
+        partial = None
+        source = paced_chunks(pcm, frame_size * frames_per_send, args.pacing)
+        async with StreamingSession(args.model, source=source, server_url=args.server_url,
+                                    encoding=args.encoding, linger=args.linger) as session:
+            async for transcript in session:
+                if transcript.is_final:
+                    finals.append(transcript.text)
+                    partial = None
+                else:
+                    partial = transcript.text
+        metrics = session.metrics()
+        record.update({
+            'transcript': ' '.join(finals),
+            'finals': finals,
+            # Last interim that no final replaced before the stream ended
+            'partial': partial,
+            'chunks_sent': metrics['chunks_sent'],
+            # Audio that never reached the server: still buffered at the end,
+            # or dropped from the replay buffer while disconnected
+            'chunks_unsent': metrics['replay_depth'],
+            'chunks_dropped': metrics['replay_dropped_chunks'],
+            'capture_to_final_ms': metrics['capture_to_final_ms'],
+        })
+        if record['chunks_unsent'] or record['chunks_dropped']:
+            record['error'] = (f"Audio did not reach the server: {record['chunks_unsent']} chunks unsent, "
+                               f"{record['chunks_dropped']} dropped")
+        elif metrics['quiet_timeouts']:
+            record['error'] = f"Gave up waiting for transcripts after {10 * args.linger:.0f}s"
+        elif metrics['chunks_sent'] and not finals:
+            record['error'] = f"No final transcript for {metrics['chunks_sent']} chunks sent"
+        if 'error' in record:
+            log.warning("Failed to transcribe %s: %s", path, record['error'])
+    except Exception as e:
+        log.warning("Failed to transcribe %s: %r", path, e)
+        # str() of e.g. EOFError is empty
+        record['error'] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    record['elapsed_seconds'] = time.monotonic() - start
+    return record
+
+
+async def run_batch(files, args, out):
+    """Transcribe files with at most args.jobs sessions open; returns the failure count."""
+    semaphore = asyncio.Semaphore(args.jobs)
+    failures = 0
+    done = 0
+
+    async def worker(path):
+        async with semaphore:
+            return await transcribe_file(path, args)
+
+    for task in asyncio.as_completed([worker(path) for path in files]):
+        record = await task
+        done += 1
+        failures += 'error' in record
+        # One line per file as it finishes, so an interrupted run keeps its results
+        out.write(json.dumps(record) + '\n')
+        out.flush()
+        log.info("Finished %s (%d/%d)", record['file'], done, len(files),
+                 extra={'fields': {'elapsed_s': round(record['elapsed_seconds'], 2),
+                                   'error': record.get('error')}})
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help="audio files or directories")
+    parser.add_argument('--output', '-o', default='-', help="JSONL output file (default: stdout)")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--server-url', default=SERVER_URL)
+    parser.add_argument('--encoding', default=DEFAULT_CODEC, choices=list(CODECS))
+    parser.add_argument('--jobs', '-j', type=int, default=4, help="concurrent sessions")
+    parser.add_argument('--pacing', default='fast', choices=PACING_MODES)
+    parser.add_argument('--profile', default='balanced', choices=list(STREAMING_PROFILES),
+                        help="streaming profile deciding the chunk size")
+    parser.add_argument('--linger', type=float, default=2.0,
+                        help="seconds to wait for trailing transcripts after the last chunk")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    files = find_audio_files(args.paths)
+    if not files:
+        log.error("No audio files found in %s", ' '.join(args.paths))
+        return 2
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        failures = asyncio.run(run_batch(files, args, out))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Client-side capture delay per streaming profile.
+
+A synthetic microphone delivers frames in real time. For speech onsets at
+arbitrary points we measure how long it takes until the chunk containing the
+onset is handed to the network layer. Server processing time is the same for
+every profile, so this delay is the part of time-to-first-interim that the
+profile controls.
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming_profiles import STREAMING_PROFILES, FrameBatcher, profile_sizes
+
+SAMPLE_RATE = 16000
+DURATION = 6.0
+ONSET_INTERVAL = 0.37  # Deliberately not aligned with any frame size
+
+
+def measure(profile):
+    frame_size, frames_per_send = profile_sizes(profile, SAMPLE_RATE)
+    batcher = FrameBatcher(frames_per_send)
+    frame = bytes(frame_size * 2)
+    sent = []  # (last sample index in chunk, wall time handed to network)
+    samples = 0
+    start = time.perf_counter()
+    while samples < DURATION * SAMPLE_RATE:
+        samples += frame_size
+        # A blocking read returns once the whole frame has been captured
+        delay = start + samples / SAMPLE_RATE - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        chunk = batcher.add(frame)
+        if chunk is not None:
+            sent.append((samples, time.perf_counter()))
+
+    delays = []
+    onset = ONSET_INTERVAL
+    while onset < DURATION:
+        onset_sample = onset * SAMPLE_RATE
+        for last_sample, sent_at in sent:
+            if last_sample >= onset_sample:
+                delays.append((sent_at - (start + onset)) * 1000)
+                break
+        onset += ONSET_INTERVAL
+    return delays
+
+
+if __name__ == '__main__':
+    print(f"{'profile':>12} {'frame':>7} {'send':>6} {'mean ms':>9} {'max ms':>8}")
+    for profile, (frame_ms, send_ms) in STREAMING_PROFILES.items():
+        delays = measure(profile)
+        print(f"{profile:>12} {frame_ms:>5}ms {send_ms:>4}ms "
+              f"{statistics.mean(delays):>9.1f} {max(delays):>8.1f}")
@@ -0,0 +1,155 @@
+"""Samples lost by capture when the reader stalls, blocking reads vs. the ring.
+
+A simulated device delivers 10 ms buffers at 48 kHz in real time from its
+own thread, the way PortAudio calls back. The reader takes 20 ms frames,
+runs them through the AudioPreprocessor and every second stalls for
+``--stall-ms``, as a capture thread does when the GIL is held by a long
+transcript layout or the send queue blocks.
+
+* blocking read: the device buffer holds ``--host-buffers`` periods, as
+  PortAudio's blocking-mode input buffer does; what arrives while it is
+  full is lost (an input overflow);
+* ring: the callback writes into a RingBuffer of RING_SECONDS.
+
+Also reports memory allocated per callback write with tracemalloc.
+
+    python benchmarks/capture_ring_benchmark.py
+    python benchmarks/capture_ring_benchmark.py --stall-ms 500 --seconds 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from audio_capture import RING_SECONDS
+from audio_dsp import AudioPreprocessor
+from ring_buffer import RingBuffer
+
+RATE = 48000
+PERIOD = RATE // 100
+FRAME = RATE // 50
+
+
+class Device(threading.Thread):
+    """Calls deliver(buffer) every 10 ms of audio until stopped."""
+
+    def __init__(self, deliver, seconds):
+        super().__init__(daemon=True)
+        self.deliver = deliver
+        self.periods = int(seconds * 100)
+        rng = np.random.default_rng(0)
+        self.buffers = [(rng.normal(0, 2000, PERIOD)).astype(np.int16).tobytes() for _ in range(10)]
+
+    def run(self):
+        start = time.monotonic()
+        for i in range(self.periods):
+            delay = start + (i + 1) / 100 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.deliver(self.buffers[i % 10])
+
+
+def consume(read_frame, seconds, stall_ms):
+    """Read frames for the duration, stalling once a second; returns samples read."""
+    preprocessor = AudioPreprocessor(RATE)
+    samples = 0
+    next_stall = time.monotonic() + 1.0
+    end = time.monotonic() + seconds + 0.1
+    while time.monotonic() < end:
+        frame = read_frame()
+        if frame is None:
+            continue
+        preprocessor.process(frame)
+        samples += len(frame) // 2
+        if time.monotonic() >= next_stall:
+            time.sleep(stall_ms / 1000)
+            next_stall += 1.0
+    return samples
+
+
+def blocking_read(seconds, stall_ms, host_buffers):
+    host = deque()
+    lock = threading.Condition()
+    lost = [0, 0]  # overflow events, samples
+
+    def deliver(data):
+        with lock:
+            if len(host) >= host_buffers:
+                lost[0] += 1
+                lost[1] += PERIOD
+            else:
+                host.append(data)
+                lock.notify()
+
+    def read_frame():
+        # stream.read(FRAME): wait for two periods
+        with lock:
+            if not lock.wait_for(lambda: len(host) >= 2, timeout=0.1):
+                return None
+            return host.popleft() + host.popleft()
+
+    device = Device(deliver, seconds)
+    device.start()
+    samples = consume(read_frame, seconds, stall_ms)
+    return samples, lost[0], lost[1]
+
+
+def ring_read(seconds, stall_ms):
+    ring = RingBuffer(int(RATE * RING_SECONDS) * 2)
+    frame = memoryview(bytearray(FRAME * 2))
+
+    def read_frame():
+        return frame if ring.read_exactly(frame, RATE * 2, 0.1) else None
+
+    device = Device(ring.write, seconds)
+    device.start()
+    samples = consume(read_frame, seconds, stall_ms)
+    return samples, ring.overflows, ring.dropped_bytes // 2
+
+
+def allocation_per_write(writes=20000):
+    ring = RingBuffer(RATE * 2)
+    frame = memoryview(bytearray(FRAME * 2))
+    data = bytes(PERIOD * 2)
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    for i in range(writes):
+        ring.write(data)
+        if i % 2:
+            ring.read_into(frame)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (current - start) / writes, peak - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=6.0)
+    parser.add_argument('--stall-ms', type=float, default=200)
+    parser.add_argument('--host-buffers', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    produced = int(args.seconds * 100) * PERIOD
+    print(f"{args.seconds:.0f}s at {RATE} Hz, reader stalls {args.stall_ms:.0f} ms every second")
+    print(f"{'capture':>14} {'read':>9} {'lost':>9} {'overflows':>10}")
+    samples, events, lost = blocking_read(args.seconds, args.stall_ms, args.host_buffers)
+    print(f"{'blocking read':>14} {samples:>9} {lost:>9} {events:>10}")
+    samples, events, lost = ring_read(args.seconds, args.stall_ms)
+    print(f"{'ring':>14} {samples:>9} {lost:>9} {events:>10}")
+    per_write, peak = allocation_per_write()
+    print(f"ring write/read: {per_write:.2f} bytes retained per write, {peak} bytes peak")
+    if lost or samples < produced - FRAME:
+        print(f"The ring lost audio: read {samples} of {produced} samples")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
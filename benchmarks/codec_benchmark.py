@@ -0,0 +1,68 @@
+"""Bitrate and CPU cost of each audio_in encoding.
+
+Encodes synthetic speech-like audio with every available codec, then streams
+it through a local stand-in server (started in-process) that decodes it and
+reports what it received.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import socketio
+
+from audio_codec import available_codecs, create_codec
+from standin_server import StandInServer
+
+SAMPLE_RATE = 16000
+SECONDS = 30
+CHUNK_SAMPLES = 1280  # 80 ms, the 'latency' streaming profile
+
+
+def synthetic_speech(seconds):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    # Voiced harmonics with a syllable-rate envelope, plus background noise
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) ** 2
+    signal = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate([140, 280, 420, 700, 1100]))
+    audio = 6000 * envelope * signal + rng.normal(0, 200, len(t))
+    return np.clip(audio, -32768, 32767).astype(np.int16).tobytes()
+
+
+def bench_codec(name, chunks, server_url):
+    codec = create_codec(name, SAMPLE_RATE)
+    start = time.process_time()
+    payloads = [codec.encode(chunk) for chunk in chunks]
+    payloads.append(codec.flush())
+    encode_cpu = time.process_time() - start
+
+    client = socketio.Client()
+    client.connect(f'{server_url}/socket.io/?model_name=benchmark&encoding={name}',
+                   transports=['websocket'])
+    for payload in filter(None, payloads):
+        client.emit('audio_in', payload)
+    stats = client.call('stats', timeout=30)
+    client.disconnect()
+
+    decoded = np.frombuffer(create_codec(name, SAMPLE_RATE).decode(b''.join(payloads)), dtype=np.int16)
+    original = np.frombuffer(b''.join(chunks), dtype=np.int16)
+    # A padded last Opus packet decodes to more samples than were sent
+    decoded = decoded[:len(original)]
+    original = original[:len(decoded)].astype(np.float64)
+    noise = np.mean((original - decoded) ** 2) or 1e-12
+    snr = 10 * np.log10(np.mean(original ** 2) / noise)
+    return stats, encode_cpu, snr
+
+
+if __name__ == '__main__':
+    server_url = StandInServer().start_in_thread()
+    audio = synthetic_speech(SECONDS)
+    step = CHUNK_SAMPLES * 2
+    chunks = [audio[i:i + step] for i in range(0, len(audio), step)]
+    print(f"{'encoding':>9} {'kbit/s':>8} {'encode % core':>14} {'decode % core':>14} {'SNR dB':>8}")
+    for name in available_codecs():
+        stats, encode_cpu, snr = bench_codec(name, chunks, server_url)
+        print(f"{name:>9} {stats['bitrate_kbps']:>8.1f} {100 * encode_cpu / SECONDS:>14.3f} "
+              f"{100 * stats['decode_cpu_seconds'] / SECONDS:>14.3f} {snr:>8.1f}")
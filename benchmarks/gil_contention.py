@@ -0,0 +1,150 @@
+"""Audio stalls caused by GUI work, with audio in the GUI process vs. a worker process.
+
+The GUI thread repeatedly lays out a long transcript with QTextEdit.setHtml,
+which holds the GIL for the whole layout, while a recording streams to a
+stand-in server in its own process. The server measures the time between
+consecutive audio messages; with the 'latency' profile they should arrive
+every 80 ms, and anything much longer is a stall of the client's audio path.
+
+* thread: the app's AudioRecorder and WebSocketThread, in the GUI process;
+* process: the app's AudioProcessThread, capture and streaming in a worker.
+
+Both use a synthetic 48 kHz input. Run with ``QT_QPA_PLATFORM=offscreen``
+on machines without a display.
+
+    python benchmarks/gil_contention.py
+    python benchmarks/gil_contention.py --lines 6000 --seconds 10
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROFILE = 'latency'
+SCRIPT = os.path.join(ROOT, 'benchmarks', 'transcripts.txt')
+
+
+def start_standin():
+    """Start standin_server.py in a subprocess and point the app at it.
+
+    WHISSLE_SERVER_URL is set before the app's modules are imported, since
+    they read it at import time."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'standin_server.py'), '--port', str(port)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            os.environ['WHISSLE_SERVER_URL'] = f'http://127.0.0.1:{port}'
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Stand-in server did not start")
+
+
+def build_html(lines):
+    from tag_formats import TagClassifier
+    classifier = TagClassifier()
+    with open(SCRIPT) as f:
+        script = [line.strip() for line in f if line.strip()]
+    return '<br>'.join(classifier.render(script[i % len(script)])[0] for i in range(lines))
+
+
+def run_mode(mode, app, html, seconds):
+    import app_demo
+    from audio_devices import SyntheticDeviceManager
+    from PyQt6.QtWidgets import QTextEdit
+
+    model_name = f'gil-{mode}'
+    if mode == 'thread':
+        recorder = app_demo.AudioRecorder(PROFILE)
+        recorder.devices = SyntheticDeviceManager()
+        network = app_demo.WebSocketThread()
+        recorder.chunk_ready.connect(network.add_audio_chunk, app_demo.Qt.ConnectionType.DirectConnection)
+        network.connect_to_server(model_name)
+        recorder.start()
+    else:
+        from streaming_engine import SERVER_URL
+        worker = app_demo.AudioProcessThread({
+            'model_name': model_name, 'encoding': 'pcm16', 'server_url': SERVER_URL,
+            'profile': PROFILE, 'device_name': None, 'agc': True, 'vad': False,
+            'synthetic': True,
+        })
+        worker.start()
+
+    edit = QTextEdit()
+    edit.resize(800, 600)
+    layouts = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        edit.setHtml(html)
+        app.processEvents()
+        layouts.append(1000 * (time.perf_counter() - start))
+        # A little idle time between layouts, as between transcript updates
+        time.sleep(0.05)
+
+    if mode == 'thread':
+        recorder.stop()
+        network.stop_sending()
+        network.disconnect_from_server()
+        capture = recorder.capture_metrics()
+    else:
+        worker.stop(5000)
+        capture = worker.metrics.get('capture', {})
+    return model_name, layouts, capture
+
+
+def server_stats(server_url, model_name):
+    import socketio
+    client = socketio.Client()
+    client.connect(f'{server_url}/socket.io/?model_name=stats-query', transports=['websocket'])
+    deadline = time.monotonic() + 5
+    stats = {}
+    while time.monotonic() < deadline and not stats:
+        stats = client.call('stats', {'model_name': model_name}, timeout=5)
+        time.sleep(0.1)
+    client.disconnect()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=6.0)
+    parser.add_argument('--lines', type=int, default=1000, help="transcript lines laid out per setHtml")
+    parser.add_argument('--modes', nargs='+', default=['thread', 'process'])
+    args = parser.parse_args(argv)
+
+    process = start_standin()
+    server_url = os.environ['WHISSLE_SERVER_URL']
+    try:
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+        html = build_html(args.lines)
+        print(f"GUI: setHtml of {args.lines} tagged lines in a loop; audio every 80 ms")
+        print(f"{'audio in':>9} {'layout ms':>10} {'gap p50':>8} {'gap p99':>8} {'gap max':>8} "
+              f"{'chunks':>7} {'lost':>6}")
+        for mode in args.modes:
+            model_name, layouts, capture = run_mode(mode, app, html, args.seconds)
+            stats = server_stats(server_url, model_name)
+            gaps = stats.get('arrival_gap_ms', {})
+            layouts.sort()
+            print(f"{mode:>9} {layouts[len(layouts) // 2]:>10.0f} {gaps.get('p50') or 0:>8.0f} "
+                  f"{gaps.get('p99') or 0:>8.0f} {gaps.get('max') or 0:>8.0f} "
+                  f"{stats.get('chunks', 0):>7} {capture.get('dropped_bytes', 0):>6}")
+    finally:
+        process.kill()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
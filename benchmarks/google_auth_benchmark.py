@@ -0,0 +1,161 @@
+"""GUI stalls from Google sign-in and API calls, on the GUI thread vs. through AuthWorker.
+
+Runs against google_standin.py with ``--delay`` seconds per request, and a
+saved token.pickle whose access token expired an hour ago (the app was
+restarted). The old path is timed as LoginWindow ran it on the GUI thread:
+load the pickle, refresh the token, ``build()`` the service from the bundled
+discovery document and call it, with every API call building its service
+again.
+The new path submits the same calls to an AuthWorker while a 5 ms Qt timer
+measures how long the GUI thread is kept from running.
+
+It then saves a token that expires just after REFRESH_MARGIN and checks
+that the worker refreshes it in the background, so the API call that
+follows does not refresh inline. Needs the packages of requirements.txt.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/google_auth_benchmark.py
+    python benchmarks/google_auth_benchmark.py --delay 0.3
+"""
+import argparse
+import datetime
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QEventLoop, QObject, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+import google_auth
+from google_auth import AuthWorker, GoogleAuthManager
+from google_standin import GoogleStandIn
+
+CALLS = ['sign_in', 'get_calendar_events', 'get_gmail_messages',
+         'get_calendar_events', 'get_gmail_messages']
+
+
+def save_token(standin, url, path, expires_in):
+    from google.oauth2.credentials import Credentials
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+    creds = Credentials(token=standin.issue_token(max(expires_in, 0)), refresh_token='standin-refresh',
+                        token_uri=url + '/token', client_id='standin', client_secret='standin',
+                        scopes=GoogleAuthManager.SCOPES, expiry=expiry)
+    with open(path, 'wb') as token:
+        pickle.dump(creds, token)
+
+
+def blocking_calls(token_path, url):
+    """Milliseconds each call blocked the caller, as on the GUI thread before."""
+    from google.auth.transport.requests import Request
+    from googleapiclient.discovery import build
+
+    def service(api, version, creds):
+        endpoint = url + '/' + google_auth.SERVICE_PATHS.get((api, version), '')
+        return build(api, version, credentials=creds, static_discovery=True,
+                     client_options={'api_endpoint': endpoint})
+
+    timings = []
+    start = time.perf_counter()
+    with open(token_path, 'rb') as token:
+        creds = pickle.load(token)
+    if not creds.valid and creds.refresh_token:
+        creds.refresh(Request())
+    service('oauth2', 'v2', creds).userinfo().get().execute()
+    timings.append(('sign_in', (time.perf_counter() - start) * 1000))
+    for name in CALLS[1:]:
+        start = time.perf_counter()
+        if name == 'get_calendar_events':
+            service('calendar', 'v3', creds).events().list(calendarId='primary', maxResults=10).execute()
+        else:
+            service('gmail', 'v1', creds).users().messages().list(userId='me', maxResults=10).execute()
+        timings.append((name, (time.perf_counter() - start) * 1000))
+    return timings
+
+
+class Results(QObject):
+    finished = pyqtSignal(object, object)
+
+
+def worker_calls(worker):
+    """(name, ms until the result reached the GUI thread) per call, and the
+    longest the GUI thread went without running its 5 ms timer."""
+    results = Results()
+    loop = QEventLoop()
+    timings = []
+    gaps = [0.0]
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        gaps[0] = max(gaps[0], now - last[0])
+        last[0] = now
+
+    heartbeat = QTimer()
+    heartbeat.setTimerType(Qt.TimerType.PreciseTimer)
+    heartbeat.timeout.connect(tick)
+    heartbeat.start(5)
+    for name in CALLS:
+        start = time.perf_counter()
+        worker.submit(name, results.finished.emit)
+        # Returns to the event loop at once; the answer comes back as a signal
+        outcome = []
+        results.finished.connect(lambda result, error: (outcome.append(error), loop.quit()))
+        loop.exec()
+        results.finished.disconnect()
+        if outcome[0] is not None:
+            raise outcome[0]
+        timings.append((name, (time.perf_counter() - start) * 1000))
+    heartbeat.stop()
+    return timings, (gaps[0] - 0.005) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    standin = GoogleStandIn(delay=args.delay)
+    url = standin.start_in_thread()
+    directory = tempfile.mkdtemp()
+    token_path = os.path.join(directory, 'token.pickle')
+
+    save_token(standin, url, token_path, -3600)
+    before = blocking_calls(token_path, url)
+    save_token(standin, url, token_path, -3600)
+    manager = GoogleAuthManager(token_path, url)
+    worker = AuthWorker(manager)
+    after, gui_stall_ms = worker_calls(worker)
+
+    print(f"stand-in round trip {args.delay * 1000:.0f} ms, token expired an hour ago")
+    print(f"{'call':>20} {'GUI blocked (before)':>21} {'result after (worker)':>22}")
+    for (name, blocked), (_, waited) in zip(before, after):
+        print(f"{name:>20} {blocked:>18.0f} ms {waited:>19.0f} ms")
+    print(f"longest GUI stall with the worker: {gui_stall_ms:.1f} ms; "
+          f"services built {len(manager.services)}")
+
+    # A new session with a token just inside the refresh margin
+    worker.close()
+    save_token(standin, url, token_path, google_auth.REFRESH_MARGIN + 1)
+    manager = GoogleAuthManager(token_path, url)
+    worker = AuthWorker(manager)
+    worker.submit('warm_up')
+    refreshes = standin.token_refreshes
+    time.sleep(2.0)
+    background = standin.token_refreshes - refreshes
+    timings, _ = worker_calls(worker)
+    inline = standin.token_refreshes - refreshes - background
+    print(f"restart: sign-in {timings[0][1]:.0f} ms; "
+          f"token refreshed {background}x in the background, {inline}x inline during calls")
+    worker.close()
+    if gui_stall_ms > 50 or background != 1 or inline:
+        print("The worker did not keep the GUI free or the token fresh")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Tag and word queries over a multi-hour session: TranscriptIndex vs. rescanning.
+
+Builds a session of ``--finals`` transcripts (20000 is about five and a half
+hours at one final a second) from benchmarks/transcripts.txt, each with a
+sequence number so the vocabulary keeps growing, and indexes it as the app
+does on every final. Reports the cost of indexing one final, the memory the
+index holds, and the time of typical queries answered by the index and by
+rescanning every text with the TagClassifier, which is what finding them
+took before (with all the texts in RAM, the most favourable case). Fails if
+an index query takes a millisecond or more.
+
+    python benchmarks/index_benchmark.py
+    python benchmarks/index_benchmark.py --finals 100000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tag_formats import REGULAR_KEY, TagClassifier
+from transcript_index import TranscriptIndex
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+QUERIES = ['INTENT_set_alarm', 'EMOTION_ANGRY', 'priya', 'alarm EMOTION_NEUTRAL', 'INTENT_*']
+QUERY_BUDGET_MS = 1.0
+
+
+def session(finals):
+    with open(os.path.join(HERE, 'transcripts.txt')) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    for i in range(finals):
+        words = lines[i % len(lines)].split()
+        yield ' '.join([f"take{i}"] + words)
+
+
+def rescan(classifier, texts, query):
+    """Matches found by classifying every text, as a search without an index would."""
+    terms = query.split()
+    matches = []
+    for index, text in enumerate(texts):
+        found = set()
+        for word, family in classifier.classify(text):
+            found.add(word.lower() if family == REGULAR_KEY else word)
+            if family != REGULAR_KEY:
+                found.add(family + '*')
+        if all(term in found for term in terms):
+            matches.append(index)
+    return matches
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--finals', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    classifier = TagClassifier()
+    texts = list(session(args.finals))
+    index = TranscriptIndex(classifier)
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        index.add(i, index.parse(text))
+    add_us = (time.perf_counter() - start) * 1e6 / len(texts)
+    # Memory is measured on a second build, so tracemalloc does not slow the first
+    tracemalloc.start()
+    rebuilt = TranscriptIndex(classifier)
+    for i, text in enumerate(texts):
+        rebuilt.add(i, rebuilt.parse(text))
+    heap_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del rebuilt
+
+    metrics = index.metrics()
+    print(f"{args.finals} finals: {add_us:.1f} us to parse and index each, "
+          f"{metrics['terms']} terms, {metrics['postings']} postings, {heap_mb:.1f} MB")
+    print(f"emotion counts: {index.counts('EMOTION_')}")
+    print(f"{'query':>24} {'matches':>8} {'index ms':>9} {'rescan ms':>10}")
+    slow = []
+    for query in QUERIES:
+        matches, index_ms = timed(lambda: index.search(query), 20)
+        expected, rescan_ms = timed(lambda: rescan(classifier, texts, query), 1)
+        if matches != expected:
+            print(f"{query}: index and rescan disagree ({len(matches)} vs {len(expected)})")
+            return 1
+        print(f"{query:>24} {len(matches):>8} {index_ms:>9.3f} {rescan_ms:>10.1f}")
+        if index_ms >= QUERY_BUDGET_MS:
+            slow.append(query)
+    _, counts_ms = timed(lambda: index.counts('EMOTION_'), 20)
+    print(f"{'counts EMOTION_':>24} {'':>8} {counts_ms:>9.3f}")
+    if slow:
+        print(f"Index queries over {QUERY_BUDGET_MS} ms: {', '.join(slow)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
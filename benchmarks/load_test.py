@@ -0,0 +1,270 @@
+"""Load test: N simulated clients streaming to a local stand-in server.
+
+Every client is a StreamingSession fed synthetic audio at the chosen
+streaming profile's cadence, in real time or as fast as the socket accepts.
+The stand-in server runs in its own process so the CPU and memory reported
+here are the client side only. It replies with scripted, tagged transcripts
+(benchmarks/transcripts.txt) after a configurable delay and jitter; the
+jitter is seeded, so runs are repeatable.
+
+Reports audio throughput, capture-to-transcript latency percentiles, chunks
+that never reached the server, and client CPU and peak memory. With
+--render, every transcript also goes through the app's render path
+(TagClassifier plus a TranscriptRenderer in an offscreen QTextEdit on the Qt
+main thread) and the time each one waited for the GUI is reported.
+
+    python benchmarks/load_test.py --clients 50 --duration 10
+    QT_QPA_PLATFORM=offscreen python benchmarks/load_test.py --clients 20 --render
+    python benchmarks/load_test.py --server-url http://localhost:5000   # external server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from audio_codec import DEFAULT_CODEC, CODECS
+from batch_transcribe import PACING_MODES, paced_chunks
+from streaming_engine import StreamingSession
+from streaming_profiles import STREAMING_PROFILES, profile_sizes
+from tag_formats import TagClassifier
+
+SAMPLE_RATE = 16000
+MODEL = 'speech-tagger_en_ner-emotion'
+SCRIPT = os.path.join(ROOT, 'benchmarks', 'transcripts.txt')
+
+
+def start_standin(args):
+    """Start standin_server.py in a subprocess; returns (process, url)."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'standin_server.py'), '--port', str(port),
+         '--delay', str(args.delay), '--jitter', str(args.jitter), '--seed', str(args.seed),
+         '--script', SCRIPT],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Stand-in server did not start")
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'count': len(values), 'p50': float(p50), 'p95': float(p95),
+            'p99': float(p99), 'max': float(max(values))}
+
+
+async def run_client(index, pcm, args, server_url, results, on_transcript):
+    # Stagger connects over the first second, like users pressing Start
+    await asyncio.sleep(random.Random(args.seed + index).uniform(0, 1))
+    frame_size, frames_per_send = profile_sizes(args.profile, SAMPLE_RATE)
+    chunk_size = frame_size * frames_per_send
+    session = StreamingSession(MODEL, server_url=server_url, encoding=args.encoding, linger=1.0)
+
+    async def consume():
+        async for transcript in session:
+            key = 'final_ms' if transcript.is_final else 'interim_ms'
+            if transcript.latency_ms is not None:
+                results[key].append(transcript.latency_ms)
+            results['transcripts'] += 1
+            if on_transcript is not None:
+                on_transcript(index, transcript)
+
+    consumer = asyncio.create_task(consume())
+    try:
+        await session.connect()
+        chunks = 0
+        async for chunk in paced_chunks(pcm, chunk_size, args.pacing):
+            await session.send(chunk)
+            chunks += 1
+        await session.wait_for_quiet()
+        server = await session.sio.call('stats', timeout=5) if session.sio.connected else {}
+        results['chunks_produced'] += chunks
+        results['chunks_received'] += server.get('chunks', 0)
+        results['audio_seconds'] += len(pcm) / 2 / SAMPLE_RATE
+        results['replay_dropped_chunks'] += session.replay_buffer.dropped_chunks
+    except Exception as e:
+        results['errors'].append(f"client {index}: {e}")
+    finally:
+        await session.close()
+        await consumer
+
+
+async def run_load(args, server_url, on_transcript=None):
+    # Low-level noise so the mu-law/opus encoders see realistic samples
+    rng = np.random.default_rng(args.seed)
+    pcm = (rng.standard_normal(int(args.duration * SAMPLE_RATE)) * 300).astype(np.int16).tobytes()
+    results = {'interim_ms': [], 'final_ms': [], 'transcripts': 0, 'chunks_produced': 0,
+               'chunks_received': 0, 'audio_seconds': 0.0, 'replay_dropped_chunks': 0,
+               'errors': []}
+    cpu_start = time.process_time()
+    start = time.monotonic()
+    await asyncio.gather(*(run_client(i, pcm, args, server_url, results, on_transcript)
+                           for i in range(args.clients)))
+    wall = time.monotonic() - start
+    cpu = time.process_time() - cpu_start
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    return {
+        'clients': args.clients,
+        'profile': args.profile,
+        'encoding': args.encoding,
+        'pacing': args.pacing,
+        'server_delay_s': args.delay,
+        'server_jitter_s': args.jitter,
+        'wall_seconds': wall,
+        'audio_seconds': results['audio_seconds'],
+        'throughput_x_realtime': results['audio_seconds'] / wall,
+        'chunks_per_second': results['chunks_produced'] / wall,
+        'transcripts_per_second': results['transcripts'] / wall,
+        'capture_to_interim_ms': percentiles(results['interim_ms']),
+        'capture_to_final_ms': percentiles(results['final_ms']),
+        'chunks_dropped': results['chunks_produced'] - results['chunks_received'],
+        'replay_dropped_chunks': results['replay_dropped_chunks'],
+        'client_cpu_seconds': cpu,
+        'client_cpu_percent_of_core': 100 * cpu / wall,
+        'client_peak_rss_mb': peak_rss_mb,
+        'errors': results['errors'],
+    }
+
+
+def run_with_render(args, server_url):
+    """Run the load on a worker thread and render transcripts on the Qt main thread."""
+    from PyQt6.QtCore import QObject, pyqtSignal
+    from PyQt6.QtWidgets import QApplication, QTextEdit
+
+    from transcript_renderer import TranscriptRenderer
+
+    class Bridge(QObject):
+        transcript = pyqtSignal(str, bool, float)
+        finished = pyqtSignal()
+
+    app = QApplication(sys.argv)
+    edit = QTextEdit()
+    edit.resize(800, 600)
+    edit.show()
+    renderer = TranscriptRenderer(edit)
+    classifier = TagClassifier()
+    bridge = Bridge()
+    render_ms = []
+    gui_wait_ms = []
+
+    def render(text, is_final, received_at):
+        start = time.monotonic()
+        gui_wait_ms.append(1000 * (start - received_at))
+        formatted, _ = classifier.render(text)
+        if is_final:
+            renderer.append_final(formatted)
+        else:
+            renderer.set_interim(formatted)
+        render_ms.append(1000 * (time.monotonic() - start))
+
+    bridge.transcript.connect(render)
+    bridge.finished.connect(app.quit)
+    report = {}
+
+    def worker():
+        def on_transcript(index, transcript):
+            bridge.transcript.emit(transcript.text, transcript.is_final, transcript.received_at)
+        report.update(asyncio.run(run_load(args, server_url, on_transcript)))
+        bridge.finished.emit()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    app.exec()
+    thread.join()
+    report['render_ms'] = percentiles(render_ms)
+    report['gui_wait_ms'] = percentiles(gui_wait_ms)
+    return report
+
+
+def print_report(report):
+    def line(name, summary):
+        if summary['p50'] is None:
+            return f"{name:>22}: -"
+        return (f"{name:>22}: p50 {summary['p50']:7.1f}  p95 {summary['p95']:7.1f}  "
+                f"p99 {summary['p99']:7.1f}  max {summary['max']:7.1f} ms  (n={summary['count']})")
+
+    print(f"{report['clients']} clients, profile {report['profile']}, {report['encoding']}, "
+          f"{report['pacing']} pacing, server delay {report['server_delay_s']}s "
+          f"+/- {report['server_jitter_s']}s")
+    print(f"{'throughput':>22}: {report['throughput_x_realtime']:.1f}x real time, "
+          f"{report['chunks_per_second']:.0f} chunks/s, "
+          f"{report['transcripts_per_second']:.0f} transcripts/s")
+    print(line('capture->interim', report['capture_to_interim_ms']))
+    print(line('capture->final', report['capture_to_final_ms']))
+    if 'render_ms' in report:
+        print(line('render', report['render_ms']))
+        print(line('waiting for GUI', report['gui_wait_ms']))
+    print(f"{'dropped chunks':>22}: {report['chunks_dropped']} "
+          f"(replay buffer overflow {report['replay_dropped_chunks']})")
+    print(f"{'client CPU':>22}: {report['client_cpu_seconds']:.2f}s "
+          f"({report['client_cpu_percent_of_core']:.0f}% of one core), "
+          f"peak RSS {report['client_peak_rss_mb']:.0f} MB")
+    for error in report['errors']:
+        print(f"{'error':>22}: {error}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of audio per client")
+    parser.add_argument('--profile', default='latency', choices=list(STREAMING_PROFILES))
+    parser.add_argument('--encoding', default=DEFAULT_CODEC, choices=list(CODECS))
+    parser.add_argument('--pacing', default='realtime', choices=PACING_MODES)
+    parser.add_argument('--delay', type=float, default=0.1, help="server transcript delay (s)")
+    parser.add_argument('--jitter', type=float, default=0.05, help="server delay jitter (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--server-url', default=None,
+                        help="use a running server instead of starting a stand-in")
+    parser.add_argument('--render', action='store_true',
+                        help="also render every transcript in an offscreen QTextEdit")
+    parser.add_argument('--json', default=None, help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    process = None
+    server_url = args.server_url
+    if server_url is None:
+        process, server_url = start_standin(args)
+    try:
+        if args.render:
+            report = run_with_render(args, server_url)
+        else:
+            report = asyncio.run(run_load(args, server_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
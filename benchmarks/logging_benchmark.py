@@ -0,0 +1,71 @@
+"""CPU cost of hot-path logging: the old per-chunk prints vs app_logging.
+
+Simulates a session with the 'latency' streaming profile (12.5 chunks/s)
+and a transcript event every 4 chunks. The old code printed to a
+line-buffered stream, as stdout is when attached to a terminal, so every
+print was a write syscall. CPU time is process time spent on the caller
+side per simulated hour of audio.
+"""
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_logging import SampledLogger, setup_logging
+
+CHUNKS = 20000
+CHUNKS_PER_HOUR = 12.5 * 3600
+
+
+def old_prints(stream):
+    data = {'transcript': 'hello world NER_PERSON EMOTION_NEUTRAL END', 'is_final': False}
+    start = time.process_time()
+    for i in range(CHUNKS):
+        print(f"Recording chunk of size: {1280} bytes", file=stream)
+        print(f"Sending audio chunk of size {1280}", file=stream)
+        if i % 4 == 0:
+            print("=================== TRANSCRIPT RECEIVED ===================", file=stream)
+            print(f"Raw transcript data: {data}", file=stream)
+            print(f"Transcript: {data['transcript']}", file=stream)
+            print(f"Is Final: {data['is_final']}", file=stream)
+            print("======================================================", file=stream)
+            print(f"Updating display - Text: '{data['transcript']}', Is Final: {data['is_final']}", file=stream)
+    return time.process_time() - start
+
+
+def new_logging(level):
+    logger = logging.getLogger('whissle.benchmark')
+    logger.setLevel(level)
+    hot = SampledLogger(logger)
+    start = time.process_time()
+    for i in range(CHUNKS):
+        hot.debug('chunk', "Recorded chunk", bytes=1280)
+        hot.debug('send', "Sending audio chunk", bytes=1280, pcm_bytes=1280)
+        if i % 4 == 0:
+            hot.debug('interim', "Transcript received", is_final=False, latency_ms=120.0, chars=44)
+            hot.debug('interim-ui', "Updating display", is_final=False)
+    return time.process_time() - start
+
+
+def per_hour(seconds):
+    return seconds * CHUNKS_PER_HOUR / CHUNKS
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('WHISSLE_LOG_LEVEL', 'INFO')
+    devnull = open(os.devnull, 'w')
+    sys.stderr = devnull
+    setup_logging()
+    stream = io.TextIOWrapper(open(os.devnull, 'wb', buffering=0), line_buffering=True)
+    results = [
+        ("print() per event (before)", old_prints(stream)),
+        ("app_logging, DEBUG disabled", new_logging(logging.INFO)),
+        ("app_logging, DEBUG sampled 1/100", new_logging(logging.DEBUG)),
+    ]
+    sys.stderr = sys.__stderr__
+    print(f"{'':<34} {'us/chunk':>9} {'CPU s per audio hour':>21}")
+    for name, seconds in results:
+        print(f"{name:<34} {1e6 * seconds / CHUNKS:>9.2f} {per_hour(seconds):>21.3f}")
@@ -0,0 +1,66 @@
+"""Time from a model switch until audio is flowing to the new model.
+
+Compares closing the session and connecting a fresh one (what switching did
+before) with switching between sessions kept warm by SessionPool. Runs
+against a local stand-in server started in-process, so network round trips
+are near zero; against the real service every cold switch also pays for the
+TLS and websocket handshakes.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection_pool import SessionPool
+from standin_server import StandInServer
+from streaming_engine import StreamingSession
+
+MODELS = ['speech-tagger_en_ner-emotion', 'hindi_adapter-ai4bharat']
+SWITCHES = 40
+CHUNK = bytes(2560)  # 80 ms of silence
+
+
+async def cold_switches(server_url):
+    times = []
+    session = None
+    for i in range(SWITCHES):
+        start = time.perf_counter()
+        if session is not None:
+            await session.close()
+        session = StreamingSession(MODELS[i % 2], server_url=server_url)
+        await session.connect()
+        await session.send(CHUNK)
+        times.append(time.perf_counter() - start)
+    await session.close()
+    return times
+
+
+async def warm_switches(server_url):
+    pool = SessionPool(server_url=server_url)
+    await pool.prewarm(MODELS)
+    times = []
+    session = None
+    for i in range(SWITCHES):
+        start = time.perf_counter()
+        if session is not None:
+            pool.release(session)
+        session = pool.acquire(MODELS[i % 2])
+        await pool.ensure_connected(session)
+        await session.send(CHUNK)
+        times.append(time.perf_counter() - start)
+    await pool.close()
+    return times
+
+
+def report(name, times):
+    ms = sorted(1000 * t for t in times)
+    print(f"{name:>6}: median {statistics.median(ms):7.2f} ms   max {ms[-1]:7.2f} ms")
+
+
+if __name__ == '__main__':
+    server_url = StandInServer().start_in_thread()
+    report('cold', asyncio.run(cold_switches(server_url)))
+    report('warm', asyncio.run(warm_switches(server_url)))
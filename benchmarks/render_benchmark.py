@@ -0,0 +1,79 @@
+"""Per-message render cost of the transcript view as the session grows.
+
+Compares the old full ``setHtml`` rebuild against ``TranscriptRenderer``.
+Run with ``QT_QPA_PLATFORM=offscreen`` on machines without a display.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication, QTextEdit
+
+from transcript_renderer import TranscriptRenderer
+
+WORDS_PER_MESSAGE = 12
+INTERIMS_PER_FINAL = 3
+CHECKPOINTS = [1000, 5000, 10000, 20000, 40000]
+SAMPLES = 20
+
+
+def make_message(index):
+    words = []
+    for i in range(WORDS_PER_MESSAGE):
+        if i == 4:
+            words.append('<span style="color: #e91e63; font-weight: bold; font-size: 24px">EMOTION_HAPPY</span> ')
+        else:
+            words.append(f'<span style="color: black; font-size: 20px">word{index}_{i}</span> ')
+    return ''.join(words)
+
+
+def time_call(func):
+    start = time.perf_counter()
+    func()
+    QApplication.processEvents()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_full_rebuild(words):
+    edit = QTextEdit()
+    edit.resize(800, 600)
+    edit.show()
+    final_transcript = ''.join(make_message(i) + '<br>' for i in range(words // WORDS_PER_MESSAGE))
+    interim = make_message(-1)
+    timings = [time_call(lambda: edit.setHtml(final_transcript + '<br>' + interim)) for _ in range(SAMPLES)]
+    edit.close()
+    return sum(timings) / len(timings)
+
+
+def bench_incremental():
+    edit = QTextEdit()
+    edit.resize(800, 600)
+    edit.show()
+    renderer = TranscriptRenderer(edit)
+    results = {}
+    message = 0
+    for checkpoint in CHECKPOINTS:
+        while message * WORDS_PER_MESSAGE < checkpoint:
+            renderer.append_final(make_message(message))
+            message += 1
+        timings = []
+        for i in range(SAMPLES):
+            html = make_message(message)
+            if i % (INTERIMS_PER_FINAL + 1) == INTERIMS_PER_FINAL:
+                timings.append(time_call(lambda: renderer.append_final(html)))
+                message += 1
+            else:
+                timings.append(time_call(lambda: renderer.set_interim(html + str(i))))
+        results[checkpoint] = sum(timings) / len(timings)
+    edit.close()
+    return results
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    incremental = bench_incremental()
+    print(f"{'words':>8} {'setHtml ms/msg':>16} {'incremental ms/msg':>20}")
+    for checkpoint in CHECKPOINTS:
+        print(f"{checkpoint:>8} {bench_full_rebuild(checkpoint):>16.2f} {incremental[checkpoint]:>20.2f}")
@@ -0,0 +1,150 @@
+"""Renders and GUI time for bursty interims, rendered directly vs. through RenderScheduler.
+
+Replays a stream in the Qt event loop: every ``--burst-ms`` a burst of
+``--burst`` interim hypotheses arrives at once, as when the server catches
+up after a network stall, and every second a final. Each update is either
+rendered as it arrives (what ``update_transcript`` did) or handed to a
+RenderScheduler. Reports the number of renders, the GUI thread time spent
+in them, and how long finals waited between arriving and being rendered.
+Fails if the scheduler loses or reorders a final.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/render_scheduler_benchmark.py
+    python benchmarks/render_scheduler_benchmark.py --burst 20 --fps 30
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QApplication, QTextEdit
+
+from render_scheduler import RenderScheduler
+from tag_formats import TagClassifier
+from transcript_renderer import TranscriptRenderer
+
+WORDS = "so I was thinking we could move the meeting to Friday afternoon if that works".split()
+
+
+def stream(seconds, burst, burst_ms):
+    """(time, text, is_final) updates, in arrival order."""
+    updates = []
+    interval = burst_ms / 1000
+    bursts_per_final = max(1, round(1 / interval))
+    for n in range(int(seconds / interval)):
+        t = n * interval
+        utterance = n // bursts_per_final
+        progress = n % bursts_per_final
+        for i in range(burst):
+            words = WORDS[:1 + (progress * burst + i) % len(WORDS)]
+            updates.append((t, f"{utterance} " + ' '.join(words) + " EMOTION_NEUTRAL", False))
+        if progress == bursts_per_final - 1:
+            updates.append((t, f"{utterance} final " + ' '.join(WORDS) + " EMOTION_HAPPY END", True))
+    return updates
+
+
+def run(updates, scheduled, fps):
+    classifier = TagClassifier()
+    edit = QTextEdit()
+    edit.resize(800, 600)
+    edit.show()
+    renderer = TranscriptRenderer(edit, max_blocks=300)
+    for i in range(300):
+        renderer.append_final(classifier.render(f"earlier utterance {i} " + ' '.join(WORDS) + " END")[0])
+    QApplication.processEvents()
+
+    stats = {'renders': 0, 'render_s': 0.0, 'final_waits': []}
+    arrivals = deque()
+    append_finals, set_interim = renderer.append_finals, renderer.set_interim
+
+    def timed_append_finals(htmls):
+        start = time.perf_counter()
+        append_finals(htmls)
+        now = time.perf_counter()
+        stats['render_s'] += now - start
+        for _ in htmls:
+            stats['final_waits'].append(now - arrivals.popleft())
+
+    def timed_set_interim(html):
+        start = time.perf_counter()
+        set_interim(html)
+        stats['render_s'] += time.perf_counter() - start
+
+    renderer.append_finals = timed_append_finals
+    renderer.set_interim = timed_set_interim
+    format = lambda text: classifier.render(text)[0]
+    scheduler = RenderScheduler(renderer, format, fps) if scheduled else None
+
+    pending = deque(updates)
+    start = time.perf_counter()
+    done = []
+
+    def deliver():
+        # Everything due is delivered in one pass, like queued signals
+        now = time.perf_counter() - start
+        while pending and pending[0][0] <= now:
+            _, text, is_final = pending.popleft()
+            if is_final:
+                arrivals.append(time.perf_counter())
+            if scheduler is not None:
+                (scheduler.add_final if is_final else scheduler.set_interim)(text)
+            else:
+                stats['renders'] += 1
+                (renderer.append_final if is_final else renderer.set_interim)(format(text))
+        if not pending and not done:
+            done.append(True)
+            QTimer.singleShot(100, app.quit)
+
+    ticker = QTimer()
+    ticker.setTimerType(Qt.TimerType.PreciseTimer)
+    ticker.timeout.connect(deliver)
+    ticker.start(1)
+    app.exec()
+    ticker.stop()
+    if scheduler is not None:
+        scheduler.flush()
+        stats.update(scheduler.metrics())
+    finals = [line for line in edit.toPlainText().splitlines() if ' final ' in line]
+    edit.close()
+    return stats, finals
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000 if values else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--burst', type=int, default=8)
+    parser.add_argument('--burst-ms', type=float, default=100)
+    parser.add_argument('--fps', type=float, default=60)
+    args = parser.parse_args(argv)
+
+    updates = stream(args.seconds, args.burst, args.burst_ms)
+    expected = [text for _, text, is_final in updates if is_final]
+    print(f"{len(updates)} updates ({len(expected)} finals) over {args.seconds:.0f}s, "
+          f"bursts of {args.burst} interims every {args.burst_ms:.0f} ms")
+    print(f"{'rendering':>10} {'renders':>8} {'skipped':>8} {'GUI ms/s':>9} "
+          f"{'final wait p50':>15} {'p99':>7}")
+    for name, scheduled in (('direct', False), (f'{args.fps:.0f} fps', True)):
+        stats, finals = run(updates, scheduled, args.fps)
+        skipped = stats.get('renders_skipped', 0)
+        waits = stats['final_waits']
+        print(f"{name:>10} {stats['renders']:>8} {skipped:>8} "
+              f"{stats['render_s'] * 1000 / args.seconds:>9.1f} "
+              f"{percentile(waits, 50):>12.1f} ms {percentile(waits, 99):>4.1f} ms")
+        if len(finals) != len(expected) or any(
+                not line.startswith(text.split(' EMOTION_')[0]) for line, text in zip(finals, expected)):
+            print(f"{name}: finals lost or out of order ({len(finals)} of {len(expected)})")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    sys.exit(main())
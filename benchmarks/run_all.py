@@ -0,0 +1,55 @@
+"""Run every benchmark offline, one after another, and report failures.
+
+Each benchmark runs in its own process with ``QT_QPA_PLATFORM=offscreen``,
+so the suite works on headless CI machines. Exits non-zero if any
+benchmark fails.
+
+    python benchmarks/run_all.py
+    python benchmarks/run_all.py load_test render_benchmark   # a subset
+"""
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (script, extra arguments); the load test is sized to finish in seconds
+BENCHMARKS = [
+    ('render_benchmark', []),
+    ('render_scheduler_benchmark', []),
+    ('capture_latency', []),
+    ('codec_benchmark', []),
+    ('dsp_benchmark', []),
+    ('capture_ring_benchmark', []),
+    ('gil_contention', []),
+    ('logging_benchmark', []),
+    ('model_switch_benchmark', []),
+    ('transcript_memory', []),
+    ('index_benchmark', []),
+    ('google_auth_benchmark', []),
+    ('startup_benchmark', []),
+    ('load_test', ['--clients', '50', '--duration', '5']),
+]
+
+
+def main(selected):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    failed = []
+    for name, extra in BENCHMARKS:
+        if selected and name not in selected:
+            continue
+        print(f"=== {name} ===", flush=True)
+        start = time.monotonic()
+        result = subprocess.run([sys.executable, os.path.join(HERE, name + '.py')] + extra, env=env)
+        print(f"--- {name}: {'ok' if result.returncode == 0 else 'FAILED'} "
+              f"in {time.monotonic() - start:.1f}s\n", flush=True)
+        if result.returncode != 0:
+            failed.append(name)
+    if failed:
+        print("Failed: " + ', '.join(failed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
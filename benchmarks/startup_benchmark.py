@@ -0,0 +1,79 @@
+"""Import time and time-to-window of the app, with a regression budget.
+
+Each run starts a fresh interpreter, imports app_demo, builds and shows the
+main window and processes events once. Times are measured from the first
+line of the child script, so interpreter start-up is not included. The
+benchmark fails if the median time-to-window is over the budget, or if a
+module that should only load on first use was imported on the way to the
+window. Run with ``QT_QPA_PLATFORM=offscreen`` on machines without a display.
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --budget-ms 500 --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time-to-window budget on a recent laptop; CI can pass a looser one
+STARTUP_BUDGET_MS = 300
+# Must not be imported before the user presses Start
+LAZY_MODULES = ['pyaudio', 'numpy', 'socketio', 'engineio', 'aiohttp', 'speech_recognition',
+                'connection_pool', 'streaming_engine', 'vad', 'googleapiclient', 'capture_worker']
+
+CHILD = r'''
+import time
+start = time.perf_counter()
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import app_demo
+imported = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+window = app_demo.TranscriptionApp()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({
+    'import_ms': 1000 * (imported - start),
+    'window_ms': 1000 * (shown - start),
+    'loaded': [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+}))
+'''
+
+
+def run_once():
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    result = subprocess.run([sys.executable, '-c', CHILD, ROOT, json.dumps(LAZY_MODULES)],
+                            env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(run['import_ms'] for run in runs)
+    window_ms = statistics.median(run['window_ms'] for run in runs)
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    print(f"import app_demo: {import_ms:.0f} ms (median of {args.runs})")
+    print(f"time to window:  {window_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if loaded:
+        print("Loaded before first use: " + ', '.join(loaded))
+        failed = True
+    if window_ms > args.budget_ms:
+        print("Over the start-up budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Memory held by the transcript as an all-day session grows.
+
+Compares the old approach (every final appended to one HTML string and one
+unbounded QTextEdit document) with TranscriptStore plus
+WindowedTranscriptRenderer. Python heap is measured with tracemalloc; the
+document size is its character count. Run with ``QT_QPA_PLATFORM=offscreen``
+on machines without a display.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication, QTextEdit
+
+from tag_formats import TagClassifier
+from transcript_renderer import TranscriptRenderer, WindowedTranscriptRenderer
+from transcript_store import TranscriptStore
+
+CHECKPOINTS = [1000, 5000, 20000]
+
+
+def utterance(i):
+    return f"this is utterance number {i} of a long meeting NER_PERSON EMOTION_NEUTRAL END"
+
+
+def run(windowed):
+    classifier = TagClassifier()
+    edit = QTextEdit()
+    edit.resize(800, 600)
+    edit.show()
+    if windowed:
+        store = TranscriptStore(tempfile.mkdtemp(), keep=False)
+        renderer = WindowedTranscriptRenderer(edit, store, lambda text: classifier.render(text)[0])
+    else:
+        final_transcript = ''
+        renderer = TranscriptRenderer(edit)
+    tracemalloc.start()
+    results = []
+    start = time.perf_counter()
+    for i in range(CHECKPOINTS[-1]):
+        text = utterance(i)
+        html, _ = classifier.render(text)
+        if windowed:
+            store.append(text, 'benchmark')
+        else:
+            final_transcript += html + '<br>'
+        renderer.append_final(html)
+        if i + 1 in CHECKPOINTS:
+            QApplication.processEvents()
+            heap = tracemalloc.get_traced_memory()[0]
+            results.append((i + 1, heap / 1e6, edit.document().characterCount() / 1e6,
+                            1000 * (time.perf_counter() - start) / (i + 1)))
+    tracemalloc.stop()
+    if windowed:
+        store.close()
+    edit.close()
+    return results
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    print(f"{'':>10} {'finals':>8} {'python heap MB':>15} {'document Mchars':>16} {'ms/final':>9}")
+    for name, windowed in (('unbounded', False), ('windowed', True)):
+        for finals, heap_mb, chars, ms in run(windowed):
+            print(f"{name:>10} {finals:>8} {heap_mb:>15.2f} {chars:>16.2f} {ms:>9.2f}")
@@ -0,0 +1,240 @@
+"""Capture and streaming in a worker process, away from the GUI's GIL.
+
+In the default mode the capture thread and the network thread share the GUI
+process, and with it the GIL: while the GUI thread builds transcript HTML or
+lays out the document, neither of them runs. With "Run audio in a separate
+process" (or ``WHISSLE_AUDIO_PROCESS=1``), the microphone and the Socket.IO
+session live in a worker process started with ``AudioProcess``:
+
+* the PortAudio callback writes into a RingBuffer laid over a
+  ``multiprocessing.shared_memory`` block that the GUI process creates, so
+  the GUI can read the capture counters straight from the ring header;
+* a capture thread in the worker takes frames out of the ring, preprocesses
+  and batches them and queues them for the worker's StreamingSession;
+* transcripts, status messages and a metrics snapshot once a second come
+  back over a ``multiprocessing`` pipe as small tuples, and commands
+  (``stop``, ``agc``) go the other way.
+
+The worker is started with the ``spawn`` method, so it never inherits Qt
+state, and it stops by itself if the GUI process goes away.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+from audio_capture import RING_SECONDS
+from ring_buffer import RingBuffer
+
+# Room for RING_SECONDS at up to 48 kHz; the worker opens the device at its own rate
+RING_CAPACITY = int(48000 * RING_SECONDS) * 2
+METRICS_INTERVAL = 1.0
+
+log = logging.getLogger('whissle.worker')
+
+
+class AudioProcess:
+    """GUI-side handle of one worker process; one per recording.
+
+    ``config`` is a dict with model_name, encoding, server_url, profile,
+    device_name, agc and vad, plus synthetic=True to use a generated input.
+    Events read with ``recv()`` are tuples:
+    ('status', message), ('connected',), ('transcript', text, is_final),
+    ('metrics', dict), ('error', message) and finally ('finished', metrics).
+    """
+
+    def __init__(self, config):
+        context = multiprocessing.get_context('spawn')
+        self.shm = shared_memory.SharedMemory(create=True, size=RingBuffer.size_for(RING_CAPACITY))
+        self.ring = RingBuffer(RING_CAPACITY, self.shm.buf)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, name='whissle-audio', daemon=True,
+                                       args=(child_conn, self.shm.name, RING_CAPACITY, config))
+
+    def start(self):
+        self.process.start()
+
+    def send(self, *command):
+        try:
+            self.conn.send(command)
+        except (OSError, ValueError):
+            pass
+
+    def recv(self, timeout):
+        """The next event, or None if none arrived within timeout seconds."""
+        if not self.conn.poll(timeout):
+            return None
+        return self.conn.recv()
+
+    def stop(self):
+        """Ask the worker to stop; it sends ('finished', ...) once the trailing
+        transcripts are in."""
+        self.send('stop')
+
+    def close(self, timeout=2.0):
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+        self.ring.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def worker_main(conn, shm_name, capacity, config):
+    from app_logging import setup_logging
+    setup_logging()
+    # Spawned workers share the GUI process's resource tracker, so the block
+    # is unlinked once, by AudioProcess.close()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = RingBuffer(capacity, shm.buf)
+    worker = Worker(conn, ring, config)
+    try:
+        asyncio.run(worker.run())
+    except Exception as e:
+        log.exception("Audio worker failed")
+        worker.send('error', str(e))
+    finally:
+        worker.send('finished', worker.metrics())
+        ring.release()
+        shm.close()
+        conn.close()
+
+
+class Worker:
+    """Runs in the worker process: capture thread, command thread, session."""
+
+    def __init__(self, conn, ring, config):
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.ring = ring
+        self.config = config
+        self.stopping = threading.Event()
+        self.capture = None
+        self.session = None
+        self.audio_queue = None
+
+    def send(self, *event):
+        # Sent from the event loop and the capture thread
+        with self.send_lock:
+            try:
+                self.conn.send(event)
+            except (OSError, ValueError):
+                self.stopping.set()
+
+    def read_commands(self):
+        while not self.stopping.is_set():
+            try:
+                command = self.conn.recv()
+            except (EOFError, OSError):
+                # The GUI process is gone
+                command = ('stop',)
+            if command[0] == 'stop':
+                self.stopping.set()
+            elif command[0] == 'agc' and self.capture is not None:
+                self.capture.preprocessor.agc.enabled = command[1]
+
+    async def run(self):
+        from audio_capture import CaptureStream
+        from audio_devices import AudioDeviceManager, SyntheticDeviceManager
+        from audio_queue import AudioSendQueue
+        from streaming_engine import StreamingSession, iter_audio_queue
+        from streaming_profiles import profile_sizes
+
+        config = self.config
+        started_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        self.audio_queue = AudioSendQueue(config.get('queue_size', 50), config.get('queue_policy', 'coalesce'))
+        devices = SyntheticDeviceManager() if config.get('synthetic') else AudioDeviceManager()
+        frame_size, frames_per_send = profile_sizes(config['profile'], 16000)
+        self.capture = CaptureStream(devices, config.get('device_name'), frame_size,
+                                     agc=config.get('agc', True), ring=self.ring)
+        threading.Thread(target=self.read_commands, name='commands', daemon=True).start()
+        capture_thread = threading.Thread(target=self.capture_loop, name='capture',
+                                          args=(frames_per_send,), daemon=True)
+        capture_thread.start()
+
+        def on_status(message):
+            self.send('status', message)
+
+        self.session = StreamingSession(config['model_name'], server_url=config['server_url'],
+                                        encoding=config['encoding'], linger=0.5, on_status=on_status)
+        self.session.begin_stream(started_at)
+        # Audio captured while connecting is held by the session and replayed
+        connecting = self.session.start_connect()
+        connecting.add_done_callback(self.on_connect_done)
+        self.session.start_streaming(iter_audio_queue(self.audio_queue))
+        metrics_task = loop.create_task(self.report_metrics())
+        try:
+            async for transcript in self.session:
+                self.send('transcript', transcript.text, transcript.is_final)
+        finally:
+            metrics_task.cancel()
+            self.stopping.set()
+            await asyncio.to_thread(capture_thread.join)
+            devices.close()
+
+    def on_connect_done(self, task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.send('error', f"Connection error: {task.exception()}")
+            self.stopping.set()
+        else:
+            self.send('connected')
+
+    def capture_loop(self, frames_per_send):
+        from streaming_profiles import FrameBatcher
+        vad = None
+        if self.config.get('vad'):
+            from vad import VoiceActivityDetector
+            vad = VoiceActivityDetector(16000)
+        batcher = FrameBatcher(frames_per_send)
+
+        def queue(chunk):
+            # Classified at its level before the AGC, which lifts background noise
+            voiced_chunks = [chunk] if vad is None else vad.process(chunk, self.capture.preprocessor.gain_db)
+            for voiced in voiced_chunks:
+                self.audio_queue.put(voiced)
+
+        try:
+            while not self.stopping.is_set():
+                data = self.capture.read()
+                if data is None:
+                    continue
+                chunk = batcher.add(data)
+                if chunk is not None:
+                    queue(chunk)
+            self.capture.close()
+            for data in self.capture.drain():
+                chunk = batcher.add(data)
+                if chunk is not None:
+                    queue(chunk)
+            chunk = batcher.flush()
+            if chunk is not None:
+                queue(chunk)
+        except Exception as e:
+            log.exception("Capture failed")
+            self.send('error', str(e))
+        finally:
+            # Ends the session's stream once the queue has drained
+            self.audio_queue.close()
+
+    async def report_metrics(self):
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            self.send('metrics', self.metrics())
+
+    def metrics(self):
+        """Session, send queue and capture metrics in one dict"""
+        metrics = {}
+        if self.session is not None:
+            metrics.update(self.session.metrics())
+        if self.audio_queue is not None:
+            metrics.update(self.audio_queue.metrics())
+        if self.capture is not None:
+            metrics['capture'] = self.capture.metrics()
+        return metrics
@@ -0,0 +1,190 @@
+"""Warm StreamingSessions for recently used models.
+
+Switching models used to tear down the socket and redo the TLS and websocket
+handshakes. The pool keeps the sessions of the most recently used
+(model, encoding) pairs connected, so switching back to one only redirects
+the next audio chunk. Idle sessions are health-checked and closed after
+``idle_timeout`` seconds, and the least recently used one is closed when
+more than ``max_sessions`` are open.
+
+Runs on one asyncio event loop; all methods must be called from it.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from audio_codec import DEFAULT_CODEC
+from streaming_engine import SERVER_URL, StreamingSession
+
+POOL_SIZE = int(os.environ.get('WHISSLE_POOL_SIZE', '4'))
+POOL_IDLE_SECONDS = float(os.environ.get('WHISSLE_POOL_IDLE_SECONDS', '300'))
+HEALTH_CHECK_INTERVAL = 5.0
+
+log = logging.getLogger('whissle.pool')
+
+
+class SessionPool:
+    """Connected sessions keyed by (model_name, encoding).
+
+    ``on_transcript(session, transcript)`` and ``on_status(session, message)``
+    are called for every pooled session; callers filter on the session they
+    are currently streaming to. ``on_discard(session)`` is called when the
+    pool closes a session, so callers can drop references to it.
+    """
+
+    def __init__(self, server_url=SERVER_URL, max_sessions=POOL_SIZE,
+                 idle_timeout=POOL_IDLE_SECONDS, on_transcript=None, on_status=None,
+                 on_discard=None, **session_kwargs):
+        self.server_url = server_url
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.on_transcript = on_transcript
+        self.on_status = on_status
+        self.on_discard = on_discard
+        self.session_kwargs = session_kwargs
+        self.sessions = {}
+        self.in_use = set()
+        self.last_used = {}
+        self.pumps = {}
+        self.maintenance_task = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, model_name, encoding=DEFAULT_CODEC):
+        """Return the session for a model, creating it if needed.
+
+        A new session is returned before it has connected; audio sent to it
+        meanwhile is buffered and replayed once the connection is up. Await
+        ``ensure_connected()`` to find out whether connecting worked.
+        """
+        key = (model_name, encoding)
+        session = self.sessions.get(key)
+        if session is not None and not self.healthy(session):
+            log.info("Discarding unhealthy session for %s", model_name)
+            self._discard(key)
+            session = None
+        if session is None:
+            self.misses += 1
+            self._evict_for_new()
+            session = self._create(model_name, encoding)
+        else:
+            self.hits += 1
+        self.in_use.add(key)
+        self.last_used[key] = time.monotonic()
+        if self.maintenance_task is None:
+            self.maintenance_task = asyncio.create_task(self._maintain())
+        return session
+
+    def release(self, session):
+        """Stop streaming to a session but keep it warm for later reuse."""
+        key = (session.model_name, session.encoding)
+        self.in_use.discard(key)
+        self.last_used[key] = time.monotonic()
+
+    async def ensure_connected(self, session):
+        """Connect a session returned by acquire() if it isn't already."""
+        if session.connected.is_set():
+            return
+        try:
+            await asyncio.shield(session.start_connect())
+        except Exception:
+            # Let the next acquire() start over with a fresh session
+            self._discard((session.model_name, session.encoding))
+            raise
+
+    async def prewarm(self, model_names, encoding=DEFAULT_CODEC):
+        """Connect sessions for models that are likely to be picked next."""
+        for model_name in model_names:
+            session = self.acquire(model_name, encoding)
+            self.release(session)
+            try:
+                await self.ensure_connected(session)
+            except Exception as e:
+                log.warning("Could not prewarm %s: %s", model_name, e)
+
+    def healthy(self, session):
+        # Connected, connecting for the first time, or reconnecting on its own
+        if session.closing:
+            return False
+        if session.connected.is_set():
+            return True
+        for task in (session.connect_task, session.reconnect_task):
+            if task is not None and not task.done():
+                return True
+        return session.connect_task is None
+
+    def _create(self, model_name, encoding):
+        session = StreamingSession(
+            model_name, server_url=self.server_url, encoding=encoding,
+            on_status=lambda message: self._status(session, message),
+            **self.session_kwargs)
+        key = (model_name, encoding)
+        self.sessions[key] = session
+        self.pumps[key] = asyncio.create_task(self._pump(session))
+        return session
+
+    async def _pump(self, session):
+        async for transcript in session:
+            if self.on_transcript is not None:
+                self.on_transcript(session, transcript)
+
+    def _status(self, session, message):
+        if self.on_status is not None:
+            self.on_status(session, message)
+
+    def _evict_for_new(self):
+        idle = sorted((key for key in self.sessions if key not in self.in_use),
+                      key=lambda key: self.last_used.get(key, 0))
+        while idle and len(self.sessions) >= self.max_sessions:
+            key = idle.pop(0)
+            log.info("Evicting least recently used session for %s", key[0])
+            self._discard(key)
+
+    def _discard(self, key):
+        session = self.sessions.pop(key, None)
+        self.in_use.discard(key)
+        self.last_used.pop(key, None)
+        self.pumps.pop(key, None)
+        if session is not None:
+            self.evictions += 1
+            asyncio.create_task(session.close())
+            if self.on_discard is not None:
+                self.on_discard(session)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            now = time.monotonic()
+            for key, session in list(self.sessions.items()):
+                if key in self.in_use:
+                    continue
+                if now - self.last_used.get(key, now) > self.idle_timeout:
+                    log.info("Closing session for %s after %.0fs idle", key[0], self.idle_timeout)
+                    self._discard(key)
+                elif not self.healthy(session):
+                    log.info("Closing unhealthy idle session for %s", key[0])
+                    self._discard(key)
+
+    async def close(self):
+        """Close every pooled session."""
+        if self.maintenance_task is not None:
+            self.maintenance_task.cancel()
+            self.maintenance_task = None
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        self.in_use.clear()
+        self.last_used.clear()
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+        await asyncio.gather(*self.pumps.values(), return_exceptions=True)
+        self.pumps.clear()
+
+    def metrics(self):
+        return {
+            'pool_sessions': len(self.sessions),
+            'pool_connected': sum(s.connected.is_set() for s in self.sessions.values()),
+            'pool_hits': self.hits,
+            'pool_misses': self.misses,
+            'pool_evictions': self.evictions,
+        }
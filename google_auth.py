@@ -1,12 +1,45 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-import os.path
-import pickle
+"""Google sign-in and the Google APIs the app uses.
+
+``GoogleAuthManager`` holds the user's credentials and calls Google, which
+blocks on the network. The GUI goes through an ``AuthWorker`` instead. The
+worker runs the manager's calls one at a time on a background thread and
+hands each result to a callback. Between calls, it refreshes the access
+token ``REFRESH_MARGIN`` seconds before it expires, so neither sign-in nor
+an API call waits for a refresh, and no sooner than ``MIN_REFRESH_INTERVAL``
+after the last one.
+
+Service objects are built once per API, from the discovery documents
+bundled with google-api-python-client, and reused, so the documents are
+not parsed again on every call. The google libraries are imported on first
+use.
+
+Environment:
+    WHISSLE_GOOGLE_API_ROOT    send API requests here instead of Google, e.g. to
+                               a local stand-in (see google_standin.py)
+"""
 import datetime
-import sys
+import logging
 import os
+import pickle
+import queue
+import sys
+import threading
+import time
+
+API_ROOT = os.environ.get('WHISSLE_GOOGLE_API_ROOT')
+# servicePath of the bundled documents that have one, for API_ROOT
+SERVICE_PATHS = {('calendar', 'v3'): 'calendar/v3/'}
+# Ahead of google-auth's own refresh threshold (3m45s), which would refresh
+# inline during a call
+REFRESH_MARGIN = 300
+# Wait before retrying a failed background refresh
+REFRESH_RETRY = 30
+# Least time between background refreshes, for tokens that live no longer
+# than REFRESH_MARGIN and so are due as soon as they are issued
+MIN_REFRESH_INTERVAL = 60
+
+log = logging.getLogger('whissle.google')
+
 
 class GoogleAuthManager:
     # If modifying scopes, delete the token.pickle file
@@ -17,77 +50,146 @@ class GoogleAuthManager:
         'https://www.googleapis.com/auth/userinfo.email'
     ]
 
-    def __init__(self):
+    def __init__(self, token_path='token.pickle', api_root=API_ROOT):
         self.creds = None
-        self.token_path = 'token.pickle'
-        
+        self.token_path = token_path
+        self.api_root = api_root
+        # (api, version) -> service object built for self.creds
+        self.services = {}
+        self.request = None
+        self.refreshes = 0
+
         # Handle bundled resources in the app
         if getattr(sys, 'frozen', False):
             # Running in a bundle
             bundle_dir = os.path.dirname(sys.executable)
             self.credentials_path = os.path.join(
-                bundle_dir, 
+                bundle_dir,
                 '../Resources/google_client_secret.json'
             )
         else:
             # Running in development
             self.credentials_path = 'google_client_secret.json'
 
+    def set_credentials(self, creds):
+        if creds is not self.creds:
+            # Services hold the credentials they were built with
+            self.services.clear()
+            self.creds = creds
+
+    def save_credentials(self):
+        with open(self.token_path, 'wb') as token:
+            pickle.dump(self.creds, token)
+
+    def load_credentials(self):
+        """Saved credentials, refreshed if they are due; None if signing in
+        needs the browser."""
+        if self.creds is None and os.path.exists(self.token_path):
+            with open(self.token_path, 'rb') as token:
+                self.set_credentials(pickle.load(token))
+        if self.refresh_due_in() == 0:
+            self.refresh()
+        return self.creds if self.creds is not None and self.creds.valid else None
+
     def get_credentials(self):
         """Gets valid user credentials from storage or initiates OAuth2 flow."""
         try:
-            if os.path.exists(self.token_path):
-                with open(self.token_path, 'rb') as token:
-                    self.creds = pickle.load(token)
-
-            if not self.creds or not self.creds.valid:
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    self.creds.refresh(Request())
-                else:
-                    if not os.path.exists(self.credentials_path):
-                        raise FileNotFoundError(
-                            f"Credentials file not found at: {self.credentials_path}"
-                        )
-                    
-                    # Configure the OAuth flow for desktop application
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        self.credentials_path, 
-                        self.SCOPES,
-                        redirect_uri='http://localhost:0'  # Use dynamic port
-                    )
-                    
-                    # Run local server with specific configurations
-                    self.creds = flow.run_local_server(
-                        port=0,  # Let the OS pick an available port
-                        prompt='consent',  # Force consent screen
-                        authorization_prompt_message="Please authorize in your browser",
-                        success_message="Authorization successful! You can close this window.",
-                        open_browser=True
+            if self.load_credentials() is None:
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                if not os.path.exists(self.credentials_path):
+                    raise FileNotFoundError(
+                        f"Credentials file not found at: {self.credentials_path}"
                     )
-                
+
+                # Configure the OAuth flow for desktop application
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    self.credentials_path,
+                    self.SCOPES,
+                    redirect_uri='http://localhost:0'  # Use dynamic port
+                )
+
+                # Run local server with specific configurations
+                self.set_credentials(flow.run_local_server(
+                    port=0,  # Let the OS pick an available port
+                    prompt='consent',  # Force consent screen
+                    authorization_prompt_message="Please authorize in your browser",
+                    success_message="Authorization successful! You can close this window.",
+                    open_browser=True
+                ))
+
                 # Save the credentials for the next run
-                with open(self.token_path, 'wb') as token:
-                    pickle.dump(self.creds, token)
+                self.save_credentials()
 
             return self.creds
-            
+
         except Exception as e:
-            print(f"Error in get_credentials: {str(e)}")
+            log.error("Error in get_credentials: %s", e)
             if "invalid_client" in str(e):
-                print("Invalid client error - check OAuth configuration")
+                log.error("Invalid client error - check OAuth configuration")
             elif "invalid_request" in str(e):
-                print("Invalid request error - check redirect URIs")
+                log.error("Invalid request error - check redirect URIs")
             raise
 
+    def refresh_due_in(self):
+        """Seconds until the access token should be refreshed; 0 if it is due
+        now, None if it cannot be refreshed or never expires."""
+        creds = self.creds
+        if creds is None or not creds.refresh_token:
+            return None
+        if creds.expiry is None:
+            return None if creds.token else 0
+        # google-auth keeps expiry as naive UTC
+        remaining = (creds.expiry - datetime.datetime.utcnow()).total_seconds()
+        return max(0.0, remaining - REFRESH_MARGIN)
+
+    def refresh(self):
+        """Get a new access token and save it."""
+        if self.request is None:
+            from google.auth.transport.requests import Request
+            # One session, so refreshes reuse its connection
+            self.request = Request()
+        self.creds.refresh(self.request)
+        self.refreshes += 1
+        self.save_credentials()
+
+    def service(self, api, version):
+        """Service object for an API, built on first use."""
+        service = self.services.get((api, version))
+        if service is None:
+            from googleapiclient.discovery import build
+            options = None
+            if self.api_root is not None:
+                path = SERVICE_PATHS.get((api, version), '')
+                options = {'api_endpoint': self.api_root.rstrip('/') + '/' + path}
+            service = build(api, version, credentials=self.creds, static_discovery=True,
+                            client_options=options)
+            self.services[(api, version)] = service
+        return service
+
+    def warm_up(self):
+        """Load saved credentials and build the userinfo service, so that
+        signing in is a single request; never opens the browser."""
+        if self.load_credentials() is not None:
+            self.service('oauth2', 'v2')
+        else:
+            # The OAuth flow comes first; importing the client is still most
+            # of what building a service costs
+            import googleapiclient.discovery
+
+    def sign_in(self):
+        """Credentials and user info, running the OAuth flow if needed."""
+        creds = self.get_credentials()
+        return creds, self.get_user_info()
+
     def get_user_info(self):
         """Get user profile information."""
-        service = build('oauth2', 'v2', credentials=self.creds)
+        service = self.service('oauth2', 'v2')
         user_info = service.userinfo().get().execute()
         return user_info
 
     def get_calendar_events(self):
         """Get upcoming calendar events."""
-        service = build('calendar', 'v3', credentials=self.creds)
+        service = self.service('calendar', 'v3')
         now = datetime.datetime.utcnow().isoformat() + 'Z'
         events_result = service.events().list(
             calendarId='primary',
@@ -100,9 +202,93 @@ class GoogleAuthManager:
 
     def get_gmail_messages(self):
         """Get recent Gmail messages."""
-        service = build('gmail', 'v1', credentials=self.creds)
+        service = self.service('gmail', 'v1')
         results = service.users().messages().list(
             userId='me',
             maxResults=10
         ).execute()
-        return results.get('messages', []) 
\ No newline at end of file
+        return results.get('messages', [])
+
+    def metrics(self):
+        return {
+            'refreshes': self.refreshes,
+            'services': len(self.services),
+            'refresh_due_in_s': self.refresh_due_in(),
+        }
+
+
+class AuthWorker:
+    """Runs GoogleAuthManager calls one at a time on a background thread.
+
+    ``submit('get_calendar_events', callback)`` queues
+    ``manager.get_calendar_events()`` and returns at once; callback(result,
+    error) is then called on the worker thread, so a Qt window passes a
+    signal's ``emit``. While idle, the worker refreshes the access token
+    when ``manager.refresh_due_in()`` says it is due, at most once every
+    ``MIN_REFRESH_INTERVAL`` seconds.
+    """
+
+    def __init__(self, manager=None):
+        self.manager = manager if manager is not None else GoogleAuthManager()
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+        # No background refresh before this monotonic time
+        self.refresh_not_before = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.background_refreshes = 0
+
+    def submit(self, name, callback=None, *args):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='google-auth', daemon=True)
+                self.thread.start()
+        self.queue.put((name, args, callback))
+
+    def _refresh_timeout(self):
+        due = self.manager.refresh_due_in()
+        if due is None:
+            return None
+        return max(due, self.refresh_not_before - time.monotonic(), 0.0)
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self._refresh_timeout())
+            except queue.Empty:
+                self._refresh()
+                continue
+            if item is None:
+                break
+            name, args, callback = item
+            result = error = None
+            try:
+                result = getattr(self.manager, name)(*args)
+            except Exception as e:
+                log.warning("Google call %s failed: %s", name, e)
+                self.errors += 1
+                error = e
+            self.calls += 1
+            if callback is not None:
+                callback(result, error)
+
+    def _refresh(self):
+        try:
+            self.manager.refresh()
+        except Exception as e:
+            log.warning("Background token refresh failed, retrying in %ds: %s", REFRESH_RETRY, e)
+            self.refresh_not_before = time.monotonic() + REFRESH_RETRY
+        else:
+            self.refresh_not_before = time.monotonic() + MIN_REFRESH_INTERVAL
+            self.background_refreshes += 1
+            log.info("Refreshed the Google access token ahead of expiry")
+
+    def close(self, timeout=2.0):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def metrics(self):
+        return dict(self.manager.metrics(), calls=self.calls, errors=self.errors,
+                    background_refreshes=self.background_refreshes)
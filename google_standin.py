@@ -0,0 +1,125 @@
+"""Local stand-in for the Google endpoints the login window uses.
+
+Serves the OAuth token endpoint and the three API calls of
+GoogleAuthManager (userinfo, calendar events, Gmail messages), each answer
+held back by ``delay`` seconds to stand for the round trip to Google.
+Access tokens it issues expire after ``expires_in`` seconds, and API calls
+with an unknown or expired token get a 401, so refresh behaviour can be
+tested without a Google account.
+
+    python google_standin.py --port 5001 --delay 0.1
+    WHISSLE_GOOGLE_API_ROOT=http://127.0.0.1:5001 ...
+
+GET /stats returns the request counters as JSON.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+from aiohttp import web
+
+
+class GoogleStandIn:
+    def __init__(self, delay=0.0, expires_in=3600):
+        self.delay = delay
+        self.expires_in = expires_in
+        # Access token -> monotonic expiry
+        self.tokens = {}
+        self.token_ids = itertools.count()
+        self.token_refreshes = 0
+        self.api_requests = 0
+        self.unauthorized = 0
+        self.app = web.Application(middlewares=[self.delayed])
+        self.app.router.add_post('/token', self.token)
+        self.app.router.add_get('/oauth2/v2/userinfo', self.userinfo)
+        self.app.router.add_get('/calendar/v3/calendars/{calendar}/events', self.events)
+        self.app.router.add_get('/gmail/v1/users/{user}/messages', self.messages)
+        self.app.router.add_get('/stats', self.stats)
+
+    @web.middleware
+    async def delayed(self, request, handler):
+        if self.delay and request.path != '/stats':
+            await asyncio.sleep(self.delay)
+        return await handler(request)
+
+    def issue_token(self, expires_in=None):
+        """A new access token, e.g. for credentials saved by a test."""
+        token = f"standin-token-{next(self.token_ids)}"
+        self.tokens[token] = time.monotonic() + (expires_in if expires_in is not None else self.expires_in)
+        return token
+
+    async def token(self, request):
+        form = await request.post()
+        if form.get('grant_type') != 'refresh_token' or not form.get('refresh_token'):
+            return web.json_response({'error': 'invalid_grant'}, status=400)
+        self.token_refreshes += 1
+        return web.json_response({'access_token': self.issue_token(), 'expires_in': self.expires_in,
+                                  'token_type': 'Bearer'})
+
+    def authorized(self, request):
+        self.api_requests += 1
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if self.tokens.get(token, 0) <= time.monotonic():
+            self.unauthorized += 1
+            raise web.HTTPUnauthorized(text=json.dumps({'error': {'code': 401, 'message': 'Invalid Credentials'}}),
+                                       content_type='application/json')
+
+    async def userinfo(self, request):
+        self.authorized(request)
+        return web.json_response({'id': '1', 'name': 'Stand-in User', 'email': 'user@example.com'})
+
+    async def events(self, request):
+        self.authorized(request)
+        return web.json_response({'items': [{'id': f'event{i}', 'summary': f'Meeting {i}'} for i in range(10)]})
+
+    async def messages(self, request):
+        self.authorized(request)
+        return web.json_response({'messages': [{'id': f'm{i}', 'threadId': f't{i}'} for i in range(10)]})
+
+    async def stats(self, request):
+        return web.json_response(self.metrics())
+
+    def metrics(self):
+        return {
+            'token_refreshes': self.token_refreshes,
+            'api_requests': self.api_requests,
+            'unauthorized': self.unauthorized,
+        }
+
+    def run(self, host='127.0.0.1', port=5001):
+        web.run_app(self.app, host=host, port=port)
+
+    def start_in_thread(self, host='127.0.0.1', port=0):
+        """Serve from a background thread; returns the server URL."""
+        ready = threading.Event()
+        result = {}
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            runner = web.AppRunner(self.app)
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, host, port)
+            loop.run_until_complete(site.start())
+            result['port'] = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return f"http://{host}:{result['port']}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help="seconds to hold back every answer")
+    parser.add_argument('--expires-in', type=int, default=3600,
+                        help="lifetime of issued access tokens in seconds")
+    args = parser.parse_args()
+    GoogleStandIn(args.delay, args.expires_in).run(args.host, args.port)
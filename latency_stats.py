@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+class RollingHistogram:
+    """Latency samples (ms) over a rolling window with percentile summaries."""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, latency_ms):
+        self.samples.append(latency_ms)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {'count': self.count, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+        # Imported here so that importing the app does not pull numpy in
+        import numpy as np
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            'count': self.count,
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(values.max()),
+        }
+
+
+class LatencyTracker:
+    """Correlates sent audio chunks with transcript events.
+
+    Every sent chunk gets a sequence number and keeps its capture time. When
+    the server reports which chunk a transcript covers (a ``seq`` field,
+    counted from 0 per connection), that chunk is used. Otherwise the
+    transcript is attributed to the newest chunk sent before it arrived, i.e.
+    the freshest audio it can reflect. Interim and final latencies are kept
+    separately: a final answers every chunk up to it, an interim only the
+    chunks not yet answered by an earlier interim.
+    """
+
+    def __init__(self, window=500):
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.connection_base = 0
+        self.pending_interim = deque()
+        self.pending_final = deque()
+        self.interim = RollingHistogram(window)
+        self.final = RollingHistogram(window)
+
+    def connection_started(self):
+        """Call on every (re)connect: the server restarts its chunk count."""
+        with self.lock:
+            self.connection_base = self.seq
+
+    def chunk_sent(self, captured_at):
+        """Register a sent chunk; returns its sequence number."""
+        with self.lock:
+            seq = self.seq
+            self.seq += 1
+            self.pending_interim.append((seq, captured_at))
+            self.pending_final.append((seq, captured_at))
+            return seq
+
+    def transcript_received(self, is_final, server_seq=None, received_at=None):
+        """Record a transcript event; returns its latency in ms, or None."""
+        if received_at is None:
+            received_at = time.monotonic()
+        with self.lock:
+            pending = self.pending_final if is_final else self.pending_interim
+            captured_at = self._answer(pending, server_seq)
+            if is_final:
+                # Chunks covered by the final will never get their own interim
+                self._answer(self.pending_interim, server_seq)
+            if captured_at is None:
+                return None
+            latency_ms = (received_at - captured_at) * 1000
+            (self.final if is_final else self.interim).add(latency_ms)
+            return latency_ms
+
+    def _answer(self, pending, server_seq):
+        # Pop every chunk the transcript covers; return the newest one's capture time
+        last_seq = None if server_seq is None else self.connection_base + int(server_seq)
+        captured_at = None
+        while pending and (last_seq is None or pending[0][0] <= last_seq):
+            captured_at = pending.popleft()[1]
+        return captured_at
+
+    def summary(self):
+        with self.lock:
+            return {
+                'chunks_sent': self.seq,
+                'capture_to_interim_ms': self.interim.summary(),
+                'capture_to_final_ms': self.final.summary(),
+            }
+
+    def to_json(self, **context):
+        """Summary plus raw samples, with any extra context (model, network...)."""
+        data = dict(context)
+        data.update(self.summary())
+        with self.lock:
+            data['samples'] = {
+                'capture_to_interim_ms': list(self.interim.samples),
+                'capture_to_final_ms': list(self.final.samples),
+            }
+        return json.dumps(data, indent=2)
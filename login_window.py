@@ -2,17 +2,23 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                             QPushButton, QLabel, QMessageBox)
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtGui import QPixmap
-from google_auth import GoogleAuthManager
+from google_auth import AuthWorker, GoogleAuthManager
 import os
 
 class LoginWindow(QMainWindow):
     login_successful = pyqtSignal(object)  # Emit credentials when login is successful
+    # (result, error) of a sign-in on the auth worker's thread, delivered to the GUI thread
+    login_finished = pyqtSignal(object, object)
 
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Login")
         self.setGeometry(100, 100, 400, 500)
-        self.auth_manager = GoogleAuthManager()
+        # Network calls run on the worker's thread, which also keeps the
+        # token fresh after sign-in; it outlives the window
+        self.auth_worker = AuthWorker(GoogleAuthManager())
+        self.auth_manager = self.auth_worker.manager
+        self.login_finished.connect(self.on_login_finished)
 
         # Create main widget and layout
         main_widget = QWidget()
@@ -56,20 +62,35 @@ class LoginWindow(QMainWindow):
         self.login_button.clicked.connect(self.handle_login)
         layout.addWidget(self.login_button)
 
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("font-size: 14px; color: #555; margin: 10px;")
+        layout.addWidget(self.status_label)
+
+        # Load a saved token and build the userinfo service while the user
+        # reads the window, so signing in is one request
+        self.auth_worker.submit('warm_up')
+
     def handle_login(self):
+        # Show information about test-only access
+        QMessageBox.information(
+            self,
+            "Test Mode",
+            "This app is currently in testing mode.\n"
+            "Only authorized test users can sign in.\n"
+            "Please contact the developer for access."
+        )
+        self.login_button.setEnabled(False)
+        self.status_label.setText("Signing in...")
+        self.auth_worker.submit('sign_in', self.login_finished.emit)
+
+    def on_login_finished(self, result, error):
+        self.login_button.setEnabled(True)
+        self.status_label.setText("")
         try:
-            # Show information about test-only access
-            QMessageBox.information(
-                self,
-                "Test Mode",
-                "This app is currently in testing mode.\n"
-                "Only authorized test users can sign in.\n"
-                "Please contact the developer for access."
-            )
-            
-            creds = self.auth_manager.get_credentials()
+            if error is not None:
+                raise error
+            creds, user_info = result
             if creds and creds.valid:
-                user_info = self.auth_manager.get_user_info()
                 QMessageBox.information(
                     self,
                     "Login Successful",
@@ -0,0 +1,122 @@
+"""Renders transcript updates at most once per display frame.
+
+The server sends interim hypotheses in bursts, and each one replaces the
+previous one. Rendering every one of them lays out and scrolls the view
+for text nobody sees. ``RenderScheduler`` sits between the transcript
+signals and a TranscriptRenderer:
+
+* an update that arrives a frame or more after the last render is rendered
+  as soon as control returns to the event loop, together with the rest of
+  its burst, so a quiet stream gets no added latency;
+* updates that arrive within a frame of the last render wait for the next
+  frame;
+* pending interims collapse to the latest one, and a pending interim is
+  dropped when a final arrives after it, since the final replaces it;
+* finals are never dropped. The finals that are pending are appended in
+  order, in one edit, before the interim that follows them.
+
+Texts are kept as they arrive and only formatted when rendered, so a
+superseded interim costs nothing. ``metrics()`` counts what was skipped.
+
+Environment:
+    WHISSLE_RENDER_FPS    renders per second (default: the screen's refresh rate)
+"""
+import os
+import time
+
+from PyQt6.QtCore import Qt, QTimer
+
+RENDER_FPS = float(os.environ.get('WHISSLE_RENDER_FPS', '0'))
+FALLBACK_FPS = 60.0
+
+
+def display_fps():
+    """Refresh rate of the primary screen, or 60 if it is not known."""
+    from PyQt6.QtGui import QGuiApplication
+    screen = QGuiApplication.primaryScreen()
+    rate = screen.refreshRate() if screen is not None else 0
+    return rate if rate > 0 else FALLBACK_FPS
+
+
+class RenderScheduler:
+    """Feeds a TranscriptRenderer at most ``fps`` times a second.
+
+    ``format(text)`` turns a transcript text into the renderer's HTML.
+    """
+
+    def __init__(self, renderer, format, fps=RENDER_FPS):
+        self.renderer = renderer
+        self.format = format
+        self.fps = fps or display_fps()
+        self.interval = 1.0 / self.fps
+        self.pending_finals = []
+        self.pending_interim = None
+        self.last_render = float('-inf')
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.flush)
+        self.finals = 0
+        self.interims = 0
+        self.interims_skipped = 0
+        self.renders = 0
+        self.max_finals_per_render = 0
+
+    def add_final(self, text):
+        self.finals += 1
+        if self.pending_interim is not None:
+            # The final replaces the interim it finalizes
+            self.pending_interim = None
+            self.interims_skipped += 1
+        self.pending_finals.append(text)
+        self._schedule()
+
+    def set_interim(self, text):
+        self.interims += 1
+        if self.pending_interim is not None:
+            self.interims_skipped += 1
+        self.pending_interim = text
+        self._schedule()
+
+    def _schedule(self):
+        if self.timer.isActive():
+            return
+        wait = self.last_render + self.interval - time.monotonic()
+        # A zero timer fires once the signals already queued are handled, so a
+        # burst is rendered once; round up so it never fires before the frame ends
+        self.timer.start(int(wait * 1000) + 1 if wait > 0 else 0)
+
+    def flush(self):
+        """Render whatever is pending now."""
+        self.timer.stop()
+        if not self.pending_finals and self.pending_interim is None:
+            return
+        self.last_render = time.monotonic()
+        if self.pending_finals:
+            finals, self.pending_finals = self.pending_finals, []
+            self.renderer.append_finals([self.format(text) for text in finals])
+            self.max_finals_per_render = max(self.max_finals_per_render, len(finals))
+        if self.pending_interim is not None:
+            self.renderer.set_interim(self.format(self.pending_interim))
+            self.pending_interim = None
+        self.renders += 1
+
+    def clear(self):
+        """Drop pending updates and clear the view."""
+        self.timer.stop()
+        self.pending_finals = []
+        self.pending_interim = None
+        self.renderer.clear()
+
+    def metrics(self):
+        pending = len(self.pending_finals) + (self.pending_interim is not None)
+        return {
+            'fps': self.fps,
+            'finals': self.finals,
+            'interims': self.interims,
+            'renders': self.renders,
+            # Updates that did not get a render of their own
+            'renders_skipped': self.finals + self.interims - pending - self.renders,
+            'interims_skipped': self.interims_skipped,
+            'max_finals_per_render': self.max_finals_per_render,
+        }
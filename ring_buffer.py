@@ -0,0 +1,132 @@
+"""Lock-free single-producer/single-consumer byte ring for captured audio.
+
+The PortAudio callback is the only writer and the capture thread the only
+reader. Each side owns one position: the writer copies data in and then
+publishes ``write_pos``; the reader copies data out and then publishes
+``read_pos``. Neither takes a lock, so the callback never waits for the
+reader. Both positions only grow, and the byte at position ``p`` lives at
+``p % capacity``.
+
+The positions and loss counters are kept in a header at the start of the
+memory, so a ring can be laid over any writable buffer: a bytearray, or a
+shared memory block mapped by several processes, any of which can read the
+counters. Audio is copied into and out of that memory through memoryviews;
+nothing is allocated per frame for the audio itself.
+
+When the reader falls so far behind that a write does not fit, the part
+that does not fit is dropped and counted in ``overflows`` and
+``dropped_bytes``. A read that times out before enough data arrived counts
+as an underrun.
+"""
+import time
+
+HEADER_SIZE = 64
+# Header fields, one unsigned 64-bit integer each; the writer owns all but
+# READ_POS and UNDERRUNS
+WRITE_POS, READ_POS, WRITES, OVERFLOWS, DROPPED_BYTES, UNDERRUNS = range(6)
+
+
+class RingBuffer:
+    def __init__(self, capacity, buffer=None, align=2):
+        if buffer is None:
+            buffer = bytearray(HEADER_SIZE + capacity)
+        self.view = memoryview(buffer)
+        # A new bytearray or shared memory block starts zeroed
+        self.header = self.view[:HEADER_SIZE].cast('Q')
+        self.data = self.view[HEADER_SIZE:HEADER_SIZE + capacity]
+        self.capacity = capacity
+        # Writes are cut to whole samples so the reader stays sample-aligned
+        self.align = align
+
+    @property
+    def overflows(self):
+        return self.header[OVERFLOWS]
+
+    @property
+    def dropped_bytes(self):
+        return self.header[DROPPED_BYTES]
+
+    @property
+    def underruns(self):
+        return self.header[UNDERRUNS]
+
+    @staticmethod
+    def size_for(capacity):
+        """Bytes of memory needed for a ring of this capacity."""
+        return HEADER_SIZE + capacity
+
+    def available(self):
+        return self.header[WRITE_POS] - self.header[READ_POS]
+
+    def write(self, data):
+        """Copy data in (producer side); returns the number of bytes written."""
+        header = self.header
+        write_pos = header[WRITE_POS]
+        free = self.capacity - (write_pos - header[READ_POS])
+        n = len(data)
+        header[WRITES] += 1
+        if n > free:
+            header[OVERFLOWS] += 1
+            header[DROPPED_BYTES] += n - (free - free % self.align)
+            n = free - free % self.align
+        if not n:
+            return 0
+        source = memoryview(data)
+        start = write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = source[:first]
+        if n > first:
+            self.data[:n - first] = source[first:n]
+        # Publish only after the bytes are in place
+        header[WRITE_POS] = write_pos + n
+        return n
+
+    def read_into(self, out):
+        """Copy up to len(out) bytes into out (consumer side); returns the count."""
+        read_pos = self.header[READ_POS]
+        n = min(len(out), self.header[WRITE_POS] - read_pos)
+        if n <= 0:
+            return 0
+        start = read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        if n > first:
+            out[first:n] = self.data[:n - first]
+        self.header[READ_POS] = read_pos + n
+        return n
+
+    def read_exactly(self, out, byte_rate, timeout):
+        """Fill out completely, sleeping until the producer has written enough.
+
+        Sleeps for as long as the missing bytes take to arrive at
+        ``byte_rate``, so a reader that is ahead costs one wake-up per frame.
+        Returns False (and counts an underrun) if out could not be filled
+        within ``timeout`` seconds; nothing is consumed in that case.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            missing = len(out) - self.available()
+            if missing <= 0:
+                self.read_into(out)
+                return True
+            now = time.monotonic()
+            if now >= deadline:
+                self.header[UNDERRUNS] += 1
+                return False
+            time.sleep(min(max(missing / byte_rate, 0.001), deadline - now))
+
+    def metrics(self):
+        return {
+            'capacity_bytes': self.capacity,
+            'buffered_bytes': self.available(),
+            'writes': self.header[WRITES],
+            'overflows': self.overflows,
+            'dropped_bytes': self.dropped_bytes,
+            'underruns': self.underruns,
+        }
+
+    def release(self):
+        """Drop the views on the memory, so a shared memory block can be closed."""
+        self.header.release()
+        self.data.release()
+        self.view.release()
@@ -33,8 +33,10 @@ OPTIONS = {
         'pyaudio',
         'websocket',
         'engineio',
+        # socketio.AsyncClient's websocket transport
+        'aiohttp',
         'pkg_resources',
-        'speech_recognition',
+        'numpy',
     ],
     'includes': [
         'packaging',
@@ -79,6 +81,7 @@ setup(
         'python-socketio==5.7.2',
         'pyaudio==0.2.13',
         'websocket-client==1.6.1',
-        'SpeechRecognition==3.8.1',
+        'numpy>=1.24',
+        'aiohttp>=3.8',
     ],
 ) 
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""Local stand-in for the Whissle transcription server.
+
+Accepts the same Socket.IO protocol as https://api.whissle.ai: audio arrives
+as binary ``audio_in`` events encoded as announced in the ``encoding`` query
+parameter, and ``transcript`` events are sent back. The transcripts are
+synthetic, or cycled from a script file of tagged utterances; the point is
+to exercise the client and measure bitrate, decode cost and behaviour under
+load without the real service.
+
+    python standin_server.py --port 5000
+    python standin_server.py --drop-every 10 --down-for 3   # flaky network
+    python standin_server.py --delay 0.15 --jitter 0.05 --script benchmarks/transcripts.txt
+    WHISSLE_SERVER_URL=http://localhost:5000 python app_demo.py
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import parse_qs
+
+import socketio
+from aiohttp import web
+
+from audio_codec import DEFAULT_CODEC, create_codec
+
+SAMPLE_RATE = 16000
+
+
+class StandInSession:
+    """Decodes one client's stream and keeps per-session statistics."""
+
+    def __init__(self, model_name, encoding):
+        self.model_name = model_name
+        self.encoding = encoding
+        self.codec = create_codec(encoding, SAMPLE_RATE)
+        self.connected_at = time.monotonic()
+        self.chunks = 0
+        self.bytes_received = 0
+        self.samples = 0
+        self.decode_cpu = 0.0
+        self.samples_at_interim = 0
+        self.samples_at_final = 0
+        self.utterance = 0
+        # Transcripts are delayed but never reordered
+        self.next_emit_at = 0.0
+        # Time between consecutive audio_in messages; long gaps mean the
+        # client's audio path stalled
+        self.last_chunk_at = None
+        self.arrival_gaps = []
+
+    def feed(self, payload):
+        start = time.process_time()
+        pcm = self.codec.decode(payload)
+        self.decode_cpu += time.process_time() - start
+        now = time.monotonic()
+        if self.last_chunk_at is not None:
+            self.arrival_gaps.append(now - self.last_chunk_at)
+        self.last_chunk_at = now
+        self.chunks += 1
+        self.bytes_received += len(payload)
+        self.samples += len(pcm) // 2
+        return pcm
+
+    def stats(self):
+        audio_seconds = self.samples / SAMPLE_RATE
+        return {
+            'model_name': self.model_name,
+            'encoding': self.encoding,
+            'chunks': self.chunks,
+            'bytes_received': self.bytes_received,
+            'audio_seconds': audio_seconds,
+            'bitrate_kbps': self.bytes_received * 8 / audio_seconds / 1000 if audio_seconds else 0.0,
+            'decode_cpu_seconds': self.decode_cpu,
+            'arrival_gap_ms': gap_summary(self.arrival_gaps),
+        }
+
+
+def gap_summary(gaps):
+    if not gaps:
+        return {'p50': None, 'p99': None, 'max': None}
+    ordered = sorted(gaps)
+
+    def pick(q):
+        return 1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50': pick(0.5), 'p99': pick(0.99), 'max': 1000 * ordered[-1]}
+
+
+class StandInServer:
+    """Socket.IO server emitting an interim every interim_every seconds of
+    received audio and a final every final_every seconds.
+
+    With drop_every set, all clients are disconnected on purpose at that
+    interval and new connections are refused for down_for seconds after.
+    Every transcript is held back for delay seconds plus a uniformly random
+    jitter of up to +/- jitter seconds, drawn from a generator seeded with
+    seed so runs are repeatable. With a script (a list of utterances), finals
+    cycle through it and interims are the first words of the next line.
+    """
+
+    def __init__(self, interim_every=0.5, final_every=2.0, drop_every=None, down_for=0.0,
+                 delay=0.0, jitter=0.0, script=None, seed=0):
+        self.interim_every = interim_every
+        self.final_every = final_every
+        self.drop_every = drop_every
+        self.down_for = down_for
+        self.delay = delay
+        self.jitter = jitter
+        self.script = [line.split() for line in script or [] if line.strip()]
+        self.random = random.Random(seed)
+        self.refuse_until = 0.0
+        self.sessions = {}
+        self.audio_seconds_received = 0.0
+        self.chunks_received = 0
+        self.transcripts_sent = 0
+        # Stats of the latest session per model, kept after it disconnects
+        self.last_stats = {}
+        self.sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+        self.app = web.Application()
+        self.sio.attach(self.app)
+        self.sio.on('connect', self.on_connect)
+        self.sio.on('disconnect', self.on_disconnect)
+        self.sio.on('audio_in', self.on_audio_in)
+        self.sio.on('stats', self.on_stats)
+        if drop_every:
+            self.app.on_startup.append(self.start_dropping)
+
+    async def on_connect(self, sid, environ):
+        if time.monotonic() < self.refuse_until:
+            print(f"Refusing {sid}: server is down on purpose")
+            return False
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        model_name = query.get('model_name', ['unknown'])[0]
+        encoding = query.get('encoding', [DEFAULT_CODEC])[0]
+        try:
+            self.sessions[sid] = StandInSession(model_name, encoding)
+        except ValueError as e:
+            print(f"Rejecting {sid}: {e}")
+            return False
+        print(f"Connected {sid}: model={model_name} encoding={encoding}")
+
+    async def on_disconnect(self, sid):
+        session = self.sessions.pop(sid, None)
+        if session is not None:
+            self.last_stats[session.model_name] = session.stats()
+            print(f"Disconnected {sid}: {session.stats()}")
+
+    async def on_audio_in(self, sid, data):
+        session = self.sessions.get(sid)
+        if session is None:
+            return
+        pcm = session.feed(data)
+        self.audio_seconds_received += len(pcm) / 2 / SAMPLE_RATE
+        self.chunks_received += 1
+        await self.maybe_transcribe(sid, session)
+
+    async def on_stats(self, sid, data=None):
+        # {'model_name': ...} asks for another (possibly closed) session's stats
+        if isinstance(data, dict) and 'model_name' in data:
+            return self.last_stats.get(data['model_name'], {})
+        session = self.sessions.get(sid)
+        return session.stats() if session else {}
+
+    async def maybe_transcribe(self, sid, session):
+        if session.samples - session.samples_at_final >= self.final_every * SAMPLE_RATE:
+            session.samples_at_final = session.samples_at_interim = session.samples
+            text = self.utterance_text(session, final=True)
+            session.utterance += 1
+            await self.emit_transcript(sid, session, text, True)
+        elif session.samples - session.samples_at_interim >= self.interim_every * SAMPLE_RATE:
+            session.samples_at_interim = session.samples
+            text = self.utterance_text(session, final=False)
+            await self.emit_transcript(sid, session, text, False)
+
+    async def emit_transcript(self, sid, session, text, is_final):
+        # seq: index of the last audio_in chunk this transcript covers
+        data = {'transcript': text, 'is_final': is_final, 'seq': session.chunks - 1}
+        if not self.delay and not self.jitter:
+            await self.send_transcript(sid, data)
+            return
+        delay = max(0.0, self.delay + self.random.uniform(-self.jitter, self.jitter))
+        now = time.monotonic()
+        # Strictly after the previous transcript, so jitter never reorders them
+        emit_at = max(now + delay, session.next_emit_at + 1e-6)
+        session.next_emit_at = emit_at
+        asyncio.create_task(self.send_transcript(sid, data, emit_at - now))
+
+    async def send_transcript(self, sid, data, delay=0.0):
+        if delay:
+            await asyncio.sleep(delay)
+        if sid not in self.sessions:
+            return
+        self.transcripts_sent += 1
+        await self.sio.emit('transcript', data, to=sid)
+
+    async def start_dropping(self, app):
+        app['dropper'] = asyncio.create_task(self.drop_connections())
+
+    async def drop_connections(self):
+        while True:
+            await asyncio.sleep(self.drop_every)
+            self.refuse_until = time.monotonic() + self.down_for
+            for sid in list(self.sessions):
+                print(f"Dropping {sid} on purpose")
+                await self.sio.disconnect(sid)
+
+    def utterance_text(self, session, final):
+        if self.script:
+            words = self.script[session.utterance % len(self.script)]
+            if final:
+                return ' '.join(words)
+            heard = (session.samples - session.samples_at_final) / SAMPLE_RATE
+            return ' '.join(words[:max(1, int(len(words) * heard / self.final_every))])
+        # Roughly two words per second of audio, tagged like the speech-tagger models
+        if final:
+            heard = self.final_every
+        else:
+            heard = (session.samples - session.samples_at_final) / SAMPLE_RATE
+        words = [f"word{session.utterance}_{i}" for i in range(max(1, int(heard * 2)))]
+        if final:
+            words += ['NER_PERSON', 'EMOTION_NEUTRAL', 'END']
+        return ' '.join(words)
+
+    def run(self, host='127.0.0.1', port=5000):
+        web.run_app(self.app, host=host, port=port)
+
+    def start_in_thread(self, host='127.0.0.1', port=0):
+        """Serve from a background thread; returns the server URL."""
+        ready = threading.Event()
+        result = {}
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            runner = web.AppRunner(self.app)
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, host, port)
+            loop.run_until_complete(site.start())
+            result['port'] = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return f"http://{host}:{result['port']}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--interim-every', type=float, default=0.5,
+                        help="seconds of audio between interim transcripts")
+    parser.add_argument('--final-every', type=float, default=2.0,
+                        help="seconds of audio between final transcripts")
+    parser.add_argument('--drop-every', type=float, default=None,
+                        help="disconnect all clients every N seconds")
+    parser.add_argument('--down-for', type=float, default=0.0,
+                        help="refuse connections for N seconds after each drop")
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help="seconds to hold back every transcript")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="random +/- seconds added to the delay")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the jitter")
+    parser.add_argument('--script', default=None,
+                        help="text file with one (tagged) utterance per line")
+    args = parser.parse_args()
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = f.read().splitlines()
+    StandInServer(args.interim_every, args.final_every, args.drop_every, args.down_for,
+                  args.delay, args.jitter, script, args.seed).run(args.host, args.port)
@@ -0,0 +1,391 @@
+"""GUI-free asyncio client for the Whissle streaming transcription protocol.
+
+A StreamingSession owns one Socket.IO connection for one model. Audio is
+pushed with ``send()`` or pulled from any async iterator of PCM chunks, and
+transcripts are consumed with ``async for``::
+
+    async with StreamingSession('speech-tagger_en_ner-emotion', source=chunks()) as session:
+        async for transcript in session:
+            print(transcript.text, transcript.is_final)
+
+Sessions do not share state, so one event loop can run many of them
+concurrently. The session reconnects with exponential backoff after an
+unexpected disconnect. Audio sent while the socket is down is buffered and
+replayed in order, and capture-to-transcript latency is tracked per chunk.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlencode
+
+import socketio
+
+from app_logging import SampledLogger, socketio_loggers
+from audio_codec import DEFAULT_CODEC, create_codec
+from audio_queue import ReplayBuffer
+from latency_stats import LatencyTracker
+
+# Point at a local stand-in server (see standin_server.py) for offline testing
+SERVER_URL = os.environ.get('WHISSLE_SERVER_URL', 'https://api.whissle.ai')
+
+# Reconnect with exponential backoff after an unexpected disconnect, holding
+# up to REPLAY_BUFFER_SECONDS of audio to replay once the socket is back
+RECONNECT_DELAY = 0.5
+RECONNECT_DELAY_MAX = 10.0
+REPLAY_BUFFER_SECONDS = float(os.environ.get('WHISSLE_REPLAY_SECONDS', '30'))
+
+log = logging.getLogger('whissle.engine')
+hot_log = SampledLogger(log)
+
+Transcript = namedtuple('Transcript', 'text is_final latency_ms received_at model_name')
+
+
+def connection_url(model_name, encoding=DEFAULT_CODEC, server_url=SERVER_URL):
+    # Query parameters exactly like the web client, plus the audio encoding
+    query = urlencode({'model_name': model_name, 'encoding': encoding})
+    return f'{server_url}/socket.io/?{query}'
+
+
+class StreamingSession:
+    """One streaming transcription session; see the module docstring."""
+
+    def __init__(self, model_name, source=None, server_url=SERVER_URL,
+                 encoding=DEFAULT_CODEC, sample_rate=16000,
+                 replay_seconds=REPLAY_BUFFER_SECONDS, linger=2.0,
+                 connect_timeout=5.0, on_status=None):
+        self.model_name = model_name
+        self.source = source
+        self.url = connection_url(model_name, encoding, server_url)
+        self.encoding = encoding
+        self.codec = create_codec(encoding, sample_rate)
+        self.linger = linger
+        self.connect_timeout = connect_timeout
+        self.on_status = on_status
+        self.replay_buffer = ReplayBuffer(replay_seconds, sample_rate)
+        self.latency = LatencyTracker()
+        self.transcripts = asyncio.Queue()
+        self.connected = asyncio.Event()
+        self.send_lock = asyncio.Lock()
+        self.closing = False
+        self.reconnect_attempt = 0
+        self.reconnect_task = None
+        self.connect_task = None
+        self.stream_task = None
+        self.last_event_at = time.monotonic()
+        self.last_sent_at = self.last_event_at
+        # Since begin_stream(), so the linger waits for the first answer
+        self.stream_chunks = 0
+        self.stream_transcripts = 0
+        self.quiet_timeouts = 0
+        self.chunks_sent = 0
+        self.bytes_sent = 0
+        self.send_seconds_total = 0.0
+        self.send_seconds_max = 0.0
+        self.queue_wait_total = 0.0
+        self.connect_ms = None
+        self.stream_started_at = None
+        self.first_byte_ms = None
+
+        # Reconnection is handled here so audio can be buffered meanwhile
+        self.sio = socketio.AsyncClient(reconnection=False, **socketio_loggers())
+        self.sio.on('connect', self._on_connect)
+        self.sio.on('disconnect', self._on_disconnect)
+        self.sio.on('transcript', self._on_transcript)
+        self.sio.on('connect_error', self._on_connect_error)
+        self.connect_rejected = asyncio.Event()
+
+    def status(self, message):
+        log.info("%s", message, extra={'fields': {'model': self.model_name}})
+        if self.on_status is not None:
+            self.on_status(message)
+
+    async def __aenter__(self):
+        await self.connect()
+        if self.source is not None:
+            self.start_streaming(self.source)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        transcript = await self.transcripts.get()
+        if transcript is None:
+            raise StopAsyncIteration
+        return transcript
+
+    async def connect(self):
+        # python-socketio keeps waiting for the full timeout after the server
+        # rejects the namespace, so don't let it wait: watch for the connect
+        # or the rejection here instead
+        self.connect_rejected.clear()
+        start = time.monotonic()
+        await self.sio.connect(self.url, transports=['websocket'], wait=False)
+        accepted = asyncio.ensure_future(self.connected.wait())
+        rejected = asyncio.ensure_future(self.connect_rejected.wait())
+        try:
+            await asyncio.wait([accepted, rejected], timeout=self.connect_timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            accepted.cancel()
+            rejected.cancel()
+        if not self.connected.is_set():
+            await self.sio.disconnect()
+            raise socketio.exceptions.ConnectionError(
+                "Connection rejected by server" if self.connect_rejected.is_set()
+                else "Timed out waiting for the server")
+        self.connect_ms = 1000 * (time.monotonic() - start)
+
+    def begin_stream(self, started_at=None):
+        """Start timing time-to-first-byte: from started_at (e.g. when the
+        user pressed Start) until the first audio leaves on the socket.
+        Audio a previous stream left unsent is dropped, so it is not
+        replayed as part of this one."""
+        self.drop_unsent()
+        self.stream_started_at = time.monotonic() if started_at is None else started_at
+        self.first_byte_ms = None
+        self.stream_chunks = 0
+        self.stream_transcripts = 0
+
+    def drop_unsent(self):
+        """Forget audio still waiting for the connection, e.g. when its
+        stream ended before the session connected."""
+        dropped = self.replay_buffer.clear()
+        # The codec's partial frame belongs to the same audio
+        self.codec.flush()
+        if dropped:
+            log.info("Dropped %d unsent chunks of an ended stream", dropped,
+                     extra={'fields': {'model': self.model_name}})
+
+    def start_connect(self):
+        """Connect in the background, then replay audio sent meanwhile.
+        Returns the task; calling it again returns the same task."""
+        if self.connect_task is None:
+            self.connect_task = asyncio.create_task(self._connect_and_replay())
+        return self.connect_task
+
+    async def _connect_and_replay(self):
+        await self.connect()
+        async with self.send_lock:
+            await self._replay()
+
+    async def _on_connect_error(self, data=None):
+        log.warning("Connection rejected: %s", data, extra={'fields': {'model': self.model_name}})
+        self.connect_rejected.set()
+
+    def start_streaming(self, source):
+        """Send every chunk from an async iterator, then close after lingering
+        for trailing transcripts. Returns the streaming task."""
+        self.stream_task = asyncio.create_task(self._stream(source))
+        return self.stream_task
+
+    async def _stream(self, source):
+        try:
+            async for item in source:
+                # Sources yield bytes, or (bytes, capture_time) when they know it
+                if isinstance(item, tuple):
+                    await self.send(*item)
+                else:
+                    await self.send(item)
+            await self.wait_for_quiet()
+        finally:
+            await self.close()
+
+    async def wait_for_quiet(self):
+        """Once the audio has ended: send what the codec still holds after any
+        buffered audio, then wait until `linger` seconds have passed since
+        the last chunk sent and the last transcript. A stream that sent audio
+        also waits for its first transcript, so a slow server is not cut
+        off. Gives up after 10 * `linger` and counts it in quiet_timeouts."""
+        deadline = time.monotonic() + 10 * self.linger
+        while not self.closing:
+            if not len(self.replay_buffer):
+                await self.flush_codec()
+            now = time.monotonic()
+            answered = self.stream_transcripts or not self.stream_chunks
+            remaining = max(self.last_sent_at, self.last_event_at) + self.linger - now
+            if remaining <= 0 and answered and not len(self.replay_buffer):
+                return
+            if now >= deadline:
+                self.quiet_timeouts += 1
+                log.warning("No quiet after %.1fs: %d chunks unsent, %d transcripts for %d chunks",
+                            10 * self.linger, len(self.replay_buffer), self.stream_transcripts,
+                            self.stream_chunks, extra={'fields': {'model': self.model_name}})
+                return
+            await asyncio.sleep(min(max(remaining, 0.05), deadline - now))
+
+    async def flush_codec(self):
+        """Send the codec's last partial frame, e.g. under 20 ms of Opus."""
+        async with self.send_lock:
+            if not self.connected.is_set() or len(self.replay_buffer):
+                return
+            payload = self.codec.flush()
+            if not payload:
+                return
+            try:
+                await self.sio.emit('audio_in', payload)
+            except Exception:
+                if self.connected.is_set() and not self.closing:
+                    raise
+                log.warning("Lost the last %d encoded bytes to a disconnect", len(payload))
+                return
+            self.bytes_sent += len(payload)
+            self.last_sent_at = time.monotonic()
+
+    async def send(self, chunk, captured_at=None):
+        """Send one PCM chunk, or buffer it for replay while disconnected."""
+        if captured_at is None:
+            captured_at = time.monotonic()
+        if self.closing:
+            return
+        async with self.send_lock:
+            if not self.connected.is_set() or len(self.replay_buffer):
+                self.replay_buffer.add(chunk, captured_at)
+                if self.connected.is_set():
+                    await self._replay()
+                return
+            if not await self._emit(chunk, captured_at):
+                self.replay_buffer.add(chunk, captured_at)
+
+    async def _emit(self, chunk, captured_at):
+        """Encode and emit one chunk; returns False if the socket dropped."""
+        try:
+            payload = self.codec.encode(chunk)
+            hot_log.debug('send', "Sending audio chunk", bytes=len(payload), pcm_bytes=len(chunk))
+            start = time.monotonic()
+            # Register before emitting so a fast reply always finds its chunk
+            self.latency.chunk_sent(captured_at)
+            await self.sio.emit('audio_in', payload)
+            self._record_send(len(payload), time.monotonic() - start, start - captured_at)
+            return True
+        except Exception:
+            if not self.connected.is_set() and not self.closing:
+                return False
+            raise
+
+    async def _replay(self):
+        while len(self.replay_buffer) and self.connected.is_set():
+            chunk, captured_at = self.replay_buffer.pop()
+            if not await self._emit(chunk, captured_at):
+                self.replay_buffer.requeue(chunk, captured_at)
+                break
+
+    def _record_send(self, size, send_seconds, queue_wait):
+        self.chunks_sent += 1
+        self.bytes_sent += size
+        self.send_seconds_total += send_seconds
+        self.send_seconds_max = max(self.send_seconds_max, send_seconds)
+        self.queue_wait_total += queue_wait
+        self.stream_chunks += 1
+        self.last_sent_at = time.monotonic()
+        if self.first_byte_ms is None and self.stream_started_at is not None:
+            self.first_byte_ms = 1000 * (time.monotonic() - self.stream_started_at)
+            log.info("First audio sent %.0f ms after start", self.first_byte_ms,
+                     extra={'fields': {'model': self.model_name, 'connect_ms': self.connect_ms}})
+
+    async def _on_connect(self):
+        self.latency.connection_started()
+        self.connected.set()
+        self.status("Connected to server")
+
+    async def _on_disconnect(self):
+        self.connected.clear()
+        if self.closing:
+            self.status("Disconnected from server")
+            return
+        self.status("Connection lost, reconnecting...")
+        if self.reconnect_task is None or self.reconnect_task.done():
+            self.reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        self.reconnect_attempt = 0
+        delay = RECONNECT_DELAY
+        while not self.closing:
+            await asyncio.sleep(delay)
+            if self.closing or self.connected.is_set():
+                break
+            self.reconnect_attempt += 1
+            self.status(f"Reconnecting (attempt {self.reconnect_attempt})...")
+            try:
+                await self.connect()
+            except Exception as e:
+                delay = min(RECONNECT_DELAY * 2 ** self.reconnect_attempt, RECONNECT_DELAY_MAX)
+                # Jitter so many clients don't reconnect in lockstep
+                delay *= random.uniform(0.75, 1.25)
+                log.warning("Reconnect attempt %d failed: %s; retrying in %.1fs",
+                            self.reconnect_attempt, e, delay)
+                continue
+            log.info("Reconnected after %d attempt(s), replaying %d buffered chunks",
+                     self.reconnect_attempt, len(self.replay_buffer))
+            async with self.send_lock:
+                await self._replay()
+            break
+        self.reconnect_attempt = 0
+
+    async def _on_transcript(self, data):
+        if not isinstance(data, dict) or 'transcript' not in data:
+            return
+        received_at = time.monotonic()
+        self.last_event_at = received_at
+        self.stream_transcripts += 1
+        is_final = data.get('is_final', False)
+        latency_ms = self.latency.transcript_received(is_final, data.get('seq'), received_at)
+        hot_log.debug('final' if is_final else 'interim', "Transcript received",
+                      is_final=is_final, latency_ms=latency_ms, model=self.model_name)
+        self.transcripts.put_nowait(
+            Transcript(data['transcript'], is_final, latency_ms, received_at, self.model_name))
+
+    async def close(self):
+        """Disconnect and end the transcript iterator. Safe to call twice."""
+        if self.closing:
+            return
+        self.closing = True
+        current = asyncio.current_task()
+        for task in (self.connect_task, self.reconnect_task, self.stream_task):
+            if task is not None and task is not current and not task.done():
+                task.cancel()
+        if self.sio.connected:
+            await self.sio.disconnect()
+        self.transcripts.put_nowait(None)
+
+    def metrics(self):
+        """Send, replay and latency metrics for this session."""
+        sent = self.chunks_sent
+        metrics = {
+            'model_name': self.model_name,
+            'encoding': self.encoding,
+            'chunks_sent': sent,
+            'bytes_sent': self.bytes_sent,
+            'send_ms_avg': 1000 * self.send_seconds_total / sent if sent else 0.0,
+            'send_ms_max': 1000 * self.send_seconds_max,
+            'queue_wait_ms_avg': 1000 * self.queue_wait_total / sent if sent else 0.0,
+            'connect_ms': self.connect_ms,
+            'ttfb_ms': self.first_byte_ms,
+            # Streams that ended without the transcripts going quiet
+            'quiet_timeouts': self.quiet_timeouts,
+        }
+        metrics.update(self.replay_buffer.metrics())
+        metrics.update(self.latency.summary())
+        return metrics
+
+
+async def iter_audio_queue(audio_queue, poll_interval=0.1):
+    """Async iterator over an AudioSendQueue filled from another thread.
+
+    Yields (chunk, captured_at) until the queue is closed and drained.
+    """
+    while True:
+        item = audio_queue.get(timeout=0)
+        if item is None:
+            if audio_queue.closed:
+                return
+            item = await asyncio.to_thread(audio_queue.get, poll_interval)
+            if item is None:
+                continue
+        yield item
@@ -0,0 +1,41 @@
+# Capture frame size and network send cadence, in milliseconds, per profile.
+# Small capture frames keep the device buffer short; the send cadence decides
+# how many frames are batched into one audio_in message.
+STREAMING_PROFILES = {
+    'latency': (20, 80),
+    'responsive': (40, 200),
+    'balanced': (100, 400),
+    'efficient': (200, 800),
+    'legacy': (800, 800),
+}
+DEFAULT_STREAMING_PROFILE = 'legacy'
+
+
+def profile_sizes(profile, sample_rate):
+    """Return (frame_size, frames_per_send) in samples/frames for a profile."""
+    frame_ms, send_ms = STREAMING_PROFILES[profile]
+    frame_size = int(sample_rate * frame_ms / 1000)
+    frames_per_send = max(1, round(send_ms / frame_ms))
+    return frame_size, frames_per_send
+
+
+class FrameBatcher:
+    """Collects capture frames and releases them at the send cadence."""
+
+    def __init__(self, frames_per_send):
+        self.frames_per_send = frames_per_send
+        self.frames = []
+
+    def add(self, frame):
+        """Add a frame; returns the batched chunk once enough frames arrived."""
+        self.frames.append(frame)
+        if len(self.frames) >= self.frames_per_send:
+            return self.flush()
+        return None
+
+    def flush(self):
+        if not self.frames:
+            return None
+        chunk = b''.join(self.frames)
+        self.frames = []
+        return chunk
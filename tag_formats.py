@@ -0,0 +1,69 @@
+import html
+import re
+
+# Tag families emitted by the speech-tagger models, as (prefix, color, size)
+DEFAULT_TAG_FAMILIES = [
+    ('EMOTION_', '#e91e63', 24),  # Pink
+    ('NER_', '#2196f3', 24),      # Blue
+    ('END', '#4caf50', 24),       # Green
+    ('INTENT_', '#ff9800', 24),   # Orange
+    ('AGE_', '#9c27b0', 24),      # Purple
+    ('DIALECT_', '#795548', 24),  # Brown
+    ('GENDER_', '#009688', 24),   # Teal
+    ('ENTITY_', '#673ab7', 24),   # Deep Purple
+]
+REGULAR_KEY = 'regular'
+REGULAR_COLOR = '#000000'
+REGULAR_SIZE = 20
+
+
+class TagClassifier:
+    """Maps transcript words to tag families with a single compiled regex.
+
+    The HTML fragment for every family is rendered once when the family is
+    registered, so the per-word path is one regex match and one dict lookup.
+    """
+
+    def __init__(self, families=DEFAULT_TAG_FAMILIES):
+        self.families = {}
+        for prefix, color, size in families:
+            self.families[prefix] = (color, size)
+        self._compile()
+
+    def register_family(self, prefix, color, size=24):
+        """Add or recolor a tag family. Takes effect for the next message."""
+        self.families[prefix] = (color, size)
+        self._compile()
+
+    def _compile(self):
+        # Longest prefix first so a more specific family wins over a shorter one
+        prefixes = sorted(self.families, key=len, reverse=True)
+        pattern = re.compile('|'.join(re.escape(prefix) for prefix in prefixes))
+        open_tags = {
+            prefix: f'<span style="color: {color}; font-weight: bold; font-size: {size}px">'
+            for prefix, (color, size) in self.families.items()
+        }
+        open_tags[None] = f'<span style="color: black; font-size: {REGULAR_SIZE}px">'
+        # Swap both in one assignment so a concurrent render never sees a mix
+        self._compiled = (pattern.match, open_tags)
+
+    def classify_word(self, word):
+        match = self._compiled[0](word)
+        return match.group() if match else REGULAR_KEY
+
+    def classify(self, text):
+        """Return a list of (word, family_key) pairs for the given text."""
+        classify_word = self.classify_word
+        return [(word, classify_word(word)) for word in text.split()]
+
+    def render(self, text):
+        """Return (html, plain_text) for the given transcript text."""
+        match, open_tags = self._compiled
+        words = text.split()
+        parts = []
+        for word in words:
+            found = match(word)
+            parts.append(open_tags[found.group() if found else None])
+            parts.append(html.escape(word, quote=False))
+            parts.append('</span> ')
+        return ''.join(parts), ' '.join(words)
@@ -0,0 +1,272 @@
+"""Types final transcripts into the focused window off the GUI thread.
+
+``TextInjector.submit()`` only queues the text. A worker thread hands it to
+a backend, and finals that arrive while an injection is still running are
+joined into the next one, so a burst of finals costs one paste instead of
+one process spawn each.
+
+Backends:
+    applescript - ``osascript`` spawned per injection (the original behaviour)
+    helper      - one long-lived ``osascript -l JavaScript`` helper that reads
+                  texts from stdin and acknowledges each paste (macOS default)
+    xdotool     - ``xdotool type`` for X11 desktops (Linux default if installed)
+    memory      - records texts in a list; for tests and headless machines
+
+The paste backends put the text on the clipboard and press Cmd-V. The
+keystroke returns once the event is posted, before the target app has read
+the clipboard, so they wait ``PASTE_SETTLE_MS`` before the next text may
+replace it.
+
+Environment:
+    WHISSLE_TYPING_BACKEND     overrides the platform default
+    WHISSLE_PASTE_SETTLE_MS    wait after each paste (default: 150)
+"""
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from latency_stats import RollingHistogram
+
+PASTE_SETTLE_MS = float(os.environ.get('WHISSLE_PASTE_SETTLE_MS', '150'))
+
+log = logging.getLogger('whissle.typing')
+
+
+def applescript_string(text):
+    """Quote text as an AppleScript string literal."""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class AppleScriptBackend:
+    """Pastes through the clipboard with one osascript process per injection."""
+    name = 'applescript'
+
+    def __init__(self, settle_ms=PASTE_SETTLE_MS):
+        self.settle_ms = settle_ms
+
+    def inject(self, text):
+        script = f'''
+        tell application "System Events"
+            set the clipboard to {applescript_string(text)}
+            keystroke "v" using command down
+        end tell
+        delay {self.settle_ms / 1000}
+        '''
+        subprocess.run(['osascript', '-e', script], text=True, encoding='utf-8', check=True)
+
+    def close(self):
+        pass
+
+
+# Reads one JSON string per line, pastes it and answers "ok" once the paste
+# has had SETTLE_SECONDS to read the clipboard
+HELPER_SCRIPT = r'''
+ObjC.import('Foundation');
+ObjC.import('AppKit');
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+var events = Application('System Events');
+var pending = '';
+while (true) {
+    var data = stdin.availableData;
+    if (data.length === 0) break;
+    pending += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+    var lines = pending.split('\n');
+    pending = lines.pop();
+    lines.forEach(function (line) {
+        var board = $.NSPasteboard.generalPasteboard;
+        board.clearContents;
+        board.setStringForType($(JSON.parse(line)), $.NSPasteboardTypeString);
+        events.keystroke('v', {using: 'command down'});
+        delay(SETTLE_SECONDS);
+        stdout.writeData($('ok\n').dataUsingEncoding($.NSUTF8StringEncoding));
+    });
+}
+'''
+
+
+class HelperProcessBackend:
+    """Keeps one helper process alive and sends it a JSON string per line.
+
+    The helper answers each line with one line once the text is in, so the
+    clipboard is not replaced before the paste has read it; it is restarted
+    if it dies.
+    """
+    name = 'helper'
+
+    def __init__(self, command=None, settle_ms=PASTE_SETTLE_MS):
+        script = HELPER_SCRIPT.replace('SETTLE_SECONDS', repr(settle_ms / 1000))
+        self.command = command or ['osascript', '-l', 'JavaScript', '-e', script]
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, encoding='utf-8', bufsize=1)
+
+    def inject(self, text):
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+        self.process.stdin.write(json.dumps(text) + '\n')
+        self.process.stdin.flush()
+        if not self.process.stdout.readline():
+            self.process = None
+            raise RuntimeError("Typing helper exited")
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+class XdotoolBackend:
+    """Types into the focused X11 window with xdotool."""
+    name = 'xdotool'
+
+    def inject(self, text):
+        subprocess.run(['xdotool', 'type', '--delay', '0', '--', text], check=True)
+
+    def close(self):
+        pass
+
+
+class MemoryBackend:
+    """Keeps injected texts in memory instead of typing them."""
+    name = 'memory'
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.texts = []
+
+    def inject(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        self.texts.append(text)
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    AppleScriptBackend.name: AppleScriptBackend,
+    HelperProcessBackend.name: HelperProcessBackend,
+    XdotoolBackend.name: XdotoolBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+
+def default_backend():
+    name = os.environ.get('WHISSLE_TYPING_BACKEND')
+    if name is None:
+        if sys.platform == 'darwin':
+            name = HelperProcessBackend.name
+        elif shutil.which('xdotool'):
+            name = XdotoolBackend.name
+        else:
+            name = MemoryBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown typing backend: {name}")
+    return BACKENDS[name]()
+
+
+class TextInjector:
+    """Queue of texts typed by a worker thread, coalescing while it is busy.
+
+    Texts waiting when the worker becomes free go out as one injection,
+    joined with spaces. With ``coalesce_ms`` the worker also waits that long
+    after the first text for more to arrive. Latency is measured from
+    ``submit()`` until the backend has finished typing the text.
+    """
+
+    def __init__(self, backend=None, coalesce_ms=0, window=500):
+        self.backend = backend
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.latency = RollingHistogram(window)
+        self.submitted = 0
+        self.injections = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def submit(self, text):
+        """Queue text for typing; never blocks on the backend."""
+        text = text.strip()
+        if not text:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='text-injector', daemon=True)
+                self.thread.start()
+            self.submitted += 1
+        self.queue.put((text, time.monotonic()))
+
+    def _run(self):
+        if self.backend is None:
+            self.backend = default_backend()
+        log.info("Typing with the %s backend", self.backend.name)
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            if self.coalesce_seconds:
+                time.sleep(self.coalesce_seconds)
+            stopping = False
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._inject(batch)
+            if stopping:
+                break
+        self.backend.close()
+
+    def _inject(self, batch):
+        # Trailing space so the next injection doesn't run into this one
+        text = ' '.join(text for text, _ in batch) + ' '
+        try:
+            self.backend.inject(text)
+        except Exception:
+            self.errors += 1
+            log.exception("Error typing externally")
+            return
+        done = time.monotonic()
+        self.injections += 1
+        self.coalesced += len(batch) - 1
+        for _, submitted_at in batch:
+            self.latency.add(1000 * (done - submitted_at))
+
+    def close(self, timeout=2.0):
+        """Type what is still queued, then stop the worker."""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is None:
+            return
+        self.queue.put(None)
+        thread.join(timeout)
+
+    def metrics(self):
+        return {
+            'backend': getattr(self.backend, 'name', None),
+            'submitted': self.submitted,
+            'injections': self.injections,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'latency_ms': self.latency.summary(),
+        }
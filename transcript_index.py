@@ -0,0 +1,121 @@
+"""Incremental inverted index over the final transcripts of a session.
+
+Each final is parsed once, when it arrives, into an Utterance: its plain
+words (lower-cased, without punctuation) and its tag tokens
+(``INTENT_set_alarm``, ``EMOTION_HAPPY``, ``END``...). Every distinct word,
+tag and tag family (``INTENT_*``) gets a posting list of the indices of the
+utterances containing it, in TranscriptStore order, and every tag family
+keeps a running count per tag. Queries never look at the transcript text
+again:
+
+    index.search('INTENT_set_alarm')        # utterances with that intent
+    index.search('alarm EMOTION_ANGRY')      # all terms must match
+    index.search('INTENT_*')                 # any tag of the family
+    index.counts('EMOTION_')                 # {'EMOTION_NEUTRAL': 30, ...}
+
+Posting lists are arrays of 8-byte integers, so a session of many hours
+costs a few megabytes. The texts themselves stay in the TranscriptStore.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from tag_formats import REGULAR_KEY
+
+Utterance = namedtuple('Utterance', 'words tags')
+
+WORD_RE = re.compile(r"[\w']+")
+
+
+class TranscriptIndex:
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.postings = {}
+        # Family prefix -> Counter of utterances per tag
+        self.family_counts = {}
+        self.utterances = 0
+
+    def __len__(self):
+        return self.utterances
+
+    def parse(self, text):
+        """Split a transcript into an Utterance of words and tags."""
+        words = []
+        tags = []
+        for word, family in self.classifier.classify(text):
+            if family == REGULAR_KEY:
+                words.extend(part.lower() for part in WORD_RE.findall(word))
+            else:
+                tags.append(word)
+        return Utterance(words, tags)
+
+    def add(self, index, utterance):
+        """Index an utterance under its TranscriptStore index; indices must increase."""
+        terms = set(utterance.words)
+        for tag in set(utterance.tags):
+            family = self.classifier.classify_word(tag)
+            self.family_counts.setdefault(family, Counter())[tag] += 1
+            terms.add(tag)
+            terms.add(family + '*')
+        postings = self.postings
+        for term in terms:
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = array('q')
+            posting.append(index)
+        self.utterances += 1
+
+    def clear(self):
+        self.postings = {}
+        self.family_counts = {}
+        self.utterances = 0
+
+    def rebuild(self, store):
+        """Index every record of a TranscriptStore, e.g. after reopening a log."""
+        self.clear()
+        for index in range(len(store)):
+            self.add(index, self.parse(store.get(index)['text']))
+
+    def _terms(self, token):
+        if token.endswith('*') and token[:-1] in self.classifier.families:
+            return [token]
+        if self.classifier.classify_word(token) == REGULAR_KEY:
+            # Split like parse() does, so "Priya," finds priya
+            return [word.lower() for word in WORD_RE.findall(token)]
+        return [token]
+
+    def search(self, query):
+        """Indices of the utterances matching every term of the query, oldest first.
+
+        Terms are words (case-insensitive), tags, or a tag family prefix
+        followed by ``*``.
+        """
+        lists = [self.postings.get(term, ())
+                 for token in query.split() for term in self._terms(token)]
+        if not lists:
+            return []
+        lists.sort(key=len)
+        result = list(lists[0])
+        for posting in lists[1:]:
+            if not result:
+                break
+            size = len(posting)
+            if len(result) * size.bit_length() < size:
+                # Few candidates: look each one up in the longer list
+                result = [index for index in result
+                          if (i := bisect_left(posting, index)) < size and posting[i] == index]
+            else:
+                result = sorted(set(result).intersection(posting))
+        return result
+
+    def counts(self, prefix):
+        """Utterances per tag of a family, most common first."""
+        return dict(self.family_counts.get(prefix, Counter()).most_common())
+
+    def metrics(self):
+        return {
+            'utterances': self.utterances,
+            'terms': len(self.postings),
+            'postings': sum(len(posting) for posting in self.postings.values()),
+        }
@@ -0,0 +1,162 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QTextCursor
+
+
+class TranscriptRenderer:
+    """Incrementally renders transcript blocks into a QTextEdit.
+
+    Final results are appended at the end of the document through a cursor and
+    the single live interim block is replaced in place, so the cost of each
+    message depends only on the size of that message, not on the session.
+
+    With ``max_blocks`` set, the oldest final blocks are removed once there
+    are more than that many, so the document stays bounded. Removing blocks
+    at the top relays out the rest of the document, so they are removed a
+    quarter of ``max_blocks`` at a time rather than one per final. The view
+    only follows new text while it is scrolled to the bottom.
+    """
+
+    def __init__(self, text_edit, max_blocks=None):
+        self.text_edit = text_edit
+        self.document = text_edit.document()
+        # The undo stack would otherwise keep a copy of every edit we make
+        self.document.setUndoRedoEnabled(False)
+        self.cursor = QTextCursor(self.document)
+        self.max_blocks = max_blocks
+        self.blocks = 0
+        self.interim_start = None
+        self.interim_html = None
+
+    def clear(self):
+        self.document.clear()
+        self.cursor = QTextCursor(self.document)
+        self.blocks = 0
+        self.interim_start = None
+        self.interim_html = None
+
+    def append_final(self, html):
+        self.append_finals([html])
+
+    def append_finals(self, htmls):
+        """Append several finals in order, in one edit and one scroll."""
+        following = self._at_bottom()
+        self.cursor.beginEditBlock()
+        self._remove_interim()
+        for html in htmls:
+            self._insert_block(html)
+        self.blocks += len(htmls)
+        # While the user reads further up, keep what they are looking at
+        if following and self.max_blocks is not None and self.blocks > self.max_blocks * 5 // 4:
+            self._trim_top(self.blocks - self.max_blocks)
+        self.cursor.endEditBlock()
+        if following:
+            self._scroll_to_bottom()
+
+    def set_interim(self, html):
+        if html == self.interim_html:
+            return
+        following = self._at_bottom()
+        self.cursor.beginEditBlock()
+        self._remove_interim()
+        self.cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.interim_start = self.cursor.position()
+        self.interim_html = html
+        self._insert_block(html)
+        self.cursor.endEditBlock()
+        if following:
+            self._scroll_to_bottom()
+
+    def _insert_block(self, html):
+        self.cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not self.document.isEmpty():
+            self.cursor.insertBlock()
+        self.cursor.insertHtml(html)
+
+    def _remove_interim(self):
+        if self.interim_start is None:
+            return
+        # The interim block is always last, so it spans from its start to the end
+        self.cursor.setPosition(self.interim_start)
+        self.cursor.movePosition(QTextCursor.MoveOperation.End,
+                                 QTextCursor.MoveMode.KeepAnchor)
+        self.cursor.removeSelectedText()
+        self.interim_start = None
+        self.interim_html = None
+
+    def _trim_top(self, count):
+        self.cursor.movePosition(QTextCursor.MoveOperation.Start)
+        self.cursor.movePosition(QTextCursor.MoveOperation.NextBlock,
+                                 QTextCursor.MoveMode.KeepAnchor, count)
+        removed = self.cursor.selectionEnd() - self.cursor.selectionStart()
+        self.cursor.removeSelectedText()
+        self.blocks -= count
+        if self.interim_start is not None:
+            self.interim_start -= removed
+        return removed
+
+    def _at_bottom(self):
+        scrollbar = self.text_edit.verticalScrollBar()
+        return scrollbar.value() >= scrollbar.maximum() - 4
+
+    def _scroll_to_bottom(self):
+        scrollbar = self.text_edit.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+
+class WindowedTranscriptRenderer(TranscriptRenderer):
+    """TranscriptRenderer over a TranscriptStore that shows a window of it.
+
+    Only the last ``max_blocks`` finals are in the document while following
+    the live transcript. Scrolling to the top loads the previous ``page``
+    finals from the store, so older utterances are read from disk only when
+    someone looks at them. ``render(text)`` turns a stored text into HTML.
+    """
+
+    def __init__(self, text_edit, store, render, max_blocks=300, page=50):
+        super().__init__(text_edit, max_blocks)
+        self.store = store
+        self.render = render
+        self.page = page
+        # Store index of the first final in the document
+        self.first_shown = 0
+        # Queued, so a scroll caused by our own edits is handled after them
+        text_edit.verticalScrollBar().valueChanged.connect(
+            self._on_scroll, Qt.ConnectionType.QueuedConnection)
+
+    def clear(self):
+        super().clear()
+        self.first_shown = len(self.store)
+
+    def _trim_top(self, count):
+        removed = super()._trim_top(count)
+        self.first_shown += count
+        return removed
+
+    def _on_scroll(self, value):
+        scrollbar = self.text_edit.verticalScrollBar()
+        if scrollbar.value() == scrollbar.minimum() and self.first_shown > 0 and scrollbar.maximum() > 0:
+            self.load_older()
+
+    def load_older(self):
+        """Insert the previous page of finals above the first one shown."""
+        count = min(self.page, self.first_shown)
+        if count <= 0:
+            return
+        records = self.store.read(self.first_shown - count, self.first_shown)
+        scrollbar = self.text_edit.verticalScrollBar()
+        value, old_maximum = scrollbar.value(), scrollbar.maximum()
+        was_empty = self.document.isEmpty()
+        before = self.document.characterCount()
+        self.cursor.beginEditBlock()
+        self.cursor.movePosition(QTextCursor.MoveOperation.Start)
+        for i, record in enumerate(records):
+            self.cursor.insertHtml(self.render(record['text']))
+            if i < len(records) - 1 or not was_empty:
+                self.cursor.insertBlock()
+        self.cursor.endEditBlock()
+        if self.interim_start is not None:
+            self.interim_start += self.document.characterCount() - before
+        self.blocks += count
+        self.first_shown -= count
+        # Keep the text that was on screen where it was
+        scrollbar.setValue(value + scrollbar.maximum() - old_maximum)
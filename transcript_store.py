@@ -0,0 +1,200 @@
+"""Append-only on-disk log of final transcripts with a bounded window in RAM.
+
+Every final is appended to a JSONL session log as it arrives. Only the most
+recent ``window`` records stay in memory; older ones are read back from
+disk by index when the view scrolls up to them. The only per-record state
+kept in RAM is one 8-byte file offset, so a day-long session costs well
+under a megabyte.
+
+Writes are buffered and fsync'ed in batches: after ``fsync_every`` records
+or once ``fsync_seconds`` have passed since the last sync, whichever comes
+first, and on ``flush()``/``close()``.
+
+Logs hold the user's dictation in plain text, so they are written to a
+per-user directory only its owner can read. Unless transcripts are kept, a
+log is deleted when the next session starts or the store is closed, along
+with any left behind by a crash. Kept logs are pruned to the newest
+``KEEP_SESSIONS``.
+
+Environment:
+    WHISSLE_SESSION_DIR        where session logs go (default: sessions in the app data directory)
+    WHISSLE_KEEP_TRANSCRIPTS   1 keeps session logs after the session ends
+    WHISSLE_KEEP_SESSIONS      kept logs to retain (default: 20)
+"""
+import json
+import os
+import sys
+import time
+from array import array
+from collections import deque
+
+
+def app_data_dir():
+    """Per-user data directory of the app."""
+    if sys.platform == 'darwin':
+        return os.path.expanduser('~/Library/Application Support/WhissleTranscriber')
+    base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(base, 'whissle')
+
+
+SESSION_DIR = os.environ.get('WHISSLE_SESSION_DIR', os.path.join(app_data_dir(), 'sessions'))
+KEEP_TRANSCRIPTS = os.environ.get('WHISSLE_KEEP_TRANSCRIPTS', '0') == '1'
+KEEP_SESSIONS = int(os.environ.get('WHISSLE_KEEP_SESSIONS', '20'))
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class TranscriptStore:
+    """Session log of final transcripts; records are dicts with ts, model and
+    text, plus any extra fields given to ``append`` (e.g. tags)."""
+
+    def __init__(self, directory=SESSION_DIR, window=200, fsync_every=20, fsync_seconds=1.0,
+                 keep=KEEP_TRANSCRIPTS):
+        self.directory = directory
+        self.keep = keep
+        self.sessions = 0
+        self.window = window
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.path = None
+        self.writer = None
+        self.reader = None
+        self.offsets = array('q')
+        self.recent = deque(maxlen=window)
+        self.size = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.disk_reads = 0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def new_session(self):
+        """Close the current log and start an empty one on the next append;
+        the old log is deleted unless transcripts are kept."""
+        self.close()
+        self.path = None
+        self.offsets = array('q')
+        self.recent.clear()
+        self.size = 0
+
+    def _open(self):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # makedirs leaves an existing directory's mode alone
+        os.chmod(self.directory, 0o700)
+        self.prune(KEEP_SESSIONS - 1 if self.keep else 0)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        self.sessions += 1
+        name = f"session-{stamp}-{os.getpid()}-{id(self):x}-{self.sessions}.jsonl"
+        self.path = os.path.join(self.directory, name)
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self.writer = os.fdopen(fd, 'ab')
+        self.last_sync = time.monotonic()
+
+    def prune(self, keep):
+        """Delete all but the newest ``keep`` session logs, except those that
+        another running instance is writing."""
+        try:
+            names = [name for name in os.listdir(self.directory)
+                     if name.startswith('session-') and name.endswith('.jsonl')]
+        except OSError:
+            return
+        paths = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                paths.append((os.path.getmtime(path), name, path))
+            except OSError:
+                pass
+        paths.sort(reverse=True)
+        for _, name, path in paths[keep:]:
+            # session-<date>-<time>-<pid>-<id>-<n>.jsonl
+            pid = name.split('-')[3]
+            if pid.isdigit() and int(pid) != os.getpid() and process_alive(int(pid)):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def append(self, text, model_name=None, **fields):
+        """Log one final transcript; returns its index."""
+        if self.writer is None:
+            self._open()
+        record = {'ts': time.time(), 'model': model_name, 'text': text, **fields}
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        index = len(self.offsets)
+        self.offsets.append(self.size)
+        self.writer.write(line)
+        self.size += len(line)
+        self.recent.append(record)
+        self.unsynced += 1
+        if (self.unsynced >= self.fsync_every
+                or time.monotonic() - self.last_sync >= self.fsync_seconds):
+            self.flush()
+        return index
+
+    def flush(self):
+        """Write buffered records and fsync the log."""
+        if self.writer is None or not self.unsynced:
+            return
+        self.writer.flush()
+        os.fsync(self.writer.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def get(self, index):
+        return self.read(index, index + 1)[0]
+
+    def read(self, start, stop):
+        """Records start..stop-1, from RAM when they are recent enough."""
+        start = max(0, start)
+        stop = min(stop, len(self.offsets))
+        if start >= stop:
+            return []
+        first_recent = len(self.offsets) - len(self.recent)
+        if start >= first_recent:
+            return [self.recent[i - first_recent] for i in range(start, stop)]
+        # Older than the window: read the byte range back from the log
+        if self.unsynced:
+            self.writer.flush()
+        if self.reader is None:
+            self.reader = open(self.path, 'rb')
+        end = self.offsets[stop] if stop < len(self.offsets) else self.size
+        self.reader.seek(self.offsets[start])
+        data = self.reader.read(end - self.offsets[start])
+        self.disk_reads += 1
+        return [json.loads(line) for line in data.splitlines()]
+
+    def close(self):
+        """Close the log; it is deleted unless transcripts are kept."""
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.path is not None and not self.keep:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def metrics(self):
+        return {
+            'records': len(self.offsets),
+            'records_in_memory': len(self.recent),
+            'log_bytes': self.size,
+            'disk_reads': self.disk_reads,
+            'path': self.path,
+        }
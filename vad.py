@@ -0,0 +1,129 @@
+from collections import deque
+
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Energy / zero-crossing voice activity gate for int16 PCM chunks.
+
+    Each chunk is split into short frames and classified in one vectorized
+    pass. A frame is speech when it is loud enough, or when it is only
+    moderately loud but has a high zero-crossing rate (unvoiced consonants
+    such as "s" or "f"). Both levels are set relative to the noise floor,
+    the ``floor_percentile`` of the last ``floor_ms`` of frame energies,
+    speech or not, so steady background noise is not mistaken for speech
+    however loud or hissy it is. Silence is held back in a pre-roll buffer so that
+    the start of a word is sent along with it, and sending continues for a
+    hangover period after the last speech frame so endings are not clipped.
+
+    Audio that has been through the AGC is classified at its level before
+    the gain: ``process(chunk, gain_db)`` takes the gain applied to it.
+    Otherwise the AGC lifts background noise over the threshold.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, threshold_db=-45.0,
+                 noise_margin_db=10.0, zcr_threshold=0.25, zcr_margin_db=6.0,
+                 hangover_ms=400, preroll_ms=300, floor_ms=3000, floor_percentile=10):
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.zcr_margin_db = zcr_margin_db
+        self.hangover_samples = int(sample_rate * hangover_ms / 1000)
+        self.preroll_bytes = int(sample_rate * preroll_ms / 1000) * 2
+        # Recent frame energies, starting from a quiet room, so a noisy room
+        # raises the thresholds once it fills the history
+        self.noise_floor_db = threshold_db - noise_margin_db
+        self.floor_percentile = floor_percentile
+        self.energies = np.full(max(1, floor_ms // frame_ms), self.noise_floor_db, dtype=np.float32)
+        self.energies_at = 0
+        self.hangover_left = 0
+        self.preroll = deque()
+        self.preroll_size = 0
+        self.chunks_in = 0
+        self.bytes_in = 0
+        self.chunks_sent = 0
+        self.bytes_sent = 0
+        self.chunks_dropped = 0
+
+    def speech_frames(self, samples, gain_db=0.0):
+        """Return a boolean speech mask with one entry per frame."""
+        n_frames = len(samples) // self.frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        floats = frames.astype(np.float32) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(floats * floats, axis=1) + 1e-10) - gain_db
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_len
+
+        self._track_floor(energy_db)
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        zcr_threshold_db = max(self.threshold_db - self.noise_margin_db,
+                               self.noise_floor_db + self.zcr_margin_db)
+        return (energy_db > threshold) | ((energy_db > zcr_threshold_db) & (zcr > self.zcr_threshold))
+
+    def _track_floor(self, energy_db):
+        # Every frame counts, whatever it is classified as: a low percentile
+        # of the history is the background between words
+        n = len(self.energies)
+        energy_db = energy_db[-n:]
+        index = (self.energies_at + np.arange(len(energy_db))) % n
+        self.energies[index] = energy_db
+        self.energies_at = (self.energies_at + len(energy_db)) % n
+        self.noise_floor_db = float(np.percentile(self.energies, self.floor_percentile))
+
+    def process(self, chunk, gain_db=0.0):
+        """Feed one chunk, amplified by gain_db; returns the list of chunks
+        that should be sent."""
+        self.chunks_in += 1
+        self.bytes_in += len(chunk)
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        speech = self.speech_frames(samples, gain_db)
+
+        if speech.any():
+            last_speech = len(speech) - 1 - int(np.argmax(speech[::-1]))
+            trailing = len(samples) - (last_speech + 1) * self.frame_len
+            self.hangover_left = self.hangover_samples - trailing
+            out = self._flush_preroll()
+            out.append(chunk)
+        elif self.hangover_left > 0:
+            self.hangover_left -= len(samples)
+            out = [chunk]
+        else:
+            self._hold(chunk)
+            return []
+
+        self.chunks_sent += len(out)
+        self.bytes_sent += sum(len(c) for c in out)
+        return out
+
+    def _hold(self, chunk):
+        self.preroll.append(chunk)
+        self.preroll_size += len(chunk)
+        # Keep whole chunks only while they are needed to cover the pre-roll
+        while self.preroll and self.preroll_size - len(self.preroll[0]) >= self.preroll_bytes:
+            self.preroll_size -= len(self.preroll.popleft())
+            self.chunks_dropped += 1
+
+    def _flush_preroll(self):
+        if not self.preroll:
+            return []
+        held = b''.join(self.preroll)
+        self.preroll.clear()
+        self.preroll_size = 0
+        if self.preroll_bytes <= 0:
+            return []
+        return [held[-self.preroll_bytes:]]
+
+    def stats(self):
+        """Counters for the audio that never left the client."""
+        # Chunks still held in the pre-roll have not been sent either
+        return {
+            'chunks_in': self.chunks_in,
+            'chunks_sent': self.chunks_sent,
+            'chunks_suppressed': self.chunks_dropped + len(self.preroll),
+            'bytes_in': self.bytes_in,
+            'bytes_sent': self.bytes_sent,
+            'bytes_suppressed': self.bytes_in - self.bytes_sent,
+        }